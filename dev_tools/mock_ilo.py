@@ -1,48 +1,867 @@
 #!/usr/bin/env python
-from flask import Flask, request
+"""Local simulator for OneView, iLO (Redfish) and IMC apis.
 
+Serves a synthetic fleet of N hosts:
+
+- OneView: /rest/login-sessions, /rest/version, /rest/server-hardware, /rest/racks,
+  /rest/server-profiles and /rest/tasks with 'nextPageUri' paging. Collections support the query
+  parameters 'filter' (simplified), 'fields' and 'scopeUris' (servers are assigned to /rest/scopes/site-[abc]).
+  /rest/index/resources and /rest/index/associations serve summaries of servers, profiles and racks.
+- Redfish: /redfish/v1/... Systems, SmartStorage, Bios, Thermal, SecurityService, SessionService.
+  EventService/SSE streams power state changes ($filter on OriginResource, EventType and MessageId),
+  power actions take MOCK_POWER_SECONDS (default 0) seconds.
+  Thermal and SecurityService send ETags and reject PATCH requests with outdated If-Match (412).
+  The iLO is selected by the host the request was sent to. Every host gets an address from
+  127.1.0.0/16, which is routed to localhost on linux, i.e. http://127.1.0.5:8000/redfish/v1/Systems/1
+  is iLO number 5. Requests to any other address are served by iLO number 1.
+- IMC: /imcrs/plat/res/device and /imcrs/icc/confFile with 'link rel=next' paging.
+
+Latency, error rate and throttling (429 responses) can be configured, see --help.
+"""
+
+from flask import Flask, Response, request, jsonify, abort
+
+import argparse
+import copy
+import hashlib
+import itertools
 import json
 import logging
 import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from urllib.parse import urlencode
 
 logging.basicConfig(
     format="%(levelname)s %(asctime)s [%(name)s] - %(message)s", level=os.environ.get("LOGLEVEL", "INFO")
 )
 
 app = Flask(__name__)
+# api clients send uris with and without trailing slashes
+app.url_map.strict_slashes = False
+
+RESPONSES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ilo_responses")
 
 
 def load(src):
-    with open(src) as json_file:
+    with open(os.path.join(RESPONSES_DIR, src)) as json_file:
         return json.load(json_file)
 
 
 def debug(logger, request):
     logger.info("{}: uri: {}".format(request.method, request.url))
-    logger.info("{}: header: {}".format(request.method, request.headers))
-    if request.method in ["PATCH", "PUT" "POST"]:
-        logger.info("{}: payload: {}".format(request.method, request.get_json(force=True)))
+    logger.debug("{}: header: {}".format(request.method, request.headers))
+    if request.method in ["PATCH", "PUT", "POST"]:
+        logger.info("{}: payload: {}".format(request.method, request.get_json(force=True, silent=True)))
+
+
+def settings_info(settings_uri):
+    return {
+        "@odata.type": "#Settings.v1_0_0.Settings",
+        "Messages": [],
+        "SettingsObject": {"@odata.id": settings_uri},
+    }
+
+
+class Fleet(object):
+    """Synthetic fleet of servers, racks, server profiles and IMC devices"""
+
+    MODELS = [("DL360 Gen10", "iLO5"), ("DL380 Gen10", "iLO5"), ("DL360 Gen9", "iLO4"), ("DL380 Gen10 Plus", "iLO5")]
+    RACK_SIZE = 20
+    SCOPES = ["/rest/scopes/site-a", "/rest/scopes/site-b", "/rest/scopes/site-c"]
+
+    def __init__(self, size, seed=0, disks=8):
+        rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.servers = []
+        self.ilos = {}
+        self.racks = []
+        self.profiles = []
+        self.tasks = {}
+        # (ilo, $filter, queue) of open EventService SSE streams
+        self.subscribers = []
+        self._event_ids = itertools.count(1)
+        self.devices = []
+        self.conf_files = {}
+        # resource uri -> scope uris
+        self.scopes = {}
+        self._ids = itertools.count(1000)
+        base_time = time.time() - 86400
+        for i in range(1, size + 1):
+            short_model, mp_model = rnd.choice(Fleet.MODELS)
+            hw_id = str(uuid.UUID(int=rnd.getrandbits(128)))
+            ip = "127.1.{}.{}".format(i // 256, i % 256)
+            modified = Fleet.timestamp(base_time + i)
+            server = {
+                "type": "server-hardware-12",
+                "category": "server-hardware",
+                "uri": "/rest/server-hardware/" + hw_id,
+                "uuid": hw_id,
+                "name": "enc{} bay {}".format(i // 16, i % 16),
+                "serverName": "server{:05d}.mock".format(i),
+                "shortModel": short_model,
+                "model": "ProLiant " + short_model,
+                "mpModel": mp_model,
+                "mpFirmwareVersion": "2.72 Sep 04 2022",
+                "formFactor": "1U",
+                "memoryMb": rnd.choice([131072, 262144, 524288]),
+                "processorCount": 2,
+                "processorCoreCount": rnd.choice([16, 24, 32]),
+                "processorType": "Intel(R) Xeon(R) Gold 6248 CPU @ 2.50GHz",
+                "partNumber": "P19766-B21",
+                "serialNumber": "CZ{:08d}".format(i),
+                "romVersion": "U32 v2.72 (09/29/2022)",
+                "powerState": rnd.choice(["On", "On", "On", "Off"]),
+                "status": rnd.choice(["OK", "OK", "OK", "Warning"]),
+                "state": "NoProfileApplied",
+                "scopesUri": "/rest/index/resources/server-hardware/{}?category=scopes".format(hw_id),
+                "modified": modified,
+                "created": modified,
+                "eTag": modified,
+                "mpHostInfo": {
+                    "mpHostName": "ilo{:05d}.mock".format(i),
+                    "mpIpAddresses": [
+                        {"address": "fe80::{:x}".format(i), "type": "LinkLocal"},
+                        {"address": ip, "type": "Static"},
+                    ],
+                },
+            }
+            self.servers.append(server)
+            self.scopes[server["uri"]] = [Fleet.SCOPES[i % len(Fleet.SCOPES)]]
+            self.ilos[ip] = self._create_ilo(server, rnd, disks)
+            if i % 2 == 0:
+                self._create_profile(server, rnd)
+        for r, chunk in enumerate(range(0, len(self.servers), Fleet.RACK_SIZE)):
+            rack_id = str(uuid.UUID(int=rnd.getrandbits(128)))
+            self.racks.append(
+                {
+                    "uri": "/rest/racks/" + rack_id,
+                    "id": rack_id,
+                    "name": "rack{:04d}".format(r),
+                    "model": "HPE 42U 600mmx1200mm G2 Kitted Advanced Shock Rack",
+                    "partNumber": "P9K40A",
+                    "serialNumber": "RK{:08d}".format(r),
+                    "depth": 1200,
+                    "height": 2010,
+                    "width": 600,
+                    "thermalLimit": 10000,
+                    "uHeight": 42,
+                    "rackMounts": [
+                        {
+                            "mountUri": s["uri"],
+                            "location": "CenterFront",
+                            "topUSlot": 40 - 2 * n,
+                            "uHeight": 1,
+                        }
+                        for n, s in enumerate(self.servers[chunk:chunk + Fleet.RACK_SIZE])  # fmt: skip
+                    ],
+                }
+            )
+        for i in range(1, size + 1):
+            self.devices.append(
+                {
+                    "id": str(i),
+                    "label": "switch{:05d}".format(i),
+                    "ip": "10.{}.{}.{}".format(i // 65536, (i // 256) % 256, i % 256),
+                    "status": "1",
+                    "statusDesc": "Normal",
+                    "typeName": "HPE FlexFabric 5945",
+                    "link": {"@op": "GET", "@rel": "self", "@href": "/imcrs/plat/res/device/{}".format(i)},
+                }
+            )
+        for i in range(1, 11):
+            self._create_conf_file("folder{:02d}".format(i), "-1", -1, "")
+
+    @staticmethod
+    def timestamp(t):
+        return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(t))
+
+    def next_id(self):
+        return str(next(self._ids))
+
+    def _create_ilo(self, server, rnd, disks):
+        boot_sources = [
+            {"BootString": "Generic USB Boot", "StructuredBootString": "Generic.USB.1.1"},
+            {"BootString": "Internal SD Card 1 : Generic USB3.0-CRW", "StructuredBootString": "HD.SD.1.2"},
+            {
+                "BootString": "Embedded RAID 1 : RAID1 Logical Drive 1(Target:0, Lun:0)",
+                "StructuredBootString": "HD.EmbRAID.1.4",
+            },
+            {
+                "BootString": "Embedded FlexibleLOM 1 Port 1 : NIC (PXE IPv4)",
+                "StructuredBootString": "NIC.FlexLOM.1.1.IPv4",
+            },
+        ]
+        order = [b["StructuredBootString"] for b in boot_sources]
+        thermal = load("thermal.json")
+        security = load("SecurityService.json")
+        return {
+            "server": server,
+            "system": {
+                "@odata.id": "/redfish/v1/Systems/1/",
+                "Id": "1",
+                "Model": server["model"],
+                "SerialNumber": server["serialNumber"],
+                "UUID": server["uuid"],
+                "PowerState": server["powerState"],
+                "Status": {"Health": server["status"], "State": "Enabled"},
+                "Oem": {
+                    "Hpe": {
+                        "PostState": "FinishedPost",
+                        "SmartStorageConfig": [{"@odata.id": "/redfish/v1/systems/1/smartstorageconfig/"}],
+                    }
+                },
+            },
+            "bios": {
+                "@odata.id": "/redfish/v1/Systems/1/Bios/",
+                "@Redfish.Settings": settings_info("/redfish/v1/Systems/1/Bios/settings/"),
+                "Attributes": {"BootMode": "Uefi"},
+            },
+            "bios_settings": {"Attributes": {}},
+            "boot": {
+                "@Redfish.Settings": settings_info("/redfish/v1/Systems/1/Bios/boot/settings/"),
+                "BootSources": boot_sources,
+                "PersistentBootConfigOrder": list(order),
+            },
+            "boot_settings": {"PersistentBootConfigOrder": list(order)},
+            "disks": [
+                {
+                    "CapacityGB": rnd.choice([480, 960, 1920]),
+                    "Location": "1I:1:{}".format(d),
+                    "MediaType": rnd.choice(["SSD", "HDD"]),
+                }
+                for d in range(1, disks + 1)
+            ],
+            "storage_config": {"Location": "Slot 0", "LogicalDrives": [], "DataGuard": "Disabled"},
+            "thermal": thermal,
+            "security": security,
+        }
+
+    def _create_profile(self, server, rnd):
+        profile_id = str(uuid.UUID(int=rnd.getrandbits(128)))
+        self.profiles.append(
+            {
+                "type": "ServerProfileV12",
+                "uri": "/rest/server-profiles/" + profile_id,
+                "name": "profile-" + server["serverName"],
+                "serverHardwareUri": server["uri"],
+                "serverProfileTemplateUri": "/rest/server-profile-templates/default",
+                "templateCompliance": rnd.choice(["Compliant", "NonCompliant"]),
+                "refreshState": "NotRefreshing",
+                "status": "OK",
+                "modified": server["modified"],
+            }
+        )
+        server["state"] = "ProfileApplied"
+        server["serverProfileUri"] = "/rest/server-profiles/" + profile_id
+
+    def _create_conf_file(self, name, file_type, parent, content):
+        file_id = self.next_id()
+        self.conf_files[file_id] = {
+            "confFileId": file_id,
+            "confFileName": name,
+            "confFileType": file_type,
+            "cfgFileParent": str(parent),
+            "content": content,
+        }
+        return file_id
+
+    def create_task(self, resource_uri, duration):
+        task_id = self.next_id()
+        now = time.time()
+        self.tasks[task_id] = {
+            "uri": "/rest/tasks/" + task_id,
+            "category": "tasks",
+            "associatedResource": {"resourceUri": resource_uri},
+            "taskState": "Running",
+            "taskStatus": "Running",
+            "created": Fleet.timestamp(now),
+            "modified": Fleet.timestamp(now),
+            "_done": now + duration,
+        }
+        return task_id
+
+    def get_task(self, task_id):
+        task = self.tasks[task_id]
+        if task["taskState"] == "Running" and time.time() >= task["_done"]:
+            task["taskState"] = "Completed"
+            task["taskStatus"] = "Completed"
+            task["modified"] = Fleet.timestamp(time.time())
+            for p in self.profiles:
+                if p["uri"] == task["associatedResource"]["resourceUri"]:
+                    p["templateCompliance"] = "Compliant"
+        return dict((k, v) for k, v in task.items() if not k.startswith("_"))
+
+    def publish(self, ilo, message_id, message, origin):
+        event = {
+            "@odata.type": "#Event.v1_4_0.Event",
+            "Id": str(next(self._event_ids)),
+            "Events": [
+                {
+                    "EventType": "Alert",
+                    "MessageId": message_id,
+                    "Message": message,
+                    "OriginOfCondition": {"@odata.id": origin},
+                    "EventTimestamp": Fleet.timestamp(time.time()),
+                }
+            ],
+        }
+        with self.lock:
+            subscribers = [s for s in self.subscribers if s[0] is ilo and matches_event_filter(event, s[1])]
+        for _, _, events in subscribers:
+            events.put(event)
+
+    def ilo(self):
+        host = request.host.partition(":")[0]
+        return self.ilos.get(host) or self.ilos[self.servers[0]["mpHostInfo"]["mpIpAddresses"][1]["address"]]
+
+
+class FaultInjector(object):
+    """Adds latency, random errors and throttling to requests"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = rate_limit
+        self.last = time.time()
+
+    def throttled(self):
+        if not self.rate_limit:
+            return False
+        with self.lock:
+            now = time.time()
+            self.tokens = min(self.rate_limit, self.tokens + (now - self.last) * self.rate_limit)
+            self.last = now
+            if self.tokens < 1:
+                return True
+            self.tokens -= 1
+            return False
+
+    def before_request(self):
+        if self.throttled():
+            response = jsonify({"errorCode": "TOO_MANY_REQUESTS", "message": "throttled by mock"})
+            response.status_code = 429
+            response.headers["Retry-After"] = "1"
+            return response
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            response = jsonify({"errorCode": "INTERNAL_ERROR", "message": "random error injected by mock"})
+            response.status_code = 503
+            return response
+        return None
+
+
+fleet = Fleet(int(os.environ.get("MOCK_HOSTS", "10")))
+faults = FaultInjector()
+page_size = 100
+
+
+@app.before_request
+def before_request():
+    debug(logging.getLogger("request"), request)
+    return faults.before_request()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# helpers
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+FILTER_TERM = re.compile(r"^\s*'?(\w+)'?\s*(=|==|<>|!=|gt|ge|lt|le|matches)\s*'([^']*)'\s*$", re.IGNORECASE)
+
+
+def matches_filter(member, filters):
+    """Simplified OneView filter support: "field op 'value'" terms joined by AND / OR"""
+    for f in filters:
+        f = f.strip().strip('"')
+        if not f:
+            continue
+        if not any(
+            all(matches_term(member, t) for t in re.split(r"\s+AND\s+", alternative))
+            for alternative in re.split(r"\s+OR\s+", f)
+        ):
+            return False
+    return True
+
+
+def matches_term(member, term):
+    m = FILTER_TERM.match(term)
+    if not m:
+        return True
+    field, op, value = m.group(1), m.group(2).lower(), m.group(3)
+    actual = member.get(field)
+    if actual is None:
+        return op in ["<>", "!="]
+    actual = str(actual)
+    if op in ["=", "=="]:
+        return actual == value
+    if op in ["<>", "!="]:
+        return actual != value
+    if op == "matches":
+        return re.match("^" + re.escape(value).replace("%", ".*").replace("\\%", ".*") + "$", actual) is not None
+    return {"gt": actual > value, "ge": actual >= value, "lt": actual < value, "le": actual <= value}[op]
+
+
+def project(member, fields):
+    if not fields:
+        return member
+    return dict((k, v) for k, v in member.items() if k in fields)
+
+
+def oneview_page(path, members):
+    filters = request.args.getlist("filter")
+    if filters:
+        # index resources: filters apply to attributes as well
+        members = [m for m in members if matches_filter(dict(m.get("attributes") or {}, **m), filters)]
+    scope_uris = request.args.get("scopeUris")
+    if scope_uris:
+        # "'/rest/scopes/a' OR '/rest/scopes/b'"
+        scopes = set(u.strip().strip("'") for u in re.split(r"\s+OR\s+", scope_uris.strip('"')))
+        members = [m for m in members if scopes.intersection(fleet.scopes.get(m.get("uri"), []))]
+    fields = [f for f in request.args.get("fields", "").split(",") if f]
+    start = int(request.args.get("start", 0))
+    count = int(request.args.get("count", page_size))
+    page = [project(m, fields) for m in members[start:start + count]]  # fmt: skip
+    data = {
+        "type": "Collection",
+        "uri": request.full_path,
+        "start": start,
+        "count": len(page),
+        "total": len(members),
+        "members": page,
+    }
+    if start + count < len(members):
+        args = request.args.to_dict(flat=False)
+        args["start"] = [str(start + count)]
+        args["count"] = [str(count)]
+        data["nextPageUri"] = "{}?{}".format(path, urlencode(args, doseq=True))
+    return jsonify(data)
+
+
+def find(items, key, value):
+    for item in items:
+        if item.get(key) == value:
+            return item
+    abort(404)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# OneView
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+@app.route("/rest/login-sessions", methods=["POST", "DELETE"])
+def oneview_login_sessions():
+    if request.method == "POST":
+        return jsonify({"sessionID": uuid.uuid4().hex, "partnerData": {}})
+    return "", 204
+
+
+@app.route("/rest/version", methods=["GET"])
+def oneview_version():
+    return jsonify({"currentVersion": 4200, "minimumVersion": 120})
+
+
+@app.route("/rest/server-hardware", methods=["GET"])
+def oneview_server_hardware_list():
+    return oneview_page("/rest/server-hardware", fleet.servers)
+
+
+@app.route("/rest/server-hardware/<id>", methods=["GET"])
+def oneview_server_hardware(id):
+    return jsonify(find(fleet.servers, "uuid", id))
+
+
+@app.route("/rest/racks", methods=["GET"])
+def oneview_racks_list():
+    return oneview_page("/rest/racks", fleet.racks)
+
+
+@app.route("/rest/racks/<id>", methods=["GET"])
+def oneview_rack(id):
+    return jsonify(find(fleet.racks, "id", id))
+
+
+@app.route("/rest/server-profiles", methods=["GET"])
+def oneview_server_profiles_list():
+    return oneview_page("/rest/server-profiles", fleet.profiles)
+
+
+@app.route("/rest/server-profiles/<id>", methods=["GET", "PATCH"])
+def oneview_server_profile(id):
+    profile = find(fleet.profiles, "uri", "/rest/server-profiles/" + id)
+    if request.method == "PATCH":
+        with fleet.lock:
+            task_id = fleet.create_task(profile["uri"], duration=float(os.environ.get("MOCK_TASK_SECONDS", "2")))
+        return "", 202, {"Location": "/rest/tasks/" + task_id}
+    return jsonify(profile)
+
+
+@app.route("/rest/server-profiles/<id>/compliance-preview", methods=["GET"])
+def oneview_server_profile_compliance_preview(id):
+    find(fleet.profiles, "uri", "/rest/server-profiles/" + id)
+    return jsonify({"type": "ServerProfileCompliancePreviewV1", "isOnlineUpdate": True, "manualUpdates": []})
+
+
+def index_resource(resource, category, attributes):
+    return {
+        "type": "IndexResourceV300",
+        "uri": resource["uri"],
+        "category": category,
+        "name": resource.get("name"),
+        "created": resource.get("created"),
+        "modified": resource.get("modified"),
+        "eTag": resource.get("eTag"),
+        "attributes": dict((a, resource.get(a)) for a in attributes if a in resource),
+    }
+
+
+@app.route("/rest/index/resources", methods=["GET"])
+def oneview_index_resources():
+    categories = request.args.getlist("category")
+    resources = []
+    if not categories or "server-hardware" in categories:
+        attributes = ["uuid", "serialNumber", "shortModel", "model", "mpModel", "powerState", "state", "status"]
+        resources += [index_resource(s, "server-hardware", attributes) for s in fleet.servers]
+    if not categories or "server-profiles" in categories:
+        attributes = ["serverHardwareUri", "templateCompliance", "status"]
+        resources += [index_resource(p, "server-profiles", attributes) for p in fleet.profiles]
+    if not categories or "racks" in categories:
+        resources += [index_resource(r, "racks", ["serialNumber", "model"]) for r in fleet.racks]
+    query = request.args.get("query", "").strip('"').lower()
+    if query:
+        resources = [r for r in resources if query in json.dumps(r).lower()]
+    return oneview_page("/rest/index/resources", resources)
 
 
-@app.route("/redfish/v1/Managers/1/SecurityService", methods=["GET", "PATCH"])
+@app.route("/rest/index/associations", methods=["GET"])
+def oneview_index_associations():
+    associations = [
+        {"name": "server_profiles_to_server_hardware", "parentUri": p["uri"], "childUri": p["serverHardwareUri"]}
+        for p in fleet.profiles
+    ] + [
+        {"name": "racks_to_physical_server_hardware", "parentUri": r["uri"], "childUri": m["mountUri"]}
+        for r in fleet.racks
+        for m in r["rackMounts"]
+    ]
+    for arg, key in [("name", "name"), ("parentUri", "parentUri"), ("childUri", "childUri")]:
+        value = request.args.get(arg)
+        if value:
+            associations = [a for a in associations if a[key] == value]
+    return oneview_page("/rest/index/associations", associations)
+
+
+@app.route("/rest/tasks", methods=["GET"])
+def oneview_tasks_list():
+    with fleet.lock:
+        tasks = [fleet.get_task(t) for t in sorted(fleet.tasks)]
+    return oneview_page("/rest/tasks", tasks)
+
+
+@app.route("/rest/tasks/<id>", methods=["GET"])
+def oneview_task(id):
+    with fleet.lock:
+        if id not in fleet.tasks:
+            abort(404)
+        return jsonify(fleet.get_task(id))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Redfish
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+@app.route("/redfish/v1/", methods=["GET"])
+def redfish_root():
+    return jsonify({"@odata.id": "/redfish/v1/", "RedfishVersion": "1.6.0", "UUID": fleet.ilo()["server"]["uuid"]})
+
+
+@app.route("/redfish/v1/SessionService/Sessions/", methods=["POST"])
+def redfish_sessions():
+    session_id = uuid.uuid4().hex
+    location = "/redfish/v1/SessionService/Sessions/" + session_id
+    return jsonify({"@odata.id": location}), 201, {"X-Auth-Token": uuid.uuid4().hex, "Location": location}
+
+
+@app.route("/redfish/v1/SessionService/Sessions/<id>", methods=["DELETE"])
+def redfish_session(id):
+    return "", 200
+
+
+@app.route("/redfish/v1/Systems/1/", methods=["GET"])
+def redfish_system():
+    return jsonify(fleet.ilo()["system"])
+
+
+@app.route("/redfish/v1/Systems/1/Actions/ComputerSystem.Reset/", methods=["POST"])
+def redfish_system_reset():
+    ilo = fleet.ilo()
+    action = request.get_json(force=True).get("ResetType")
+    with fleet.lock:
+        if action == "PushPowerButton":
+            state = "Off" if ilo["system"]["PowerState"] == "On" else "On"
+        else:
+            state = "Off" if action in ["ForceOff", "GracefulShutdown"] else "On"
+        # pending settings are applied by POST
+        post = state == "On" and (action != "On" or ilo["system"]["PowerState"] != "On")
+
+    def set_power_state():
+        with fleet.lock:
+            ilo["system"]["PowerState"] = state
+            ilo["server"]["powerState"] = state
+            if post:
+                apply_settings(ilo)
+        message_id = "iLOEvents.2.1.ServerPoweredOn" if state == "On" else "iLOEvents.2.1.ServerPoweredOff"
+        fleet.publish(ilo, message_id, "Server power {0}".format(state.lower()), "/redfish/v1/Systems/1/")
+
+    seconds = float(os.environ.get("MOCK_POWER_SECONDS", "0"))
+    if seconds and (post or state != ilo["system"]["PowerState"]):
+        if state != ilo["system"]["PowerState"]:
+            ilo["system"]["PowerState"] = "PoweringOn" if state == "On" else "PoweringOff"
+        if post:
+            ilo["system"]["Oem"]["Hpe"]["PostState"] = "InPost"
+        threading.Timer(seconds, set_power_state).start()
+    else:
+        set_power_state()
+    return jsonify(
+        {"error": {"code": "iLO.0.10.ExtendedInfo", "@Message.ExtendedInfo": [{"MessageId": "Base.1.4.Success"}]}}
+    )
+
+
+def apply_settings(ilo):
+    """Apply pending bios and boot settings like POST does, caller holds fleet.lock"""
+    ilo["boot"]["PersistentBootConfigOrder"] = list(ilo["boot_settings"]["PersistentBootConfigOrder"])
+    ilo["bios"]["Attributes"].update(ilo["bios_settings"]["Attributes"])
+    ilo["bios_settings"]["Attributes"] = {}
+    for resource in (ilo["bios"], ilo["boot"]):
+        resource["@Redfish.Settings"]["Messages"] = [{"MessageId": "Base.1.0.Success"}]
+        resource["@Redfish.Settings"]["Time"] = fleet.timestamp(time.time())
+    ilo["system"]["Oem"]["Hpe"]["PostState"] = "FinishedPost"
+
+
+def matches_event_filter(event, event_filter):
+    """Simplified $filter support: "Property eq 'value'" terms joined by 'and' / 'or'"""
+    if not event_filter:
+        return True
+    record = event["Events"][0]
+    values = {
+        "OriginResource": record["OriginOfCondition"]["@odata.id"].rstrip("/"),
+        "EventType": record["EventType"],
+        "MessageId": record["MessageId"],
+    }
+    return any(
+        all(
+            values.get(m.group(1)) == m.group(2).rstrip("/")
+            for m in re.finditer(r"(\w+)\s+eq\s+'([^']*)'", alternative)
+        )
+        for alternative in re.split(r"\s+or\s+", event_filter)
+    )
+
+
+@app.route("/redfish/v1/EventService/SSE", methods=["GET"])
+def redfish_sse():
+    ilo = fleet.ilo()
+    events = queue.Queue()
+    subscriber = (ilo, request.args.get("$filter"), events)
+    with fleet.lock:
+        fleet.subscribers.append(subscriber)
+
+    def stream():
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=1)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "id: {0}\ndata: {1}\n\n".format(event["Id"], json.dumps(event))
+        finally:
+            with fleet.lock:
+                fleet.subscribers.remove(subscriber)
+
+    return Response(stream(), mimetype="text/event-stream")
+
+
+@app.route("/redfish/v1/Systems/1/Bios/", methods=["GET"])
+def redfish_bios():
+    return jsonify(fleet.ilo()["bios"])
+
+
+@app.route("/redfish/v1/Systems/1/Bios/settings/", methods=["GET", "PATCH"])
+def redfish_bios_settings():
+    ilo = fleet.ilo()
+    if request.method == "PATCH":
+        ilo["bios_settings"]["Attributes"].update(request.get_json(force=True).get("Attributes", {}))
+        return jsonify({}), 200
+    return jsonify(ilo["bios_settings"])
+
+
+@app.route("/redfish/v1/Systems/1/Bios/boot/", methods=["GET"])
+def redfish_boot():
+    return jsonify(fleet.ilo()["boot"])
+
+
+@app.route("/redfish/v1/Systems/1/Bios/boot/settings/", methods=["GET", "PATCH"])
+def redfish_boot_settings():
+    ilo = fleet.ilo()
+    if request.method == "PATCH":
+        ilo["boot_settings"].update(request.get_json(force=True))
+        return jsonify({}), 200
+    return jsonify(ilo["boot_settings"])
+
+
+@app.route("/redfish/v1/Systems/1/SmartStorage/ArrayControllers/0/DiskDrives/", methods=["GET"])
+def redfish_disk_drives():
+    disks = fleet.ilo()["disks"]
+    return jsonify(
+        {
+            "Members": [
+                {"@odata.id": "/redfish/v1/Systems/1/SmartStorage/ArrayControllers/0/DiskDrives/{}/".format(n)}
+                for n in range(len(disks))
+            ]
+        }
+    )
+
+
+@app.route("/redfish/v1/Systems/1/SmartStorage/ArrayControllers/0/DiskDrives/<int:n>/", methods=["GET"])
+def redfish_disk_drive(n):
+    disks = fleet.ilo()["disks"]
+    if n >= len(disks):
+        abort(404)
+    return jsonify(disks[n])
+
+
+@app.route("/redfish/v1/systems/1/smartstorageconfig/", methods=["GET"])
+def redfish_smartstorage_config():
+    return jsonify(fleet.ilo()["storage_config"])
+
+
+@app.route("/redfish/v1/systems/1/smartstorageconfig/settings/", methods=["PUT"])
+def redfish_smartstorage_config_settings():
+    fleet.ilo()["storage_config"].update(request.get_json(force=True))
+    return jsonify({}), 200
+
+
+def etag(data):
+    return 'W/"{}"'.format(hashlib.md5(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:8])
+
+
+def with_etag(data):
+    response = jsonify(data)
+    response.headers["ETag"] = etag(data)
+    return response
+
+
+def precondition_failed(data):
+    """True if the request has an If-Match header which does not match the ETag of data"""
+    if_match = request.headers.get("If-Match")
+    return bool(if_match) and if_match != etag(data)
+
+
+@app.route("/redfish/v1/Managers/1/SecurityService/", methods=["GET", "PATCH"])
 def security_service():
-    logger = logging.getLogger("security_service")
-    debug(logger, request)
+    ilo = fleet.ilo()
     if request.method == "PATCH":
+        if precondition_failed(ilo["security"]):
+            return jsonify({"error": {"code": "Base.1.4.PreconditionFailed"}}), 412
+        ilo["security"].update(request.get_json(force=True))
         return "", 204
-    elif request.method == "GET":
-        return load("ilo_responses/SecurityService.json")
+    return with_etag(ilo["security"])
 
 
-@app.route("/redfish/v1/Chassis/1/Thermal", methods=["GET", "PATCH"])
+@app.route("/redfish/v1/Chassis/1/Thermal/", methods=["GET", "PATCH"])
 def thermal():
-    logger = logging.getLogger("thermal")
-    debug(logger, request)
+    ilo = fleet.ilo()
     if request.method == "PATCH":
+        if precondition_failed(ilo["thermal"]):
+            return jsonify({"error": {"code": "Base.1.4.PreconditionFailed"}}), 412
+        patch = request.get_json(force=True)
+        ilo["thermal"]["Oem"]["Hpe"].update(patch.get("Oem", {}).get("Hpe", {}))
         return "", 204
-    elif request.method == "GET":
-        return load("ilo_responses/thermal.json")
+    return with_etag(ilo["thermal"])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# IMC
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+def imc_page(path, key, items):
+    start = int(request.args.get("start", 0))
+    size = int(request.args.get("size", page_size))
+    data = {key: items[start:start + size]}  # fmt: skip
+    if start + size < len(items):
+        data["link"] = {
+            "@op": "GET",
+            "@rel": "next",
+            "@href": "http://{}/imcrs/{}?start={}&size={}".format(request.host, path, start + size, size),
+        }
+    return jsonify(data)
+
+
+@app.route("/imcrs/plat/res/device", methods=["GET"])
+def imc_devices():
+    return imc_page("plat/res/device", "device", fleet.devices)
+
+
+@app.route("/imcrs/icc/confFile/list/<folder_id>", methods=["GET"])
+def imc_conf_file_list(folder_id):
+    with fleet.lock:
+        items = [f for f in fleet.conf_files.values() if f["cfgFileParent"] == str(folder_id)]
+    return imc_page("icc/confFile/list/" + folder_id, "confFile", items)
+
+
+@app.route("/imcrs/icc/confFile", methods=["POST"])
+def imc_conf_file_create():
+    data = request.get_json(force=True)
+    with fleet.lock:
+        file_id = fleet._create_conf_file(
+            data["confFileName"], data["confFileType"], data["cfgFileParent"], data.get("content", "")
+        )
+    return "", 201, {"Location": "http://{}/imcrs/icc/confFile/{}".format(request.host, file_id)}
+
+
+@app.route("/imcrs/icc/confFile/<file_id>", methods=["GET", "DELETE"])
+def imc_conf_file(file_id):
+    with fleet.lock:
+        if file_id not in fleet.conf_files:
+            abort(404)
+        if request.method == "DELETE":
+            del fleet.conf_files[file_id]
+            return "", 204
+        return jsonify(copy.deepcopy(fleet.conf_files[file_id]))
+
+
+def main():
+    global fleet, faults, page_size
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listen", default="0.0.0.0", help="listen address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8000, help="listen port (default: %(default)s)")
+    parser.add_argument("--hosts", type=int, default=10, help="number of servers in fleet (default: %(default)s)")
+    parser.add_argument("--disks", type=int, default=8, help="number of disks per server (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for fleet generation (default: %(default)s)")
+    parser.add_argument("--page-size", type=int, default=100, help="default page size (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="additional random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="ratio of requests failing with 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second, excess gets 429")
+    args = parser.parse_args()
+
+    fleet = Fleet(args.hosts, seed=args.seed, disks=args.disks)
+    faults = FaultInjector(args.latency, args.jitter, args.error_rate, args.rate_limit, seed=args.seed)
+    page_size = args.page_size
+    app.run(host=args.listen, port=args.port, threaded=True)
 
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=8000)
+    main()
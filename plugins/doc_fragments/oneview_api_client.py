@@ -70,4 +70,17 @@ options:
         type: int
         aliases: [oneview_api_version]
         version_added: 2.0.0
+    api_version_negotiation:
+        description:
+            - Use the highest api version supported by OneView and not higher than I(api_version).
+            - The versions supported by OneView (C(/rest/version)) are cached in I(api_version_cache) for one day.
+        default: no
+        type: bool
+        version_added: 3.4.0
+    api_version_cache:
+        description:
+            - Directory caching the api versions supported by OneView appliances, see I(api_version_negotiation).
+        default: ~/.cache/unbelievable.hpe
+        type: path
+        version_added: 3.4.0
 """
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    DOCUMENTATION = r"""
+options:
+    server_filter:
+        description:
+            - Select server hardware, the filter is evaluated by OneView so only matching server hardware is
+                transferred.
+            - Multiple values of a key are combined by C(OR), keys are combined by C(AND).
+        type: dict
+        required: no
+        suboptions:
+            models:
+                description: Server models (C(shortModel)), i.e. C(DL360 Gen10).
+                type: list
+                elements: str
+            mp_models:
+                description: Management processor models (C(mpModel)), i.e. C(iLO5).
+                type: list
+                elements: str
+            states:
+                description: Server hardware states (C(state)), i.e. C(ProfileApplied), C(NoProfileApplied).
+                type: list
+                elements: str
+            power_states:
+                description: Power states (C(powerState)), i.e. C(On), C(Off).
+                type: list
+                elements: str
+            name_patterns:
+                description: Server hardware names (C(name)), C(*) matches any characters.
+                type: list
+                elements: str
+            scope_uris:
+                description: URIs of scopes the server hardware is assigned to, i.e. C(/rest/scopes/1234).
+                type: list
+                elements: str
+        version_added: 3.4.0
+"""
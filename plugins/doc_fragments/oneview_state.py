@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    DOCUMENTATION = r"""
+options:
+    oneview_state:
+        description:
+            - Read the current state of the server from OneView instead of the iLO, the iLO is only contacted
+                if a change is required.
+            - The state of all server hardware is cached in I(snapshot_path), keyed by iLO ip addresses and hostname,
+                and refreshed with one server hardware listing when older than I(max_age). Runs for many servers
+                share the snapshot.
+            - Servers not managed by OneView or in a transitional state are read from the iLO.
+            - Changes are visible in the snapshot only after the next refresh.
+        type: dict
+        required: no
+        suboptions:
+            hostname:
+                description: The hostname or IP address of the OneView server.
+                type: str
+                required: yes
+            username:
+                description: OneView api authentication user.
+                type: str
+                required: yes
+            password:
+                description: OneView api authentication password.
+                type: str
+                required: yes
+            protocol:
+                description: Protocol to use when connecting to OneView.
+                type: str
+                choices: [ http, https ]
+                default: https
+            port:
+                description: Port to use when connecting to OneView.
+                type: int
+                default: 443
+            validate_certs:
+                description: Verify SSL certificate if using HTTPS.
+                type: bool
+                default: yes
+            proxy:
+                description: Proxy to use when connecting to OneView.
+                type: str
+            api_version:
+                description: OneView API version.
+                type: int
+                default: 2400
+            snapshot_path:
+                description:
+                    - File caching the state of all server hardware.
+                    - Defaults to C(~/.cache/unbelievable.hpe/oneview-state-<hostname>-<port>.json).
+                type: path
+            max_age:
+                description: Max age of the snapshot in seconds.
+                type: int
+                default: 60
+        version_added: 3.4.0
+"""
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    DOCUMENTATION = r"""
+options:
+    write_mode:
+        description:
+            - C(read_before_write) reads the current settings from the iLO before every change.
+            - C(conditional) reads the settings and their ETag from I(etag_cache) if they were read less than
+              I(etag_max_age) seconds ago, the iLO is only contacted if a change is required. Changes are sent
+              with C(If-Match), if the settings have changed in the meantime (C(412 Precondition Failed)) they are
+              read again and the change is computed from the current settings.
+            - With C(conditional), changes made by others within I(etag_max_age) are only noticed when this
+              module needs to change the settings.
+        type: str
+        choices: [ read_before_write, conditional ]
+        default: read_before_write
+        version_added: 3.4.0
+    etag_cache:
+        description:
+            - Directory caching settings and their ETags, one file per iLO, see I(write_mode).
+        type: path
+        default: ~/.cache/unbelievable.hpe
+        version_added: 3.4.0
+    etag_max_age:
+        description:
+            - Max age in seconds of cached settings, see I(write_mode).
+        type: int
+        default: 3600
+        version_added: 3.4.0
+"""
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    DOCUMENTATION = r"""
+options:
+    trust_window:
+        description:
+            - Seconds to trust the result of the last verified run.
+            - A run is verified if it found nothing to change and no pending settings, changed runs are verified
+              by the next run.
+            - A run with the same parameters within I(trust_window) seconds after the last verified run does not
+              contact the server at all and returns the result of the verified run with C(changed=false) and
+              C(trusted=true).
+            - Trusted runs do not extend the window, a full verification is done at least every I(trust_window)
+              seconds. Changes made by others in the meantime are not noticed until then.
+            - The fingerprints (sha256) of the parameters and the results are stored in I(trust_store), one file
+              per host. Parameters which are not logged (i.e. I(password)) are not part of the fingerprint.
+            - 0 disables the trust window, every run is verified.
+        type: int
+        default: 0
+        version_added: 3.4.0
+    trust_store:
+        description:
+            - Directory of the fingerprint store, see I(trust_window).
+        type: path
+        default: ~/.cache/unbelievable.hpe
+        version_added: 3.4.0
+"""
@@ -50,8 +50,9 @@ options:
             - Hostname to use when connecting to OneView.
             - If the value is not specified in the inventory configuration, the value of environment variable
                 C(ONEVIEW_HOST) will be used instead.
+            - Required unless I(appliances) is set.
         type: str
-        required: yes
+        required: no
         env:
             - name: ONEVIEW_HOST
         version_added: 2.0.0
@@ -75,6 +76,21 @@ options:
         env:
             - name: ONEVIEW_API_VERSION
         version_added: 2.0.0
+    api_version_negotiation:
+        description:
+            - Use the highest api version supported by OneView and not higher than I(api_version).
+            - The versions supported by OneView (C(/rest/version)) are cached in I(api_version_cache) for one day.
+        type: bool
+        default: no
+        env:
+            - name: ONEVIEW_API_VERSION_NEGOTIATION
+        version_added: 3.4.0
+    api_version_cache:
+        description:
+            - Directory caching the api versions supported by OneView appliances, see I(api_version_negotiation).
+        type: path
+        default: ~/.cache/unbelievable.hpe
+        version_added: 3.4.0
     user:
         description:
             - OneView api authentication user.
@@ -132,18 +148,125 @@ options:
         env:
             - name: ONEVIEW_PROXY
         version_added: 2.0.0
+    appliances:
+        description:
+            - List of OneView appliances to collect hosts from concurrently, instead of the single appliance
+                given by I(host).
+            - "Each appliance is a dict with key C(host) and optionally C(name), C(protocol), C(port), C(user),
+                C(password), C(api_version), C(api_version_negotiation), C(validate_certs) and C(proxy).
+                Keys not given default to the options
+                of the same name."
+            - Hosts get the variable C(oneview_appliance) set to the appliance C(name), which defaults to C(host).
+            - Hosts provided by multiple appliances are taken from the first appliance in the list.
+            - Appliances failing are reported as warnings and skipped, the inventory fails only if all appliances fail.
+        type: list
+        elements: dict
+        required: no
+        version_added: 3.4.0
+    incremental_snapshot:
+        description:
+            - Enables incremental refresh. Path of a file storing a compact snapshot of OneView's server hardware.
+            - If the snapshot exists, only server hardware modified since the last refresh is fetched from
+                OneView, deleted server hardware is detected by listing server hardware uris only.
+            - The snapshot is updated after each refresh. If the file name ends with C(.gz) it is gzip compressed.
+        type: path
+        required: no
+        version_added: 3.4.0
+    snapshot_path:
+        description:
+            - Enables stale-while-revalidate. Path of a file storing the last generated inventory.
+            - If the snapshot is younger than I(snapshot_max_age) it is used immediately and, if older than
+                I(snapshot_refresh_age), a detached C(ansible-inventory) process for this inventory source refreshes
+                it for subsequent runs.
+            - If the snapshot is missing or too old, the inventory is fetched from OneView and the snapshot is written.
+            - If the file name ends with C(.gz) it is gzip compressed.
+            - "The age of the used inventory in seconds is set as variable C(oneview_snapshot_age) of group
+                C(oneview_members)."
+        type: path
+        required: no
+        version_added: 3.4.0
+    snapshot_max_age:
+        description: Maximum age in seconds of a snapshot to be used.
+        type: int
+        default: 86400
+        version_added: 3.4.0
+    snapshot_refresh_age:
+        description: Snapshots older than this (in seconds) are refreshed in the background when used.
+        type: int
+        default: 60
+        version_added: 3.4.0
+extends_documentation_fragment:
+    - inventory_cache
+    - unbelievable.hpe.oneview_server_filter
+notes:
+    - "Cached inventories are keyed by inventory source, OneView host, port, user and the plugin options
+        affecting the result."
 """
 
+EXAMPLES = r"""
+# oneview.yml: cache inventory for 1 hour in ~/.cache/ansible/oneview
+plugin: unbelievable.hpe.oneview
+host: oneview.domain
+user: user
+password: secret
+cache: yes
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.cache/ansible/oneview
+cache_timeout: 3600
+
+# oneview.yml: only iLO5 hosts of two scopes
+plugin: unbelievable.hpe.oneview
+host: oneview.domain
+user: user
+password: secret
+server_filter:
+  mp_models: [iLO5]
+  scope_uris:
+    - /rest/scopes/6fb4ba6d-a4f0-4a06-8b3a-1aab8a6a1e1d
+    - /rest/scopes/d1d4d1a5-1e5f-4b6b-9d53-6f7b8a0e9b7c
+
+# oneview.yml: use an up to one day old inventory immediately and refresh it in the background
+plugin: unbelievable.hpe.oneview
+host: oneview.domain
+user: user
+password: secret
+snapshot_path: ~/.cache/ansible/oneview_inventory.json.gz
+snapshot_max_age: 86400
+
+# oneview.yml: collect hosts of two appliances concurrently
+plugin: unbelievable.hpe.oneview
+user: user
+password: secret
+appliances:
+  - host: oneview1.domain
+  - host: oneview2.domain
+    name: site2
+    password: other_secret
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+from ansible.errors import AnsibleParserError
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cache import JsonFile, spawn_detached  # type: ignore
 from ansible_collections.unbelievable.hpe.plugins.module_utils.logger import InventoryPluginLogger  # type: ignore
-from ansible_collections.unbelievable.hpe.plugins.module_utils.inventory import InventoryPluginInventory  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils.inventory import (  # type: ignore
+    DictInventory,
+    InventoryPluginInventory,
+)
 from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import (  # type: ignore
     OneViewApiClient,
+    OneViewFederatedInventoryBuilder,
     OneViewInventoryBuilder,
+    ServerHardwareFilter,
 )
-from ansible.plugins.inventory import BaseInventoryPlugin
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable
 
 
-class InventoryModule(BaseInventoryPlugin):
+class InventoryModule(BaseInventoryPlugin, Cacheable):
 
     NAME = "unbelievable.hpe.oneview"
 
@@ -158,25 +281,198 @@ class InventoryModule(BaseInventoryPlugin):
                 )
         return valid
 
-    def parse(self, inventory, loader, path, cache=False):
-        super(InventoryModule, self).parse(inventory, loader, path, cache=False)
+    # options which change the generated inventory
+    CACHE_KEY_OPTIONS = [
+        "protocol",
+        "host",
+        "port",
+        "user",
+        "api_version",
+        "api_version_negotiation",
+        "preferred_ip",
+        "hostname_short",
+        "add_domain",
+        "appliances",
+        "server_filter",
+    ]
+    # set for the ansible-inventory process refreshing a snapshot in background, path of the snapshot
+    SNAPSHOT_REFRESH_ENV = "UNBELIEVABLE_HPE_ONEVIEW_SNAPSHOT_REFRESH"
+
+    # appliance keys defaulting to the option of the same name
+    APPLIANCE_OPTIONS = [
+        "protocol",
+        "host",
+        "port",
+        "user",
+        "password",
+        "api_version",
+        "api_version_negotiation",
+        "validate_certs",
+        "proxy",
+    ]
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache=cache)
         self._read_config_data(path)
+        self.inventory_complete = True
+
+        cache_key = self.get_oneview_cache_key(path)
+        use_cache = self.get_option("cache") and cache and not self.is_snapshot_refresh()
+        update_cache = self.get_option("cache") and not cache
+
+        data = None
+        if use_cache:
+            try:
+                data = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+        snapshot_age = None
+        if data is None:
+            if self.get_option("snapshot_path"):
+                data, snapshot_age = self.get_inventory_from_snapshot(path)
+            else:
+                data = self.build_inventory()
+        # inventories missing failed appliances are not cached
+        if update_cache and self.inventory_complete:
+            self._cache[cache_key] = data
+
+        InventoryPluginInventory(self).add_inventory(data)
+        if snapshot_age is not None:
+            self.inventory.set_variable(OneViewInventoryBuilder.MAIN_GROUP, "oneview_snapshot_age", snapshot_age)
+
+    def get_oneview_cache_key(self, path):
+        return "{0}_{1}".format(self.get_cache_key(path), self.get_options_digest())
+
+    def get_options_digest(self):
+        options = dict((o, self.get_option(o)) for o in InventoryModule.CACHE_KEY_OPTIONS)
+        options["appliances"] = [
+            dict((k, v) for k, v in appliance.items() if k != "password") for appliance in options["appliances"] or []
+        ]
+        return hashlib.sha1(json.dumps(options, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+    def get_inventory_from_snapshot(self, path):
+        """Serve inventory from snapshot, stale-while-revalidate.
+
+        Stale snapshots are refreshed by a separate ansible-inventory process for the inventory source path,
+        which builds the inventory with the snapshot file ignored (see is_snapshot_refresh).
 
+        Returns:
+            tuple: inventory data, age of the inventory in seconds
+        """
+        snapshot_file = JsonFile(self.get_option("snapshot_path"))
+        if self.is_snapshot_refresh():
+            try:
+                return self.refresh_snapshot(snapshot_file), 0
+            finally:
+                os.remove(snapshot_file.path + ".lock")
+        age = snapshot_file.age()
+        if age is not None and age < self.get_option("snapshot_max_age"):
+            snapshot = snapshot_file.read(default={})
+            # snapshots of other appliances / options are ignored
+            if snapshot.get("key") == self.get_options_digest() and "inventory" in snapshot:
+                if age >= self.get_option("snapshot_refresh_age"):
+                    started = spawn_detached(
+                        InventoryModule.ansible_inventory_command(path),
+                        snapshot_file.path + ".lock",
+                        env=dict(os.environ, **{InventoryModule.SNAPSHOT_REFRESH_ENV: snapshot_file.path}),
+                        stale_after=self.get_option("snapshot_max_age"),
+                    )
+                    if started:
+                        self.display.vv("oneview: refreshing snapshot {0} in background".format(snapshot_file.path))
+                return snapshot["inventory"], int(age)
+        return self.refresh_snapshot(snapshot_file), 0
+
+    def is_snapshot_refresh(self):
+        """True in the ansible-inventory process started to refresh the snapshot"""
+        snapshot_path = self.get_option("snapshot_path")
+        return (
+            bool(snapshot_path) and os.environ.get(InventoryModule.SNAPSHOT_REFRESH_ENV) == JsonFile(snapshot_path).path
+        )
+
+    @staticmethod
+    def ansible_inventory_command(path):
+        """Command line listing the inventory source path by ansible-inventory, next to the running ansible command"""
+        script = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), "ansible-inventory")
+        if os.path.isfile(script):
+            return [sys.executable, script, "-i", path, "--list"]
+        return ["ansible-inventory", "-i", path, "--list"]
+
+    def refresh_snapshot(self, snapshot_file):
+        data = self.build_inventory()
+        if self.inventory_complete:
+            self.write_snapshot(snapshot_file, data)
+        return data
+
+    def write_snapshot(self, snapshot_file, data):
+        snapshot_file.write(dict(key=self.get_options_digest(), inventory=data))
+
+    def get_appliances(self):
+        """Settings (APPLIANCE_OPTIONS and name) of the configured appliances"""
+        if not self.get_option("appliances"):
+            if not self.get_option("host"):
+                raise AnsibleParserError("oneview: either 'host' or 'appliances' must be set")
+            appliance = dict((o, self.get_option(o)) for o in InventoryModule.APPLIANCE_OPTIONS)
+            appliance["name"] = appliance["host"]
+            return [appliance]
+        appliances = []
+        for entry in self.get_option("appliances"):
+            if not entry.get("host"):
+                raise AnsibleParserError("oneview: 'host' missing for appliance {0}".format(len(appliances) + 1))
+            appliance = dict((o, entry.get(o, self.get_option(o))) for o in InventoryModule.APPLIANCE_OPTIONS)
+            appliance["name"] = entry.get("name") or entry["host"]
+            appliances.append(appliance)
+        return appliances
+
+    def create_builder(self, appliance, inventory):
         api_client = OneViewApiClient(
-            protocol=self.get_option("protocol"),
-            host=self.get_option("host"),
-            port=self.get_option("port"),
-            username=self.get_option("user"),
-            password=self.get_option("password"),
-            validate_certs=self.get_option("validate_certs"),
-            proxy=self.get_option("proxy"),
-            api_version=self.get_option("api_version"),
+            protocol=appliance["protocol"],
+            host=appliance["host"],
+            port=appliance["port"],
+            username=appliance["user"],
+            password=appliance["password"],
+            validate_certs=appliance["validate_certs"],
+            proxy=appliance["proxy"],
+            api_version=appliance["api_version"],
             logger=InventoryPluginLogger(self),
+            negotiate_api_version=appliance["api_version_negotiation"],
+            version_cache_dir=self.get_option("api_version_cache"),
         )
-        oneview_inventory_builder = OneViewInventoryBuilder(api_client, InventoryPluginInventory(self))
+        oneview_inventory_builder = OneViewInventoryBuilder(api_client, inventory)
         oneview_inventory_builder.set_preferred_ip(self.get_option("preferred_ip"))
         oneview_inventory_builder.set_hostname_short(self.get_option("hostname_short"))
         if self.has_option("add_domain"):
             oneview_inventory_builder.set_add_domain(self.get_option("add_domain"))
+        oneview_inventory_builder.set_server_filter(ServerHardwareFilter.from_params(self.get_option("server_filter")))
+        return oneview_inventory_builder
+
+    def build_inventory(self):
+        federated = bool(self.get_option("appliances"))
+        inventory = DictInventory()
+        builders = [
+            (a["name"], self.create_builder(a, DictInventory() if federated else inventory))
+            for a in self.get_appliances()
+        ]
+
+        snapshot_file = None
+        if self.get_option("incremental_snapshot"):
+            snapshot_file = JsonFile(self.get_option("incremental_snapshot"))
+            snapshot = snapshot_file.read(default={})
+            # snapshots of other appliances / options are ignored
+            snapshots = snapshot.get("snapshots", {}) if snapshot.get("key") == self.get_options_digest() else {}
+            for name, builder in builders:
+                builder.set_snapshot(snapshots.get(name) or {})
+
+        self.inventory_complete = True
+        if federated:
+            federated_builder = OneViewFederatedInventoryBuilder(inventory, logger=InventoryPluginLogger(self))
+            for name, builder in builders:
+                federated_builder.add_appliance(name, builder)
+            results = federated_builder.populate()
+            self.inventory_complete = all(r["error"] is None for r in results.values())
+        else:
+            builders[0][1].populate()
 
-        oneview_inventory_builder.populate()
+        if snapshot_file:
+            snapshots = dict((name, builder.get_snapshot()) for name, builder in builders if builder.get_snapshot())
+            snapshot_file.write(dict(key=self.get_options_digest(), snapshots=snapshots))
+        return inventory.get_inventory()
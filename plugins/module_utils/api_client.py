@@ -9,22 +9,138 @@ __metaclass__ = type
 
 from traceback import format_exc
 from collections import namedtuple
+import copy
+import os
+import re
+import threading
 
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 from ansible_collections.unbelievable.hpe.plugins.module_utils.logger import SilentLogger, ModuleLogger  # type: ignore
-
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cache import FingerprintStore  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cassette import (  # type: ignore
+    RecordingTransport,
+    transport_from_env,
+)
+
+# python requests is imported on first network use, see import_requests()
+requests = None
 REQUESTS_IMP_ERR = None
-try:
-    import requests
+HAS_REQUESTS = None
+
+
+def import_requests():
+    """Import python requests on first use
+
+    Importing requests (and urllib3, ssl, ...) takes a significant part of the runtime of
+    short running modules, so this is deferred until a request is actually sent.
+
+    Returns:
+        module: requests module
+
+    Raises:
+        ImportError: if requests is not installed
+    """
+    global requests, REQUESTS_IMP_ERR, HAS_REQUESTS
+    if requests is None and HAS_REQUESTS is None:
+        try:
+            import requests as _requests
+
+            requests = _requests
+            HAS_REQUESTS = True
+        except ImportError:
+            REQUESTS_IMP_ERR = format_exc()
+            HAS_REQUESTS = False
+    if not HAS_REQUESTS:
+        raise ImportError("requires Python Requests 1.1.0 or higher: https://github.com/psf/requests.")
+    return requests
 
-    HAS_REQUESTS = True
-except ImportError:
-    REQUESTS_IMP_ERR = format_exc()
-    HAS_REQUESTS = False
 
 JsonRestApiResponse = namedtuple("JsonRestApiResponse", ["headers", "content"])
 
 
+class SingleFlight(object):
+    """Coalesce concurrent calls with the same key into one call.
+
+    The first caller for a key executes the call, all callers arriving while it is
+    in flight wait for it and get a deep copy of its result (or its exception),
+    so callers may modify their result.
+    """
+
+    class _Call(object):
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.deduplicated = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = SingleFlight._Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+def concurrent_map(fn, items, max_workers=8):
+    """Call fn for every item, using at most max_workers threads.
+
+    Args:
+        fn (callable): function called with one item
+        items (list): items
+        max_workers (int, optional): max concurrent calls. Defaults to 8.
+
+    Returns:
+        list: (result, exception) per item, in order of items. exception is None if fn succeeded.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    lock = threading.Lock()
+    pending = iter(range(len(items)))
+
+    def work():
+        while True:
+            with lock:
+                index = next(pending, None)
+            if index is None:
+                return
+            try:
+                results[index] = (fn(items[index]), None)
+            except Exception as e:
+                results[index] = (None, e)
+
+    threads = [threading.Thread(target=work) for _ in range(min(max(1, max_workers), len(items)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
 class JsonRestApiClient(object):
     def __init__(
         self,
@@ -37,11 +153,9 @@ class JsonRestApiClient(object):
         validate_certs=True,
         proxy=None,
         logger=SilentLogger(),
+        coalesce_requests=True,
+        transport=None,
     ):
-        if not HAS_REQUESTS:
-            raise ImportError(
-                self.__class__.__name__ + ": requires Python Requests 1.1.0 or higher: https://github.com/psf/requests."
-            )
         self.protocol = protocol
         self.port = port
         self.host = host
@@ -58,6 +172,12 @@ class JsonRestApiClient(object):
         else:
             self.proxies = None
         self.logger = logger
+        self.request_count = 0
+        # request_count is updated by concurrent workers
+        self._request_count_lock = threading.Lock()
+        self.single_flight = SingleFlight() if coalesce_requests else None
+        # optional replacement for python requests, see module_utils.cassette
+        self.transport = transport
 
     def get_headers(self):
         return {
@@ -81,7 +201,7 @@ class JsonRestApiClient(object):
         Returns:
             json: api response
         """
-        return self._execute_request("GET", uri_path, data=None, timeout=timeout).content
+        return self._execute_get_request(uri_path, timeout=timeout).content
 
     def post_request(self, uri_path, data, timeout=None):
         """Execute POST request
@@ -134,18 +254,19 @@ class JsonRestApiClient(object):
         """
         return self._execute_request("HEAD", uri_path, data=None, timeout=timeout).content
 
-    def patch_request(self, uri_path, data, timeout=None):
+    def patch_request(self, uri_path, data, timeout=None, headers=None):
         """Execute PATCH request
 
         Args:
             uri_path (str): uri relative to api_base
             data (json): payload.
             timeout (int, optional): request timeout. Defaults to None.
+            headers (dict, optional): additional request headers, i.e. If-Match. Defaults to None.
 
         Returns:
             json: api response
         """
-        return self._execute_request("PATCH", uri_path, data=data, timeout=timeout).content
+        return self._execute_request("PATCH", uri_path, data=data, timeout=timeout, headers=headers).content
 
     def get_request_with_headers(self, uri_path, timeout=None):
         """Execute GET request
@@ -157,7 +278,7 @@ class JsonRestApiClient(object):
         Returns:
             JsonRestApiResponse: api response
         """
-        return self._execute_request("GET", uri_path, data=None, timeout=timeout)
+        return self._execute_get_request(uri_path, timeout=timeout)
 
     def post_request_with_headers(self, uri_path, data, timeout=None):
         """Execute POST request
@@ -223,6 +344,17 @@ class JsonRestApiClient(object):
         """
         return self._execute_request("PATCH", uri_path, data=data, timeout=timeout)
 
+    def get_stats(self):
+        """Request statistics of this client
+
+        Returns:
+            dict: number of executed requests and of GET requests served by a concurrent identical request
+        """
+        return dict(
+            requests=self.request_count,
+            deduplicated=self.single_flight.deduplicated if self.single_flight else 0,
+        )
+
     def cleanup_uri_path(self, uri_path):
         if uri_path.startswith(self.api_base):
             uri_path = uri_path[len(self.api_base):]  # fmt: skip
@@ -230,14 +362,34 @@ class JsonRestApiClient(object):
             uri_path = uri_path[1:]
         return uri_path
 
-    def _execute_request(self, verb, uri_path, data, timeout):
+    def _execute_get_request(self, uri_path, timeout):
+        if not self.single_flight:
+            return self._execute_request("GET", uri_path, data=None, timeout=timeout)
+        # concurrent workers asking for the same document share one request
+        return self.single_flight.do(
+            self.cleanup_uri_path(uri_path),
+            lambda: self._execute_request("GET", uri_path, data=None, timeout=timeout),
+        )
+
+    def get_url(self, uri_path):
+        """Absolute url of uri_path, which is relative to api_base"""
         uri_path = self.cleanup_uri_path(uri_path)
-        url = "{0}://{1}:{2}{3}/{4}".format(self.protocol, self.host, self.port, self.api_base, uri_path)
-        self.logger.debug("{0} request to {1}".format(verb, url))
-        r = requests.request(
+        return "{0}://{1}:{2}{3}/{4}".format(self.protocol, self.host, self.port, self.api_base, uri_path)
+
+    def _execute_request(self, verb, uri_path, data, timeout, headers=None):
+        """headers (dict, optional): additional request headers, i.e. If-Match"""
+        url = self.get_url(uri_path)
+        self.logger.sampled_debug("{0} request to {1}", verb, url)
+        with self._request_count_lock:
+            self.request_count += 1
+        request = self.transport.request if self.transport else import_requests().request
+        request_headers = self.get_headers()
+        if headers:
+            request_headers.update(headers)
+        r = request(
             verb,
             url=url,
-            headers=self.get_headers(),
+            headers=request_headers,
             auth=self.get_auth(),
             verify=self.validate_certs,
             json=data,
@@ -249,13 +401,23 @@ class JsonRestApiClient(object):
             if r.headers.get("Content-Type", "").startswith("application/json") and r.content:
                 content = r.json()
             elif r.content:
-                self.logger.warn("no json response '{0}' from {1} request to {2}".format(r.content, verb, url))
+                self.logger.warn("no json response '{0}' from {1} request to {2}", r.content, verb, url)
             return JsonRestApiResponse(r.headers, content)
         else:
-            self.logger.warn("response error {0} from {1} request to {2}".format(r.status_code, verb, url))
+            self.logger.warn("response error {0} from {1} request to {2}", r.status_code, verb, url)
             r.raise_for_status()
 
 
+# result keys which are not returned by trusted runs
+TRUST_IGNORED_RESULTS = ["changed", "diff", "patches", "response"]
+
+# options of modules which can skip unchanged runs, see doc fragment trust_window
+TRUST_WINDOW_SPEC = dict(
+    trust_window=dict(type="int", default=0),
+    trust_store=dict(type="path", default="~/.cache/unbelievable.hpe"),
+)
+
+
 class ModuleBase(object):
     def __init__(self, param_alias_prefix):
         self.param_alias_prefix = param_alias_prefix
@@ -269,10 +431,16 @@ class ModuleBase(object):
             **self.module_def_extras()
         )
 
-        if not HAS_REQUESTS:
-            self.module.fail_json(msg=missing_required_lib("requests"), exception=REQUESTS_IMP_ERR)
-
         try:
+            trust_store, fingerprint = self.get_trust_store()
+            if trust_store:
+                result = trust_store.lookup(type(self).__name__, fingerprint, self.module.params.get("trust_window"))
+                if result is not None:
+                    result.update(changed=False, trusted=True)
+                    self.module.exit_json(**result)
+                # state is unknown until this run is finished
+                trust_store.forget(type(self).__name__)
+
             self.api_client = self.get_api_client()
             self.result = dict(
                 changed=False,
@@ -281,13 +449,49 @@ class ModuleBase(object):
 
             self.init()
             self.run()
+            self.log_stats()
+            # only a run which found the server converged is trusted, without the keys describing its actions
+            converged = not self.result["changed"] and not self.result.get("pending")
+            if trust_store and not self.module.check_mode and converged:
+                result = dict((k, v) for k, v in self.result.items() if k not in TRUST_IGNORED_RESULTS)
+                trust_store.record(type(self).__name__, fingerprint, result)
             self.module.exit_json(**self.result)
+        except SystemExit:
+            # raised by exit_json / fail_json, the result is already written
+            raise
         except BaseException as e:
+            if HAS_REQUESTS is False:
+                self.module.fail_json(msg=missing_required_lib("requests"), exception=REQUESTS_IMP_ERR)
             self.module.fail_json(e)
+        finally:
+            # also if exit_json / fail_json is called by run()
+            self.before_exit()
 
     def supports_check_mode(self):
         return True
 
+    def get_trust_store(self):
+        """Fingerprint store and fingerprint of the parameters of this run (options of TRUST_WINDOW_SPEC)
+
+        Parameters with no_log are not part of the fingerprint.
+
+        Returns:
+            tuple: FingerprintStore (None if trust_window is not set), fingerprint
+        """
+        if not self.module.params.get("trust_window"):
+            return None, None
+        spec = self.argument_spec()
+        params = dict(
+            (k, v)
+            for k, v in self.module.params.items()
+            if k not in TRUST_WINDOW_SPEC and not spec.get(k, {}).get("no_log")
+        )
+        name = "trust-{0}-{1}.json".format(
+            re.sub(r"[^\w.-]", "_", self.module.params.get("hostname")), self.module.params.get("port")
+        )
+        store = FingerprintStore(os.path.join(self.module.params.get("trust_store"), name))
+        return store, FingerprintStore.fingerprint(params)
+
     def module_def_extras(self):
         return dict()
 
@@ -299,8 +503,15 @@ class ModuleBase(object):
         """Overwrite this to implement the module action"""
         pass
 
+    def before_exit(self):
+        api_client = getattr(self, "api_client", None)
+        if api_client:
+            if isinstance(api_client.transport, RecordingTransport):
+                api_client.transport.cassette.save()
+            api_client.logger.flush()
+
     def get_api_client(self):
-        return self.get_module_api_client(
+        api_client = self.get_module_api_client(
             protocol=self.module.params.get("protocol"),
             host=self.module.params.get("hostname"),
             port=self.module.params.get("port"),
@@ -308,7 +519,17 @@ class ModuleBase(object):
             password=self.module.params.get("password"),
             validate_certs=self.module.params.get("validate_certs"),
             proxy=self.module.params.get("proxy") if "proxy" in self.module.params else None,
-            logger=ModuleLogger(self.module),
+            logger=ModuleLogger(
+                self.module, debug_sample_rate=int(os.environ.get("UNBELIEVABLE_HPE_DEBUG_SAMPLE_RATE", "1"))
+            ),
+        )
+        api_client.transport = transport_from_env()
+        return api_client
+
+    def log_stats(self):
+        stats = self.api_client.get_stats()
+        self.api_client.logger.debug(
+            "perf: {0} requests, {1} deduplicated GET requests", stats["requests"], stats["deduplicated"]
         )
 
     def get_module_api_client(self, protocol, host, port, username, password, validate_certs, proxy, logger):
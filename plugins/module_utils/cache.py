@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+from ansible.module_utils.six import PY3
+
+
+class JsonFile(object):
+    """JSON file, gzip compressed if path ends with '.gz'"""
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def age(self):
+        """Seconds since last modification, None if file does not exist"""
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def read(self, default=None):
+        """Read content, returns default if file does not exist"""
+        try:
+            with self._open(self.path, "rb") as f:
+                return json.loads(f.read().decode("utf-8"))
+        except (IOError, OSError):
+            return default
+
+    def write(self, data):
+        """Write content atomically: readers see either the old or the new content"""
+        directory = os.path.dirname(self.path) or "."
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(self.path))
+        try:
+            os.close(fd)
+            with self._open(tmp_path, "wb") as f:
+                f.write(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+            os.rename(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _open(self, path, mode):
+        if self.path.endswith(".gz"):
+            import gzip
+
+            return gzip.open(path, mode)
+        return open(path, mode)
+
+
+@contextmanager
+def file_lock(lock_path, timeout=30, stale_after=300):
+    """Exclusive lock of processes sharing a file, held while lock_path (created with O_EXCL) exists.
+
+    A lock file older than stale_after seconds is considered left over by a killed process and removed.
+    If the lock is not acquired within timeout seconds, the block is executed without lock.
+
+    Yields:
+        bool: True if the lock is held
+    """
+    deadline = time.time() + timeout
+    acquired = False
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+            acquired = True
+            break
+        except OSError:
+            age = JsonFile(lock_path).age()
+            if age is not None and age > stale_after:
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+                continue
+            if time.time() >= deadline:
+                break
+            time.sleep(0.05)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            os.remove(lock_path)
+
+
+class FingerprintStore(object):
+    """Fingerprint of the parameters and the result of the last verified run by module, one file per host
+
+    Args:
+        path (str): JSON file
+    """
+
+    def __init__(self, path):
+        self.file = JsonFile(path)
+
+    @staticmethod
+    def fingerprint(params):
+        """sha256 of params (dict)"""
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def lookup(self, module, fingerprint, max_age):
+        """Result of the last run of module with the same fingerprint, if it was verified less than max_age ago
+
+        Returns:
+            dict: result, None if there is no such run
+        """
+        entry = self.file.read(default=dict()).get(module)
+        if not entry or entry["fingerprint"] != fingerprint or time.time() - entry["verified"] >= max_age:
+            return None
+        return entry["result"]
+
+    def record(self, module, fingerprint, result):
+        # read-modify-write, concurrent runs of other modules on the same host must not drop each other's entries
+        with file_lock(self.file.path + ".lock"):
+            entries = self.file.read(default=dict())
+            entries[module] = dict(fingerprint=fingerprint, verified=time.time(), result=result)
+            self.file.write(entries)
+
+    def forget(self, module):
+        with file_lock(self.file.path + ".lock"):
+            entries = self.file.read(default=dict())
+            if entries.pop(module, None) is not None:
+                self.file.write(entries)
+
+
+def spawn_detached(args, lock_path, env=None, stale_after=3600):
+    """Start a detached background process (own session, no stdio), at most one at a time per lock file.
+
+    The calling process does not wait for it. The lock file is created here and has to be removed by the
+    started process when it is finished.
+
+    Args:
+        args (list): command line
+        lock_path (str): lock file, exists while the process is running
+        env (dict, optional): environment of the process. Defaults to None (environment of this process).
+        stale_after (int, optional): seconds after which a lock file is considered stale. Defaults to 3600.
+
+    Returns:
+        bool: True if the background process was started, False if it is already running
+    """
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    except OSError:
+        lock = JsonFile(lock_path)
+        if lock.age() is None or lock.age() < stale_after:
+            return False
+        # left over by a killed process
+        os.remove(lock_path)
+        return spawn_detached(args, lock_path, env, stale_after)
+    os.close(fd)
+
+    session = dict(start_new_session=True) if PY3 else dict(preexec_fn=os.setsid)
+    try:
+        with open(os.devnull, "r+b") as devnull:
+            subprocess.Popen(args, stdin=devnull, stdout=devnull, stderr=devnull, close_fds=True, env=env, **session)
+    except BaseException:
+        os.remove(lock_path)
+        raise
+    return True
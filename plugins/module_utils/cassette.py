@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import threading
+import time
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cache import JsonFile, file_lock  # type: ignore
+
+
+class CassetteMissError(LookupError):
+    pass
+
+
+class Cassette(object):
+    """Recorded request/response pairs of a JsonRestApiClient.
+
+    Credentials (passwords, session ids, auth headers) are scrubbed before they are stored.
+    Cassettes ending in '.gz' are stored gzip compressed.
+    Several processes (i.e. forked module runs) can record into the same cassette, save() only adds
+    the entries recorded by this process to the entries saved by others.
+    """
+
+    SCRUBBED = "********"
+    SENSITIVE_HEADERS = ["auth", "authorization", "cookie", "set-cookie", "x-auth-token"]
+    SENSITIVE_KEYS = ["password", "sessionid", "username", "x-auth-token"]
+
+    def __init__(self, path=None, entries=None):
+        self.path = path
+        self.entries = list(entries) if entries else []
+        # entries[:_saved] are stored in path, the others are recorded by this process
+        self._saved = 0
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._index = None
+
+    @staticmethod
+    def load(path):
+        data = JsonFile(path).read()
+        if data is None:
+            raise IOError("cassette {0} not found".format(path))
+        cassette = Cassette(path, data.get("entries", []))
+        cassette._saved = len(cassette.entries)
+        return cassette
+
+    def save(self, path=None):
+        """Add the entries recorded by this process to the cassette file.
+
+        The file is locked while it is read and written (atomically), entries saved by other processes
+        in the meantime are kept.
+        """
+        path = path or self.path
+        cassette_file = JsonFile(path)
+        with file_lock(cassette_file.path + ".lock"):
+            with self._lock:
+                new_entries = self.entries[self._saved:]  # fmt: skip
+                entries = (cassette_file.read(default=dict()).get("entries") or []) + new_entries
+                cassette_file.write({"entries": entries})
+                self.entries = entries
+                self._saved = len(entries)
+                self._index = None
+
+    def record(self, method, url, payload, status_code, headers, body, elapsed):
+        entry = dict(
+            method=method,
+            host=Cassette.host(url),
+            url=Cassette.strip_host(url),
+            request=Cassette.scrub(payload),
+            status=status_code,
+            headers=dict((k, v) for k, v in headers.items() if k.lower() not in Cassette.SENSITIVE_HEADERS),
+            body=Cassette.scrub(body),
+            elapsed=round(elapsed, 4),
+        )
+        with self._lock:
+            self.entries.append(entry)
+            self._index = None
+
+    def lookup(self, method, url):
+        """Return the next recorded entry for method and url.
+
+        Entries recorded multiple times for the same request are served in order, the last one is repeated.
+        Entries are matched by host (and port), entries recorded without host match requests to any host.
+        """
+        key = (method, Cassette.host(url), Cassette.strip_host(url))
+        with self._lock:
+            if self._index is None:
+                self._index = {}
+                for e in self.entries:
+                    self._index.setdefault((e["method"], e.get("host"), e["url"]), []).append(e)
+            if key not in self._index:
+                key = (method, None, key[2])
+            matches = self._index.get(key)
+            if not matches:
+                raise CassetteMissError("no recorded response for {0} {1}".format(method, url))
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return matches[min(position, len(matches) - 1)]
+
+    @staticmethod
+    def strip_host(url):
+        """Remove protocol, host and port"""
+        if "://" in url:
+            url = "/" + url.partition("://")[2].partition("/")[2]
+        return url
+
+    @staticmethod
+    def host(url):
+        """host and port of url, None for relative urls"""
+        if "://" in url:
+            return url.partition("://")[2].partition("/")[0].lower()
+        return None
+
+    @staticmethod
+    def scrub(data):
+        if isinstance(data, dict):
+            return dict(
+                (k, Cassette.SCRUBBED if k.lower() in Cassette.SENSITIVE_KEYS else Cassette.scrub(v))
+                for k, v in data.items()
+            )
+        if isinstance(data, list):
+            return [Cassette.scrub(v) for v in data]
+        return data
+
+
+class CassetteResponse(object):
+    """Minimal stand-in for requests.Response, created from a cassette entry"""
+
+    def __init__(self, entry):
+        from requests.structures import CaseInsensitiveDict
+
+        self.url = entry["url"]
+        self.status_code = entry["status"]
+        self.headers = CaseInsensitiveDict(entry["headers"])
+        self.elapsed = entry["elapsed"]
+        body = entry["body"]
+        if body is None:
+            self.content = b""
+        elif isinstance(body, (dict, list)):
+            self.content = json.dumps(body).encode("utf-8")
+        else:
+            self.content = body.encode("utf-8")
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content.decode("utf-8"))
+
+    def raise_for_status(self):
+        if not self.ok:
+            from requests import HTTPError
+
+            raise HTTPError("{0} Error for url: {1}".format(self.status_code, self.url), response=self)
+
+
+class RecordingTransport(object):
+    """Execute requests using python requests and record them to a cassette"""
+
+    def __init__(self, cassette):
+        self.cassette = cassette
+
+    def request(self, method, url, **kwargs):
+        import requests
+
+        start = time.time()
+        r = requests.request(method, url=url, **kwargs)
+        elapsed = time.time() - start
+        body = None
+        if r.content:
+            if r.headers.get("Content-Type", "").startswith("application/json"):
+                body = r.json()
+            else:
+                body = r.content.decode("utf-8", "replace")
+        self.cassette.record(method, url, kwargs.get("json"), r.status_code, r.headers, body, elapsed)
+        return r
+
+
+class ReplayTransport(object):
+    """Serve requests from a cassette.
+
+    Args:
+        cassette (Cassette): recorded requests
+        latency_factor (float, optional): sleep recorded request duration multiplied by this factor. Defaults to 0.
+    """
+
+    def __init__(self, cassette, latency_factor=0.0):
+        self.cassette = cassette
+        self.latency_factor = latency_factor
+
+    def request(self, method, url, **kwargs):
+        entry = self.cassette.lookup(method, url)
+        if self.latency_factor:
+            time.sleep(entry["elapsed"] * self.latency_factor)
+        return CassetteResponse(entry)
+
+
+def transport_from_env():
+    """Create cassette transport configured by environment.
+
+    UNBELIEVABLE_HPE_CASSETTE: cassette file
+    UNBELIEVABLE_HPE_CASSETTE_MODE: 'record' or 'replay' (default)
+    UNBELIEVABLE_HPE_CASSETTE_LATENCY: latency factor for replay, defaults to 0
+
+    Returns:
+        RecordingTransport|ReplayTransport: transport or None if not configured
+    """
+    path = os.environ.get("UNBELIEVABLE_HPE_CASSETTE")
+    if not path:
+        return None
+    mode = os.environ.get("UNBELIEVABLE_HPE_CASSETTE_MODE", "replay")
+    if mode == "record":
+        return RecordingTransport(Cassette.load(path) if os.path.exists(path) else Cassette(path))
+    if mode == "replay":
+        latency_factor = float(os.environ.get("UNBELIEVABLE_HPE_CASSETTE_LATENCY", "0"))
+        return ReplayTransport(Cassette.load(path), latency_factor)
+    raise ValueError("Unsupported UNBELIEVABLE_HPE_CASSETTE_MODE '{0}'".format(mode))
@@ -12,8 +12,21 @@ from ansible_collections.unbelievable.hpe.plugins.module_utils.logger import Sil
 from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import (  # type: ignore
     JsonRestApiClient,
     ModuleBase,
+    import_requests,
 )
 
+_HTTP_DIGEST_AUTH_CLASS = None
+
+
+def _http_digest_auth_class():
+    global _HTTP_DIGEST_AUTH_CLASS
+    if _HTTP_DIGEST_AUTH_CLASS is None:
+        import_requests()
+        from requests.auth import HTTPDigestAuth
+
+        _HTTP_DIGEST_AUTH_CLASS = HTTPDigestAuth
+    return _HTTP_DIGEST_AUTH_CLASS
+
 
 class ImcApiClient(JsonRestApiClient):
 
@@ -53,10 +66,14 @@ class ImcApiClient(JsonRestApiClient):
             logger=logger,
         )
 
-    def get_auth(self):
-        from requests.auth import HTTPDigestAuth
+        self._auth = None
 
-        return HTTPDigestAuth(self.username, self.password) if self.username else None
+    def get_auth(self):
+        # reuse the auth object: it is costly to create and keeps the digest nonce between requests,
+        # so not every request needs an additional 401 challenge round trip
+        if self._auth is None and self.username:
+            self._auth = _http_digest_auth_class()(self.username, self.password)
+        return self._auth
 
     def get_file_type(self, file_type_name):
         return ImcApiClient._FILE_TYPE_NAME_2_TYPE.get(file_type_name)
@@ -125,7 +142,7 @@ class ImcApiClient(JsonRestApiClient):
         next_url = url
         content = []
         while next_url:
-            self.logger.debug("ImcApiClient: {0}".format(next_url))
+            self.logger.sampled_debug("ImcApiClient: {0}", next_url)
             data = self.get_request(next_url)
             if key in data:
                 val = data[key]
@@ -7,7 +7,14 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import sys
 from abc import abstractmethod
+from collections import OrderedDict
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.records import Record  # type: ignore
+
+# dicts keep insertion order since python 3.7 and need less memory than OrderedDicts
+_OrderedDict = dict if sys.version_info >= (3, 7) else OrderedDict
 
 
 class Inventory(object):
@@ -27,6 +34,19 @@ class Inventory(object):
     def add_host(self, host, variables=None, group=None):
         pass
 
+    def add_inventory(self, data):
+        """Add groups and hosts from data created by DictInventory.get_inventory()"""
+        for group in data["groups"]:
+            self.add_group(group)
+        for group in data["groups"].values():
+            for child in group["children"]:
+                self.add_child_group(group["name"], child)
+        for host in data["hosts"].values():
+            groups = host["groups"]
+            self.add_host(host["name"], variables=host["vars"], group=groups[0] if groups else None)
+            for group in groups[1:]:
+                self.add_host_to_group(group, host["name"])
+
 
 class InventoryPluginInventory(Inventory):
     def __init__(self, plugin):
@@ -47,31 +67,57 @@ class InventoryPluginInventory(Inventory):
 
 
 class DictInventory(Inventory):
+    """Inventory kept in dicts, see get_inventory() for the format.
+
+    Group children and host groups are kept as keys of insertion ordered dicts (used as ordered sets),
+    so adding members is O(1) regardless of the group size.
+    Host variables may be given as Record, they are converted to dicts by get_inventory().
+    """
+
     def __init__(self):
         super(DictInventory, self).__init__()
-        self.d = dict(hosts={}, groups={})
+        self.groups = _OrderedDict()
+        self.hosts = _OrderedDict()
 
     def add_group(self, group):
-        self.d["groups"].setdefault(group, dict(name=group, children=list()))
+        if group not in self.groups:
+            self.groups[group] = _OrderedDict()
 
     def add_child_group(self, parent, child):
-        if parent in self.d["groups"]:
-            if child not in self.d["groups"][parent]["children"]:
-                self.d["groups"][parent]["children"].append(child)
+        if parent in self.groups:
+            self.groups[parent][child] = True
         else:
             raise ValueError("group '{0}' not found".format(parent))
 
     def add_host_to_group(self, group, host):
-        if group not in self.d["groups"]:
+        if group not in self.groups:
             raise ValueError("group '{0}' not found".format(group))
-        if host in self.d["hosts"]:
-            if group not in self.d["hosts"][host]["groups"]:
-                self.d["hosts"][host]["groups"].append(group)
+        if host in self.hosts:
+            self.hosts[host][1][group] = True
         else:
             raise ValueError("host '{0}' not found".format(host))
 
     def add_host(self, host, variables=None, group=None):
-        self.d["hosts"].setdefault(host, dict(name=host, vars=variables, groups=list([group])))
+        if host not in self.hosts:
+            self.hosts[host] = (variables, _OrderedDict([(group, True)]))
+
+    @staticmethod
+    def _to_dict(variables):
+        return variables.to_dict() if isinstance(variables, Record) else variables
 
     def get_inventory(self):
-        return self.d
+        """Inventory as dict of hosts and groups
+
+        Example:
+            {
+                "hosts": {"host1": {"name": "host1", "vars": {...}, "groups": ["group1", ...]}},
+                "groups": {"group1": {"name": "group1", "children": ["group2", ...]}},
+            }
+        """
+        return dict(
+            hosts=dict(
+                (host, dict(name=host, vars=DictInventory._to_dict(variables), groups=list(groups)))
+                for host, (variables, groups) in self.hosts.items()
+            ),
+            groups=dict((group, dict(name=group, children=list(children))) for group, children in self.groups.items()),
+        )
@@ -11,53 +11,118 @@ from abc import abstractmethod
 
 
 class Logger(object):
+    """Logger interface
+
+    Messages are format strings ('{0}' placeholders), which are only formatted
+    with the given args if the message will actually be logged.
+    """
+
+    def __init__(self, debug_sample_rate=1):
+        self.debug_sample_rate = max(1, debug_sample_rate)
+        self._debug_samples = 0
+
     @abstractmethod
-    def debug(self, msg):
+    def debug_enabled(self):
         pass
 
     @abstractmethod
-    def info(self, msg):
+    def debug(self, msg, *args):
         pass
 
     @abstractmethod
-    def warn(self, msg):
+    def info(self, msg, *args):
+        pass
+
+    @abstractmethod
+    def warn(self, msg, *args):
+        pass
+
+    def sampled_debug(self, msg, *args):
+        """Log only every n-th message (n = debug_sample_rate), i.e. per request messages of bulk operations"""
+        if self.debug_enabled():
+            self._debug_samples += 1
+            if self._debug_samples % self.debug_sample_rate == 1 or self.debug_sample_rate == 1:
+                self.debug(msg, *args)
+
+    def flush(self):
         pass
 
+    @staticmethod
+    def format(msg, args):
+        return msg.format(*args) if args else msg
+
 
 class SilentLogger(Logger):
-    def debug(self, msg):
+    def debug_enabled(self):
+        return False
+
+    def debug(self, msg, *args):
         pass
 
-    def info(self, msg):
+    def info(self, msg, *args):
         pass
 
-    def warn(self, msg):
+    def warn(self, msg, *args):
         pass
 
 
 class ModuleLogger(Logger):
-    def __init__(self, module):
+    """Logs to syslog / journal using AnsibleModule.log
+
+    Messages are buffered and written by flush(), which ModuleBase calls once before the module exits.
+    """
+
+    MAX_CHUNK_SIZE = 4000
+
+    def __init__(self, module, debug_sample_rate=1):
+        super(ModuleLogger, self).__init__(debug_sample_rate=debug_sample_rate)
         self.module = module
+        self._debug = bool(getattr(module, "_debug", False))
+        self.buffer = []
+
+    def debug_enabled(self):
+        return self._debug
 
-    def debug(self, msg):
-        self.module.debug(msg)
+    def debug(self, msg, *args):
+        if self._debug:
+            self.buffer.append("[debug] " + Logger.format(msg, args))
 
-    def info(self, msg):
-        self.module.log(msg)
+    def info(self, msg, *args):
+        self.buffer.append(Logger.format(msg, args))
 
-    def warn(self, msg):
-        self.module.log("[warn] {0}".format(msg))
+    def warn(self, msg, *args):
+        self.buffer.append("[warn] " + Logger.format(msg, args))
+
+    def flush(self):
+        chunk = []
+        size = 0
+        for line in self.buffer:
+            if chunk and size + len(line) > ModuleLogger.MAX_CHUNK_SIZE:
+                self.module.log("\n".join(chunk))
+                chunk = []
+                size = 0
+            chunk.append(line)
+            size += len(line) + 1
+        if chunk:
+            self.module.log("\n".join(chunk))
+        self.buffer = []
 
 
 class InventoryPluginLogger(Logger):
-    def __init__(self, plugin):
+    def __init__(self, plugin, debug_sample_rate=1):
+        super(InventoryPluginLogger, self).__init__(debug_sample_rate=debug_sample_rate)
         self.plugin = plugin
 
-    def debug(self, msg):
-        self.plugin.display.vv(msg)
+    def debug_enabled(self):
+        return self.plugin.display.verbosity >= 2
+
+    def debug(self, msg, *args):
+        if self.plugin.display.verbosity >= 2:
+            self.plugin.display.vv(Logger.format(msg, args))
 
-    def info(self, msg):
-        self.plugin.display.v(msg)
+    def info(self, msg, *args):
+        if self.plugin.display.verbosity >= 1:
+            self.plugin.display.v(Logger.format(msg, args))
 
-    def warn(self, msg):
-        self.plugin.display.warning(msg)
+    def warn(self, msg, *args):
+        self.plugin.display.warning(Logger.format(msg, args))
@@ -9,16 +9,31 @@ __metaclass__ = type
 
 
 from ansible_collections.unbelievable.hpe.plugins.module_utils.logger import SilentLogger  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils.records import HostRecord  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cache import JsonFile, file_lock  # type: ignore
 from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import (  # type: ignore
     JsonRestApiClient,
     ModuleBase,
+    import_requests,
 )
 
+import os
+import re
+import threading
 import time
+from collections import OrderedDict
+
+from ansible.module_utils.six import string_types
+from ansible.module_utils.six.moves.urllib.parse import quote
 
 
 class OneViewApiClient(JsonRestApiClient):
     API_BASE = "/rest"
+    TASK_FINISHED_STATES = ["Cancelled", "Cancelling", "Completed", "Error", "Killed", "Terminated", "Unknown"]
+    # minimum api version of optional features
+    FEATURES = {"scope_uris": 300, "index_search": 300, "projections": 1200}
+    # seconds the versions supported by an appliance are cached
+    VERSION_CACHE_SECONDS = 86400
 
     def __init__(
         self,
@@ -31,6 +46,8 @@ class OneViewApiClient(JsonRestApiClient):
         proxy=None,
         api_version=2400,
         logger=SilentLogger(),
+        negotiate_api_version=False,
+        version_cache_dir=None,
     ):
         super(OneViewApiClient, self).__init__(
             protocol=protocol,
@@ -45,6 +62,9 @@ class OneViewApiClient(JsonRestApiClient):
         )
 
         self.api_version = api_version
+        # with negotiate_api_version, api_version is the highest version to use
+        self.negotiate_api_version = negotiate_api_version
+        self.version_cache_dir = version_cache_dir
         self.session = None
 
     def get_headers(self):
@@ -55,6 +75,8 @@ class OneViewApiClient(JsonRestApiClient):
         return headers
 
     def login(self):
+        if self.negotiate_api_version:
+            self.select_api_version()
         payload = {"userName": self.username, "password": self.password, "loginMsgAck": "true"}
         json = self.post_request("/login-sessions", payload)
         self.session = json.get("sessionID")
@@ -66,11 +88,162 @@ class OneViewApiClient(JsonRestApiClient):
             self.session = None
             self.logger.debug("OneViewApiClient: Logout successful")
 
-    def list_server_hardware(self, filter=None):
-        next_url = "/server-hardware"
-        if filter:
-            next_url += '?filter="' + filter + '"'
-        return self._collect_members(next_url)
+    def select_api_version(self):
+        """Use the highest api version supported by the appliance and this client (api_version), once per client.
+
+        The versions supported by the appliance (/rest/version) are cached in version_cache_dir,
+        one file per appliance, for VERSION_CACHE_SECONDS.
+
+        Returns:
+            int: selected api version
+        """
+        if not self.negotiate_api_version:
+            return self.api_version
+        cache = None
+        versions = None
+        if self.version_cache_dir:
+            name = "oneview-version-{0}-{1}.json".format(re.sub(r"[^\w.-]", "_", self.host), self.port)
+            cache = JsonFile(os.path.join(self.version_cache_dir, name))
+            age = cache.age()
+            if age is not None and age < OneViewApiClient.VERSION_CACHE_SECONDS:
+                versions = cache.read()
+        if not versions:
+            versions = self.get_request("/version")
+            versions = dict(currentVersion=versions["currentVersion"], minimumVersion=versions["minimumVersion"])
+            if cache:
+                cache.write(versions)
+        self.api_version = max(versions["minimumVersion"], min(versions["currentVersion"], self.api_version))
+        self.negotiate_api_version = False
+        self.logger.debug("OneViewApiClient: using api version {0} of {1}", self.api_version, versions)
+        return self.api_version
+
+    def has_feature(self, feature):
+        """True if the api version in use supports feature, see FEATURES"""
+        return self.api_version >= OneViewApiClient.FEATURES[feature]
+
+    def list_server_hardware(self, filter=None, server_filter=None):
+        return list(self.iter_server_hardware(filter, server_filter=server_filter))
+
+    def iter_server_hardware(self, filter=None, server_filter=None, fields=None):
+        """Iterate server hardware, pages are fetched while iterating
+
+        Args:
+            filter (str, optional): OneView filter expression. Defaults to None.
+            server_filter (ServerHardwareFilter, optional): structured filter, combined with filter. Defaults to None.
+            fields (list, optional): attributes to return, ignored if projections are not supported.
+                Defaults to None (all).
+        """
+        fields = ",".join(fields) if fields and self.has_feature("projections") else None
+        return self._iter_members(self._server_hardware_url(filter, server_filter, fields=fields))
+
+    def list_server_hardware_uris(self, server_filter=None):
+        """List uris of all server hardware, without fetching the full documents if projections or
+        (without server_filter) the index service are supported"""
+        fields = "uri" if self.has_feature("projections") else None
+        if not fields and not server_filter and self.has_feature("index_search"):
+            return [m["uri"] for m in self.index_search(category="server-hardware", fields=["uri"])]
+        return [m["uri"] for m in self._iter_members(self._server_hardware_url(None, server_filter, fields=fields))]
+
+    def _server_hardware_url(self, filter, server_filter, fields=None):
+        if server_filter and server_filter.scope_uris and not self.has_feature("scope_uris"):
+            raise ValueError("OneView api version {0} does not support scopes".format(self.api_version))
+        params = (server_filter or ServerHardwareFilter()).query_params(filter)
+        if fields:
+            params.append(("fields", fields))
+        return OneViewApiClient._url("/server-hardware", params)
+
+    @staticmethod
+    def _url(path, params):
+        if not params:
+            return path
+        return path + "?" + "&".join(k + "=" + quote(v, safe="\"'=:/,") for k, v in params)
+
+    def index_search(self, category=None, query=None, filter=None, fields=None):
+        """Iterate resources found by the index service (/rest/index/resources), pages are fetched while iterating.
+
+        Index resources are summaries (uri, name, category, attributes) of resources of any category.
+
+        Args:
+            category (str|list, optional): resource categories, i.e. 'server-hardware'. Defaults to None (all).
+            query (str, optional): full text query. Defaults to None.
+            filter (str|list, optional): filter expressions, combined by AND. Defaults to None.
+            fields (list, optional): attributes to return. Defaults to None (all).
+        """
+        if not self.has_feature("index_search"):
+            raise ValueError("OneView api version {0} does not support index search".format(self.api_version))
+        params = [("category", c) for c in OneViewApiClient._as_list(category)]
+        if query:
+            params.append(("query", '"{0}"'.format(query)))
+        params += [("filter", '"{0}"'.format(f)) for f in OneViewApiClient._as_list(filter)]
+        if fields:
+            params.append(("fields", ",".join(fields)))
+        return self._iter_members(OneViewApiClient._url("/index/resources", params))
+
+    def index_associations(self, name=None, parent_uri=None, child_uri=None):
+        """Iterate associations (name, parentUri, childUri) between resources (/rest/index/associations)
+
+        Args:
+            name (str, optional): association name, i.e. 'server_profiles_to_server_hardware'. Defaults to None.
+            parent_uri (str, optional): uri of the parent resource. Defaults to None.
+            child_uri (str, optional): uri of the child resource. Defaults to None.
+        """
+        if not self.has_feature("index_search"):
+            raise ValueError("OneView api version {0} does not support index search".format(self.api_version))
+        params = []
+        if name:
+            params.append(("name", name))
+        if parent_uri:
+            params.append(("parentUri", parent_uri))
+        if child_uri:
+            params.append(("childUri", child_uri))
+        return self._iter_members(OneViewApiClient._url("/index/associations", params))
+
+    def get_resources(self, uris, batch_size=50):
+        """Get resources by uri, using one filtered list request per collection and batch of uris.
+
+        Resources not found are missing in the result. Collections not supporting the filter
+        fall back to one GET request per uri.
+
+        Args:
+            uris (list): resource uris, i.e. '/rest/server-hardware/1234'
+            batch_size (int, optional): uris per list request. Defaults to 50.
+
+        Returns:
+            dict: uri -> resource
+        """
+        collections = OrderedDict()
+        for uri in uris:
+            if uri:
+                collections.setdefault(uri.rsplit("/", 1)[0], OrderedDict())[uri] = True
+        resources = {}
+        for collection, collection_uris in collections.items():
+            collection_uris = list(collection_uris)
+            for start in range(0, len(collection_uris), batch_size):
+                batch = collection_uris[start:start + batch_size]  # fmt: skip
+                try:
+                    filter = '"{0}"'.format(" OR ".join("uri = '{0}'".format(u) for u in batch))
+                    for resource in self._iter_members(OneViewApiClient._url(collection, [("filter", filter)])):
+                        resources[resource["uri"]] = resource
+                except import_requests().HTTPError:
+                    for uri in batch:
+                        resource = self._get_resource_or_none(uri)
+                        if resource is not None:
+                            resources[uri] = resource
+        return resources
+
+    def _get_resource_or_none(self, uri):
+        try:
+            return self.get_request(uri)
+        except import_requests().HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            return None
+
+    @staticmethod
+    def _as_list(value):
+        if not value:
+            return []
+        return [value] if isinstance(value, string_types) else list(value)
 
     def list_server_profiles(self, filter=None):
         next_url = "/server-profiles"
@@ -94,35 +267,272 @@ class OneViewApiClient(JsonRestApiClient):
         data = None
         while time.time() <= end:
             data = self.get_request(url, timeout=5)
-            if data["taskState"] in [
-                "Cancelled",
-                "Cancelling",
-                "Completed",
-                "Error",
-                "Killed",
-                "Terminated",
-                "Unknown",
-            ]:
+            if data["taskState"] in OneViewApiClient.TASK_FINISHED_STATES:
                 break
         return data
 
+    def wait_for_tasks(self, task_ids, seconds_to_wait=30, poll_interval=0.5, max_poll_interval=5.0):
+        """Wait for several tasks together, see iter_finished_tasks()
+
+        Returns:
+            dict: task id -> last polled task, tasks not finished within seconds_to_wait are still running,
+                  None if a task was not found
+        """
+        return dict(self.iter_finished_tasks(task_ids, seconds_to_wait, poll_interval, max_poll_interval))
+
+    def iter_finished_tasks(self, task_ids, seconds_to_wait=30, poll_interval=0.5, max_poll_interval=5.0):
+        """Iterate (task id, task) of several tasks, each task is yielded as soon as it is finished.
+
+        All pending tasks are polled together by one uri filtered /rest/tasks request per round (and 50 tasks),
+        the interval between polling rounds doubles up to max_poll_interval. When seconds_to_wait is over,
+        the remaining tasks are yielded in their last polled state (None if not found).
+
+        Args:
+            task_ids (list): task ids
+            seconds_to_wait (int, optional): max seconds to wait for all tasks. Defaults to 30.
+            poll_interval (float, optional): seconds between the first polling rounds. Defaults to 0.5.
+            max_poll_interval (float, optional): max seconds between polling rounds. Defaults to 5.0.
+        """
+        end = time.time() + seconds_to_wait
+        pending = OrderedDict(("/rest/tasks/" + task_id, task_id) for task_id in task_ids)
+        polled = {}
+        while pending:
+            polled.update(self.get_resources(list(pending)))
+            for uri in [u for u in pending if u in polled]:
+                if polled[uri]["taskState"] in OneViewApiClient.TASK_FINISHED_STATES:
+                    yield pending.pop(uri), polled.pop(uri)
+            remaining = end - time.time()
+            if not pending or remaining <= 0:
+                break
+            time.sleep(min(poll_interval, remaining))
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+        for uri, task_id in pending.items():
+            yield task_id, polled.get(uri)
+
     def list_racks(self):
         return self._collect_members("/racks")
 
     def _collect_members(self, url):
+        return list(self._iter_members(url))
+
+    def _iter_members(self, url):
+        """Iterate members of a paged collection, the next page is fetched when the current page is consumed"""
         next_url = url
-        members = []
-        while True:
-            self.logger.debug("OneViewApiClient: {0}".format(next_url))
+        while next_url:
+            self.logger.sampled_debug("OneViewApiClient: {0}", next_url)
             data = self.get_request(next_url)
-            if data["members"]:
-                members += data["members"]
-                next_url = data.get("nextPageUri", "")
-                if not next_url:
-                    break
-            else:
+            members = data["members"]
+            if not members:
                 break
-        return members
+            next_url = data.get("nextPageUri", "")
+            data = None
+            for member in members:
+                yield member
+            # release the page before the next one is fetched, only members still referenced by the caller are kept
+            members = None
+
+
+class ServerHardwareFilter(object):
+    """Structured server hardware filter, evaluated by OneView.
+
+    Multiple values of a field are combined by OR, fields are combined by AND.
+    Name patterns use '*' as wildcard.
+    """
+
+    # option, OneView attribute, operator
+    FIELDS = [
+        ("models", "shortModel", "="),
+        ("mp_models", "mpModel", "="),
+        ("states", "state", "="),
+        ("power_states", "powerState", "="),
+        ("name_patterns", "name", "matches"),
+    ]
+
+    def __init__(
+        self, models=None, mp_models=None, states=None, power_states=None, name_patterns=None, scope_uris=None
+    ):
+        self.values = dict(
+            models=models, mp_models=mp_models, states=states, power_states=power_states, name_patterns=name_patterns
+        )
+        self.scope_uris = scope_uris
+
+    @staticmethod
+    def from_params(params):
+        """Create from module / plugin option 'server_filter', None if not set"""
+        if not params:
+            return None
+        return ServerHardwareFilter(**dict((k, v) for k, v in params.items() if v))
+
+    def query_params(self, filter=None):
+        """Query parameters 'filter' and 'scopeUris'
+
+        Args:
+            filter (str, optional): additional OneView filter expression. Defaults to None.
+
+        Returns:
+            list: (name, value) tuples
+        """
+        filters = []
+        for option, attribute, operator in ServerHardwareFilter.FIELDS:
+            values = self.values.get(option)
+            if values:
+                if operator == "matches":
+                    values = [v.replace("*", "%") for v in values]
+                filters.append(" OR ".join("{0} {1} '{2}'".format(attribute, operator, v) for v in values))
+        if filter:
+            filters.append(filter)
+        params = [("filter", '"{0}"'.format(f)) for f in filters]
+        if self.scope_uris:
+            params.append(("scopeUris", '"{0}"'.format(" OR ".join("'{0}'".format(u) for u in self.scope_uris))))
+        return params
+
+
+SERVER_FILTER_SPEC = dict(
+    type="dict",
+    required=False,
+    options=dict(
+        models=dict(type="list", elements="str"),
+        mp_models=dict(type="list", elements="str"),
+        states=dict(type="list", elements="str"),
+        power_states=dict(type="list", elements="str"),
+        name_patterns=dict(type="list", elements="str"),
+        scope_uris=dict(type="list", elements="str"),
+    ),
+)
+
+
+class ServerHardwareStateCache(object):
+    """powerState, status and state of all server hardware, keyed by iLO address.
+
+    Read from a snapshot file shared by module runs, which is refreshed with one server hardware
+    listing when older than max_age. Concurrent module runs wait for the run refreshing the snapshot.
+
+    Args:
+        api_client (OneViewApiClient): client, logged in and out for a refresh
+        path (str): snapshot file
+        max_age (int, optional): max age of the snapshot in seconds. Defaults to 60.
+        lock_timeout (int, optional): max seconds to wait for another run refreshing the snapshot. Defaults to 120.
+    """
+
+    FIELDS = ["uri", "name", "powerState", "status", "state", "mpHostInfo"]
+
+    def __init__(self, api_client, path, max_age=60, lock_timeout=120):
+        self.api_client = api_client
+        self.file = JsonFile(path)
+        self.max_age = max_age
+        self.lock_timeout = lock_timeout
+        self._hosts = None
+
+    def get(self, address):
+        """State of the server hardware with iLO address (ip address or hostname), None if not managed by OneView
+
+        Returns:
+            dict: uri, name, powerState, status and state
+        """
+        if self._hosts is None:
+            self._hosts = self._load()
+        return self._hosts.get(address.lower())
+
+    def forget(self, address):
+        """Drop the state of the server hardware with iLO address from the snapshot, i.e. after changing its power
+        state. The server hardware is missing until the next refresh, the age of the snapshot is kept.
+        """
+        with file_lock(self.file.path + ".lock", timeout=self.lock_timeout):
+            snapshot = self.file.read()
+            if snapshot is not None and address.lower() in snapshot["hosts"]:
+                modified = os.path.getmtime(self.file.path)
+                snapshot["hosts"] = ServerHardwareStateCache._without(snapshot["hosts"], address)
+                self.file.write(snapshot)
+                os.utime(self.file.path, (modified, modified))
+        if self._hosts is not None:
+            self._hosts = ServerHardwareStateCache._without(self._hosts, address)
+
+    @staticmethod
+    def _without(hosts, address):
+        # all addresses of the server hardware
+        uri = (hosts.get(address.lower()) or {}).get("uri")
+        return dict((a, s) for a, s in hosts.items() if a != address.lower() and (uri is None or s.get("uri") != uri))
+
+    def _load(self):
+        lock_path = self.file.path + ".lock"
+        deadline = time.time() + self.lock_timeout
+        while True:
+            age = self.file.age()
+            if age is not None and age < self.max_age:
+                snapshot = self.file.read()
+                if snapshot is not None:
+                    return snapshot["hosts"]
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+            except OSError:
+                if time.time() < deadline:
+                    time.sleep(0.2)
+                    continue
+                # lock left over or refresh too slow: refresh without lock
+                return self.refresh()
+            try:
+                return self.refresh()
+            finally:
+                os.remove(lock_path)
+
+    def refresh(self):
+        """Fetch the state of all server hardware from OneView and write the snapshot
+
+        Returns:
+            dict: iLO address -> state
+        """
+        hosts = {}
+        self.api_client.login()
+        try:
+            for server in self.api_client.iter_server_hardware(fields=ServerHardwareStateCache.FIELDS):
+                state = dict((f, server.get(f)) for f in ["uri", "name", "powerState", "status", "state"])
+                mp_host_info = server.get("mpHostInfo") or {}
+                addresses = [a.get("address") for a in mp_host_info.get("mpIpAddresses") or []]
+                for address in addresses + [mp_host_info.get("mpHostName")]:
+                    if address:
+                        hosts[address.lower()] = state
+        finally:
+            self.api_client.logout()
+        self.file.write({"hosts": hosts})
+        return hosts
+
+
+ONEVIEW_STATE_SPEC = dict(
+    type="dict",
+    required=False,
+    options=dict(
+        hostname=dict(type="str", required=True),
+        username=dict(type="str", required=True),
+        password=dict(type="str", required=True, no_log=True),
+        protocol=dict(type="str", choices=["http", "https"], default="https"),
+        port=dict(type="int", default=443),
+        validate_certs=dict(type="bool", default=True),
+        proxy=dict(type="str"),
+        api_version=dict(type="int", default=2400),
+        snapshot_path=dict(type="path"),
+        max_age=dict(type="int", default=60),
+    ),
+)
+
+
+def server_hardware_state_cache(params, logger=SilentLogger()):
+    """Create ServerHardwareStateCache from module params of type ONEVIEW_STATE_SPEC"""
+    api_client = OneViewApiClient(
+        protocol=params["protocol"],
+        host=params["hostname"],
+        port=params["port"],
+        username=params["username"],
+        password=params["password"],
+        validate_certs=params["validate_certs"],
+        proxy=params["proxy"],
+        api_version=params["api_version"],
+        logger=logger,
+    )
+    path = params["snapshot_path"] or os.path.join(
+        os.path.expanduser("~/.cache/unbelievable.hpe"),
+        "oneview-state-{0}-{1}.json".format(re.sub(r"[^\w.-]", "_", params["hostname"]), params["port"]),
+    )
+    return ServerHardwareStateCache(api_client, path, max_age=params["max_age"])
 
 
 class OneviewModuleBase(ModuleBase):
@@ -130,7 +540,11 @@ class OneviewModuleBase(ModuleBase):
         super(OneviewModuleBase, self).__init__(param_alias_prefix="oneview")
 
     def argument_spec(self):
-        additional_spec = dict(api_version=dict(type="int", default=2400, aliases=["oneview_api_version"]))
+        additional_spec = dict(
+            api_version=dict(type="int", default=2400, aliases=["oneview_api_version"]),
+            api_version_negotiation=dict(type="bool", default=False),
+            api_version_cache=dict(type="path", default="~/.cache/unbelievable.hpe"),
+        )
         spec = dict()
         spec.update(super(OneviewModuleBase, self).argument_spec())
         spec.update(additional_spec)
@@ -147,31 +561,95 @@ class OneviewModuleBase(ModuleBase):
             api_version=self.module.params.get("api_version"),
             proxy=proxy,
             logger=logger,
+            negotiate_api_version=self.module.params.get("api_version_negotiation"),
+            version_cache_dir=self.module.params.get("api_version_cache"),
         )
 
 
 class ApiHelper(object):
+    # compiled extractors by field list, split paths by path
+    _extractors = {}
+    _paths = {}
+
     @staticmethod
     def copy_entries(src, entries):
-        result = {}
+        return ApiHelper.compile_entries(entries)(src)
+
+    @staticmethod
+    def compile_entries(entries):
+        """Compile a list of fields into an extractor, to project many resources with the same fields.
+
+        Fields are top level keys, nested paths ('mpHostInfo/mpHostName') or one of the computed fields
+        'rs_mpHostName', 'rs_mpIpAddress4' and 'rs_mpIpAddress6'. Fields with value None are omitted.
+
+        Args:
+            entries (list): fields to copy
+
+        Returns:
+            callable: function(src) returning a dict of the fields of src
+        """
+        key = tuple(entries)
+        extractor = ApiHelper._extractors.get(key)
+        if extractor is None:
+            extractor = ApiHelper._compile(key)
+            ApiHelper._extractors[key] = extractor
+        return extractor
+
+    @staticmethod
+    def _compile(entries):
+        computed = {
+            "rs_mpHostName": lambda src, ips: ApiHelper.Host.mpHostName(src),
+            "rs_mpIpAddress4": lambda src, ips: ips[0],
+            "rs_mpIpAddress6": lambda src, ips: ips[1],
+        }
+        # (field, None) for top level keys, (field, function(src, ips)) otherwise
+        plan = []
         for entry in entries:
-            val = None
-            if entry == "rs_mpHostName":
-                val = ApiHelper.Host.mpHostName(src)
-            elif entry == "rs_mpIpAddress4":
-                val = ApiHelper.Host.mpHostIp4(src)
-            elif entry == "rs_mpIpAddress6":
-                val = ApiHelper.Host.mpHostIp6(src)
+            if entry in computed:
+                plan.append((entry, computed[entry]))
+            elif "/" in entry:
+                plan.append((entry, ApiHelper._path_getter(ApiHelper._split_path(entry))))
             else:
-                val = src.get(entry, None)
-            if val is not None:
-                result[entry] = val
-        return result
+                plan.append((entry, None))
+        plan = tuple(plan)
+        need_ips = "rs_mpIpAddress4" in entries or "rs_mpIpAddress6" in entries
+
+        def extract(src):
+            ips = ApiHelper.Host.mpHostIps(src) if need_ips else None
+            get = src.get
+            result = {}
+            for entry, getter in plan:
+                val = get(entry) if getter is None else getter(src, ips)
+                if val is not None:
+                    result[entry] = val
+            return result
+
+        return extract
+
+    @staticmethod
+    def _path_getter(parts):
+        def get(src, ips):
+            v = src
+            for part in parts:
+                if not isinstance(v, dict):
+                    return None
+                v = v.get(part)
+            return v
+
+        return get
+
+    @staticmethod
+    def _split_path(path):
+        parts = ApiHelper._paths.get(path)
+        if parts is None:
+            parts = tuple(filter(None, path.split("/")))
+            ApiHelper._paths[path] = parts
+        return parts
 
     @staticmethod
     def copy_path(src, path):
         v = src
-        for s in filter(None, path.split("/")):
+        for s in ApiHelper._split_path(path):
             v = v[s]
         return v
 
@@ -188,23 +666,37 @@ class ApiHelper(object):
 
         @staticmethod
         def mpHostIp4(host):
-            return ApiHelper.Host._mpHostIp(host, ".")
+            return ApiHelper.Host.mpHostIps(host)[0]
 
         @staticmethod
         def mpHostIp6(host):
-            return ApiHelper.Host._mpHostIp(host, ":")
+            return ApiHelper.Host.mpHostIps(host)[1]
 
         @staticmethod
-        def _mpHostIp(host, identifier):
-            address = None
+        def mpHostIps(host):
+            """Last static IPv4 and IPv6 address of the host's management processor, in a single pass
+
+            Returns:
+                tuple: IPv4 address or None, IPv6 address or None
+            """
+            ip4 = None
+            ip6 = None
             if host:
                 if "mpHostInfo" in host:
                     for a in host.get("mpHostInfo", {}).get("mpIpAddresses", []):
-                        if a.get("type", "") == "Static" and identifier in a.get("address", ""):
-                            address = a.get("address")
-                elif "mpIpAddress" in host and identifier in host.get("mpIpAddress", ""):
-                    address = host.get("mpIpAddress", None)
-            return address
+                        if a.get("type", "") == "Static":
+                            address = a.get("address", "")
+                            if "." in address:
+                                ip4 = address
+                            if ":" in address:
+                                ip6 = address
+                elif "mpIpAddress" in host:
+                    address = host.get("mpIpAddress", "")
+                    if "." in address:
+                        ip4 = address
+                    if ":" in address:
+                        ip6 = address
+            return ip4, ip6
 
     class ServerProfile(object):
         @staticmethod
@@ -225,11 +717,21 @@ class ApiHelper(object):
 class OneViewInventoryBuilder(object):
 
     MAIN_GROUP = "oneview_members"
+    # server hardware fields stored in snapshots for incremental refresh
+    SNAPSHOT_FIELDS = ["uri", "modified", "eTag", "shortModel", "mpModel", "mpHostInfo"]
 
     def __init__(self, api_client, inventory):
         self.api_client = api_client
         self.inventory = inventory
         self.preferred_ip = "IPv4"
+        self.hostname_short = False
+        self.add_domain = None
+        self.snapshot = None
+        self.server_filter = None
+
+    def set_server_filter(self, server_filter):
+        """Only add server hardware matching server_filter (ServerHardwareFilter)"""
+        self.server_filter = server_filter
 
     def set_preferred_ip(self, preferred_ip):
         self.preferred_ip = preferred_ip
@@ -240,42 +742,196 @@ class OneViewInventoryBuilder(object):
     def set_add_domain(self, add_domain):
         self.add_domain = add_domain
 
+    def set_snapshot(self, snapshot):
+        """Enable incremental refresh.
+
+        Only server hardware modified since the snapshot was taken is fetched from OneView,
+        deletions are detected by listing the uris of all server hardware.
+
+        Args:
+            snapshot (dict): snapshot from get_snapshot() of a previous run, {} to only take a snapshot
+        """
+        self.snapshot = snapshot
+
+    def get_snapshot(self):
+        """Snapshot of the last populate() run, to be passed to set_snapshot() of the next run.
+
+        Only available if set_snapshot() was called before populate().
+        """
+        return self.snapshot
+
     def populate(self):
         try:
             self.api_client.login()
             self._populate()
         finally:
             self.api_client.logout()
+            stats = self.api_client.get_stats()
+            self.api_client.logger.debug(
+                "perf: {0} requests, {1} deduplicated GET requests", stats["requests"], stats["deduplicated"]
+            )
 
     def _populate(self):
-        hosts_raw = self.api_client.list_server_hardware()
+        hosts_raw = self._iter_server_hardware()
         self.inventory.add_group(OneViewInventoryBuilder.MAIN_GROUP)
+        # model groups are added once per build, not once per host
+        groups = set()
         for host in hosts_raw:
             name, host_vars = self._process_hardware_host(host)
-            shortModel = host_vars["shortModel"].replace(" ", "_")  # i.e. DL360 Gen10
-            self.inventory.add_group(shortModel)
-            self.inventory.add_child_group(self.MAIN_GROUP, shortModel)
-            mpModel = host_vars["mpModel"].replace(" ", "_")  # i.e. iLO5
-            self.inventory.add_group(mpModel)
-            self.inventory.add_child_group(self.MAIN_GROUP, mpModel)
+            shortModel = host_vars.shortModel.replace(" ", "_")  # i.e. DL360 Gen10
+            mpModel = host_vars.mpModel.replace(" ", "_")  # i.e. iLO5
+            for group in (shortModel, mpModel):
+                if group not in groups:
+                    groups.add(group)
+                    self.inventory.add_group(group)
+                    self.inventory.add_child_group(self.MAIN_GROUP, group)
             self.inventory.add_host(name, variables=host_vars, group=shortModel)
             self.inventory.add_host_to_group(mpModel, name)
 
+    def _iter_server_hardware(self):
+        """Iterate compact server hardware records (see SNAPSHOT_FIELDS), updates an enabled snapshot when exhausted.
+
+        Full server hardware documents are projected as their page arrives, so only one page of them is kept
+        in memory at any time.
+        """
+        if self.snapshot is None:
+            for host in self._iter_server_hardware_changes():
+                yield host
+            return
+        members = {}
+        modified = ""
+        for host in self._iter_server_hardware_changes():
+            modified = max(modified, host.get("modified") or "")
+            if host.get("uri"):
+                members[host["uri"]] = host
+            yield host
+        self.snapshot = dict(modified=modified, members=members)
+
+    def _iter_server_hardware_changes(self):
+        if not self.snapshot or not self.snapshot.get("modified"):
+            for host in self.api_client.iter_server_hardware(server_filter=self.server_filter):
+                yield self._snapshot_entry(host)
+            return
+        previous = self.snapshot["members"]
+        changed = dict(
+            (h["uri"], self._snapshot_entry(h))
+            for h in self.api_client.iter_server_hardware(
+                "modified gt '{0}'".format(self.snapshot["modified"]), server_filter=self.server_filter
+            )
+        )
+        uris = self.api_client.list_server_hardware_uris(server_filter=self.server_filter)
+        for uri in uris:
+            host = changed.get(uri) or previous.get(uri)
+            if host is None:
+                # i.e. modified timestamp older than the snapshot
+                host = self._snapshot_entry(self.api_client.get_request(uri))
+            yield host
+        self.api_client.logger.debug(
+            "OneViewInventoryBuilder: incremental refresh, {0} changed, {1} deleted",
+            len(changed),
+            len(set(previous) - set(uris)),
+        )
+
+    def _snapshot_entry(self, host):
+        return dict((k, host[k]) for k in OneViewInventoryBuilder.SNAPSHOT_FIELDS if k in host)
+
     def _process_hardware_host(self, host):
         name = host["mpHostInfo"]["mpHostName"].lower()
         if self.hostname_short:
             name = name.split(".")[0]
         elif self.add_domain:
             name = name.split(".")[0] + "." + self.add_domain
-        host_vars = dict()
-        host_vars["shortModel"] = host.get("shortModel")
-        host_vars["mpModel"] = host.get("mpModel")
+        host_vars = HostRecord(shortModel=host.get("shortModel"), mpModel=host.get("mpModel"))
         for mp_ip_address in host["mpHostInfo"]["mpIpAddresses"]:
             if mp_ip_address["type"] == "Static":
                 ip = mp_ip_address["address"]
-                host_vars["ansible_host"] = ip
+                host_vars.ansible_host = ip
                 if self.preferred_ip == "IPv4" and "." in ip:
                     break
                 if self.preferred_ip == "IPv6" and ":" in ip:
                     break
         return name, host_vars
+
+
+class OneViewFederatedInventoryBuilder(object):
+    """Populate an inventory from several OneView appliances concurrently.
+
+    Each appliance is populated by its own OneViewInventoryBuilder into its own DictInventory.
+    The results are merged in the order the appliances were added: groups are merged, hosts
+    known from a previous appliance are ignored. Each host gets the variable 'oneview_appliance'
+    naming the appliance it was taken from.
+    """
+
+    PROVENANCE_VAR = "oneview_appliance"
+
+    def __init__(self, inventory, logger=SilentLogger()):
+        self.inventory = inventory
+        self.logger = logger
+        self.appliances = []
+        self.results = {}
+
+    def add_appliance(self, name, builder):
+        """Add appliance
+
+        Args:
+            name (str): appliance name, value of the provenance variable
+            builder (OneViewInventoryBuilder): builder using a DictInventory
+        """
+        self.appliances.append((name, builder))
+
+    def populate(self):
+        """Populate from all appliances, failing appliances are reported and skipped.
+
+        Raises:
+            Exception: error of the first appliance if all appliances failed
+
+        Returns:
+            dict: per appliance name: dict(hosts, seconds, error)
+        """
+        threads = []
+        for name, builder in self.appliances:
+            thread = threading.Thread(target=self._populate_appliance, args=(name, builder))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        seen = set()
+        duplicates = 0
+        for name, builder in self.appliances:
+            result = self.results[name]
+            if result["error"] is not None:
+                self.logger.warn(
+                    "oneview: appliance {0} failed after {1:.2f}s: {2}", name, result["seconds"], result["error"]
+                )
+                continue
+            data = builder.inventory.get_inventory()
+            result["hosts"] = len(data["hosts"])
+            hosts = OrderedDict()
+            for host_name, host in data["hosts"].items():
+                if host_name in seen:
+                    duplicates += 1
+                    continue
+                seen.add(host_name)
+                host_vars = dict(host["vars"] or {})
+                host_vars[OneViewFederatedInventoryBuilder.PROVENANCE_VAR] = name
+                hosts[host_name] = dict(host, vars=host_vars)
+            self.inventory.add_inventory(dict(groups=data["groups"], hosts=hosts))
+            self.logger.info(
+                "oneview: appliance {0}: {1} hosts in {2:.2f}s", name, len(data["hosts"]), result["seconds"]
+            )
+        if duplicates:
+            self.logger.info("oneview: ignored {0} hosts already provided by another appliance", duplicates)
+        if self.appliances and all(r["error"] is not None for r in self.results.values()):
+            raise self.results[self.appliances[0][0]]["error"]
+        return self.results
+
+    def _populate_appliance(self, name, builder):
+        start = time.time()
+        error = None
+        try:
+            builder.populate()
+        except Exception as e:
+            error = e
+        self.results[name] = dict(hosts=None, seconds=time.time() - start, error=error)
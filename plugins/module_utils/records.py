@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+class Record(object):
+    """Compact record with fixed attributes (__slots__), used instead of one dict per item for large result sets.
+
+    Records are converted to dicts by to_dict() when they are passed to Ansible.
+    Attribute names are the keys of the resulting dict, attributes set to None are omitted.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        for name in self.__slots__:
+            setattr(self, name, kwargs.get(name))
+
+    def to_dict(self):
+        result = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is not None:
+                result[name] = value
+        return result
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, self.to_dict())
+
+
+class HostRecord(Record):
+    """Inventory host variables of a OneView server hardware"""
+
+    __slots__ = ("shortModel", "mpModel", "ansible_host")
+
+    def to_dict(self):
+        # models are always set, even if unknown
+        result = dict(shortModel=self.shortModel, mpModel=self.mpModel)
+        if self.ansible_host is not None:
+            result["ansible_host"] = self.ansible_host
+        return result
+
+
+class RackMountRecord(Record):
+    """Position of a server hardware in a OneView rack, rack is a dict shared by all mounts of the rack"""
+
+    __slots__ = ("topUSlot", "uHeight", "rack")
+
+    def to_dict(self):
+        result = {}
+        if self.topUSlot is not None:
+            result["topUSlot"] = self.topUSlot
+        if self.uHeight is not None:
+            result["uHeight"] = self.uHeight
+        result.update(self.rack or {})
+        return result
+
+
+class ProfileSummary(Record):
+    """Fields of a OneView server profile needed to check and update its template compliance"""
+
+    __slots__ = ("uuid", "name", "uri", "templateCompliance", "serverHardwareUri")
+
+    @staticmethod
+    def from_profile(profile):
+        # imported here, module_utils.oneview imports this module
+        from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import ApiHelper  # type: ignore
+
+        return ProfileSummary(
+            uuid=ApiHelper.ServerProfile.get_profile_uuid(profile),
+            name=profile.get("name"),
+            uri=profile.get("uri"),
+            templateCompliance=profile.get("templateCompliance"),
+            serverHardwareUri=profile.get("serverHardwareUri"),
+        )
@@ -12,9 +12,17 @@ from ansible_collections.unbelievable.hpe.plugins.module_utils.logger import Sil
 from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import (  # type: ignore
     JsonRestApiClient,
     ModuleBase,
+    import_requests,
 )
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cache import JsonFile  # type: ignore
 
+import json
+import os
+import re
 import time
+from collections import OrderedDict
+
+from ansible.module_utils.six.moves.urllib.parse import quote
 
 
 class RedfishApiClient(JsonRestApiClient):
@@ -31,6 +39,9 @@ class RedfishApiClient(JsonRestApiClient):
         validate_certs=True,
         proxy=None,
         logger=SilentLogger(),
+        conditional_writes=False,
+        etag_cache_dir=None,
+        etag_max_age=3600,
     ):
         super(RedfishApiClient, self).__init__(
             protocol=protocol,
@@ -43,9 +54,344 @@ class RedfishApiClient(JsonRestApiClient):
             proxy=proxy,
             logger=logger,
         )
+        # staged patches by resource path, see stage_patch()
+        self.staged_patches = OrderedDict()
+        self.conditional_writes = conditional_writes
+        self.etag_cache_dir = etag_cache_dir
+        self.etag_max_age = etag_max_age
+        self._etag_cache = None
+
+    def read_resource(self, uri_path, use_cache=True):
+        """Data and ETag of uri_path
+
+        With conditional_writes, data and ETag are cached in etag_cache_dir (one file per iLO),
+        entries younger than etag_max_age seconds are returned without request.
+
+        Args:
+            uri_path (str): uri relative to api_base
+            use_cache (bool, optional): False to always read from the iLO. Defaults to True.
+
+        Returns:
+            tuple: data (dict), ETag (str, None if not sent by the iLO), True if data is cached
+        """
+        path = self.cleanup_uri_path(uri_path)
+        cache = self.get_etag_cache()
+        if use_cache and path in cache and time.time() - cache[path]["time"] < self.etag_max_age:
+            return cache[path]["data"], cache[path]["etag"], True
+        response = self.get_request_with_headers(path)
+        etag = response.headers.get("ETag")
+        if self.conditional_writes and etag:
+            cache[path] = dict(data=response.content, etag=etag, time=time.time())
+            self._write_etag_cache()
+        return response.content, etag, False
+
+    def write_resource(self, uri_path, stage_changes, check_mode=False):
+        """Read-modify-write of uri_path
+
+        stage_changes(data) stages the patch of uri_path needed for data (see stage_patch()). With conditional_writes,
+        data is read from the ETag cache if possible and the PATCH is sent with If-Match. Only if the iLO rejects it
+        (412 Precondition Failed), the resource is read again and stage_changes is called again with the fresh data.
+
+        Args:
+            uri_path (str): uri relative to api_base
+            stage_changes (callable): stages patch for given data, may be called twice
+            check_mode (bool, optional): do not send the patch. Defaults to False.
+
+        Returns:
+            tuple: data the patch is based on (dict), patch (dict, None if no changes are needed)
+        """
+        data, etag, cached = self.read_resource(uri_path)
+        stage_changes(data)
+        patch = self.staged_patch(uri_path)
+        if check_mode or not patch:
+            self.discard_patches(uri_path)
+            return data, patch
+        try:
+            if self.conditional_writes and etag:
+                self.stage_patch(uri_path, dict(), etag=etag)
+            self.flush_patches(uri_path)
+        except import_requests().HTTPError as e:
+            if not cached or getattr(e.response, "status_code", None) != 412:
+                raise
+            self.logger.debug("RedfishApiClient: {0} changed since {1}, reading it again", uri_path, etag)
+            self.discard_patches(uri_path)
+            data, etag, cached = self.read_resource(uri_path, use_cache=False)
+            stage_changes(data)
+            patch = self.staged_patch(uri_path)
+            self.flush_patches(uri_path)
+        finally:
+            # the resource has changed, its ETag is unknown
+            if self.get_etag_cache().pop(self.cleanup_uri_path(uri_path), None):
+                self._write_etag_cache()
+        return data, patch
+
+    def get_etag_cache(self):
+        """Cached data and ETags by resource path, empty without conditional_writes"""
+        if self._etag_cache is None:
+            self._etag_cache = dict()
+            if self.conditional_writes and self.etag_cache_dir:
+                self._etag_cache = self._etag_cache_file().read(default=dict())
+        return self._etag_cache
+
+    def _etag_cache_file(self):
+        name = "redfish-etags-{0}-{1}.json".format(re.sub(r"[^\w.-]", "_", self.host), self.port)
+        return JsonFile(os.path.join(self.etag_cache_dir, name))
+
+    def _write_etag_cache(self):
+        if self.etag_cache_dir:
+            self._etag_cache_file().write(self._etag_cache)
+
+    def stage_patch(self, uri_path, data, etag=None):
+        """Stage a PATCH of uri_path, sent by flush_patches()
+
+        Patches of the same resource are combined into one PATCH: nested dicts are merged key by key
+        (see ApiHelper.merge_recursive), for other values the value of the later patch wins.
+
+        Args:
+            uri_path (str): uri relative to api_base
+            data (dict): payload
+            etag (str, optional): ETag of the resource, sent as If-Match precondition. Defaults to None.
+        """
+        path = self.cleanup_uri_path(uri_path)
+        patch = self.staged_patches.setdefault(path, dict(data=dict(), etag=None))
+        ApiHelper.merge_recursive(data, patch["data"])
+        if etag:
+            patch["etag"] = etag
+
+    def staged_patch(self, uri_path):
+        """Combined payload staged for uri_path, None if nothing is staged"""
+        patch = self.staged_patches.get(self.cleanup_uri_path(uri_path))
+        return patch["data"] if patch else None
+
+    def discard_patches(self, uri_path=None):
+        """Discard staged patches
+
+        Args:
+            uri_path (str, optional): only discard the patch of uri_path. Defaults to None (all patches).
+        """
+        if uri_path is None:
+            self.staged_patches.clear()
+        else:
+            self.staged_patches.pop(self.cleanup_uri_path(uri_path), None)
+
+    def flush_patches(self, uri_path=None, timeout=None):
+        """Send staged patches, one PATCH per resource in the order the resources were staged
+
+        Args:
+            uri_path (str, optional): only send the patch of uri_path. Defaults to None (all patches).
+            timeout (int, optional): request timeout in seconds. Defaults to None.
+
+        Returns:
+            dict: api response by resource path
+        """
+        if uri_path is None:
+            paths = list(self.staged_patches)
+        else:
+            paths = [p for p in [self.cleanup_uri_path(uri_path)] if p in self.staged_patches]
+        responses = OrderedDict()
+        for path in paths:
+            patch = self.staged_patches.pop(path)
+            headers = {"If-Match": patch["etag"]} if patch["etag"] else None
+            responses[path] = self.patch_request(path, patch["data"], timeout=timeout, headers=headers)
+        return responses
+
+
+# options of modules writing with RedfishApiClient.write_resource(), see doc fragment redfish_write_mode
+WRITE_MODE_SPEC = dict(
+    write_mode=dict(type="str", choices=["read_before_write", "conditional"], default="read_before_write"),
+    etag_cache=dict(type="path", default="~/.cache/unbelievable.hpe"),
+    etag_max_age=dict(type="int", default=3600),
+)
+
+
+class RedfishEventStream(object):
+    """Events of the Redfish EventService SSE stream (EventService/SSE)
+
+    Args:
+        api_client (RedfishApiClient): client, its url, credentials and proxy are used
+        filter (str, optional): $filter expression, i.e. "OriginResource eq '/redfish/v1/Systems/1'". Defaults to None.
+    """
+
+    PATH = "EventService/SSE"
+
+    def __init__(self, api_client, filter=None):
+        self.api_client = api_client
+        self.filter = filter
+        self.response = None
+
+    def open(self, timeout=10):
+        """Open the stream
+
+        Args:
+            timeout (int, optional): connect timeout in seconds. Defaults to 10.
+
+        Returns:
+            bool: False if SSE is not available, i.e. not supported or requests are replayed from a cassette
+        """
+        if self.api_client.transport is not None:
+            return False
+        requests = import_requests()
+        url = self.api_client.get_url(RedfishEventStream.PATH)
+        if self.filter:
+            url += "?$filter=" + quote(self.filter, safe="'/")
+        try:
+            response = requests.get(
+                url,
+                headers={"Accept": "text/event-stream"},
+                auth=self.api_client.get_auth(),
+                verify=self.api_client.validate_certs,
+                proxies=self.api_client.get_proxies(),
+                stream=True,
+                timeout=(timeout, timeout),
+            )
+        except requests.RequestException as e:
+            self.api_client.logger.debug("RedfishEventStream: {0} not available: {1}", url, e)
+            return False
+        if not response.ok or not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+            self.api_client.logger.debug("RedfishEventStream: {0} not available: {1}", url, response.status_code)
+            response.close()
+            return False
+        self.response = response
+        return True
+
+    def events(self, seconds, keep_alives=False):
+        """Iterate events (json data of server-sent events) until seconds are over or the stream is closed
+
+        The time is checked whenever a line is received, servers send keep-alive comments regularly.
+        If keep_alives is True, None is yielded for each keep-alive comment.
+        """
+        end = time.time() + seconds
+        data = []
+        try:
+            for line in self.response.iter_lines(chunk_size=1, decode_unicode=True):
+                if line.startswith(":") and keep_alives:
+                    yield None
+                elif line.startswith("data:"):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    try:
+                        event = json.loads("\n".join(data))
+                    except ValueError:
+                        event = None
+                    data = []
+                    if event is not None:
+                        yield event
+                if time.time() >= end:
+                    return
+        except import_requests().RequestException as e:
+            # read timeout or connection closed (i.e. iLO reset)
+            self.api_client.logger.debug("RedfishEventStream: stream closed: {0}", e)
+
+    def close(self):
+        if self.response is not None:
+            self.response.close()
+            self.response = None
+
+
+class SettingsTransaction(object):
+    """Pending settings of several resources, applied together by a single reset.
+
+    Resources with settings (@Redfish.Settings), i.e. Systems/1/Bios, are not changed directly: changes are
+    written to their settings object (i.e. Systems/1/Bios/settings) and applied by the next reset (POST).
+    Changes staged by several modules / tasks are collected on the iLO itself, pending() returns all
+    changes of the resources which differ from their current values.
+
+    Args:
+        api_client (RedfishApiClient): client
+        resources (list, optional): resources with settings. Defaults to RESOURCES.
+    """
+
+    RESOURCES = ["Systems/1/Bios", "Systems/1/Bios/boot"]
+    # properties of settings objects which are not settings
+    IGNORED_KEYS = ["Id", "Name", "Description"]
+
+    def __init__(self, api_client, resources=None):
+        self.api_client = api_client
+        self.resources = resources or SettingsTransaction.RESOURCES
+
+    @staticmethod
+    def settings_path(resource, data=None):
+        """Path of the settings object of resource, read from @Redfish.Settings if data of resource is given"""
+        settings_object = ((data or {}).get("@Redfish.Settings") or {}).get("SettingsObject") or {}
+        return settings_object.get("@odata.id") or resource.rstrip("/") + "/settings"
+
+    @staticmethod
+    def diff(settings, current):
+        """Values of settings which differ from current, nested dicts are compared key by key"""
+        result = dict()
+        for key, value in settings.items():
+            if key.startswith("@") or key in SettingsTransaction.IGNORED_KEYS:
+                continue
+            current_value = (current or {}).get(key)
+            if isinstance(value, dict):
+                changes = SettingsTransaction.diff(value, current_value if isinstance(current_value, dict) else {})
+                if changes:
+                    result[key] = changes
+            elif value != current_value:
+                result[key] = value
+        return result
+
+    @staticmethod
+    def is_success(message):
+        """True if message of @Redfish.Settings.Messages reports success, i.e. Base.1.0.Success"""
+        return message.get("MessageId", "").split(".")[-1] == "Success"
+
+    def stage(self, resource, values, data=None):
+        """Write values to the settings object of resource, they are applied by the next reset
+
+        Args:
+            resource (str): resource, i.e. Systems/1/Bios/boot
+            values (dict): changed properties
+            data (dict, optional): current data of resource, read if not given. Defaults to None.
+
+        Returns:
+            dict: response
+        """
+        if data is None:
+            data = self.api_client.get_request(resource)
+        return self.api_client.patch_request(SettingsTransaction.settings_path(resource, data), values)
+
+    def pending(self):
+        """Changes waiting for the next reset
+
+        Returns:
+            dict: changed values by resource, resources without changes are omitted
+        """
+        result = dict()
+        for resource in self.resources:
+            data = self.api_client.get_request(resource)
+            settings = self.api_client.get_request(SettingsTransaction.settings_path(resource, data))
+            changes = SettingsTransaction.diff(settings, data)
+            if changes:
+                result[resource] = changes
+        return result
+
+    def verify(self, pending):
+        """Results of applying pending changes
+
+        Args:
+            pending (dict): result of pending() before the reset
+
+        Returns:
+            dict: by resource: applied (bool), not_applied (values which differ from pending),
+                  messages (@Redfish.Settings.Messages)
+        """
+        result = dict()
+        for resource, values in pending.items():
+            data = self.api_client.get_request(resource)
+            not_applied = SettingsTransaction.diff(values, data)
+            result[resource] = dict(
+                applied=not not_applied,
+                not_applied=not_applied,
+                messages=(data.get("@Redfish.Settings") or {}).get("Messages", []),
+            )
+        return result
 
 
 class RedfishModuleBase(ModuleBase):
+
+    POST_FINISHED_STATES = ["FinishedPost", "InPostDiscoveryComplete"]
+
     def __init__(self):
         super(RedfishModuleBase, self).__init__(param_alias_prefix="ilo")
 
@@ -75,6 +421,116 @@ class RedfishModuleBase(ModuleBase):
                 ).format(param_name, seconds_to_wait)
             )
 
+    def wait_for(self, condition, seconds_to_wait, event_filter=None, poll_interval=2, max_event_gap=None):
+        """Wait until condition() is true.
+
+        condition is checked whenever the EventService sends an event matching event_filter,
+        if SSE is not available (or the stream is closed) it is polled every poll_interval seconds.
+
+        Args:
+            condition (callable): returns True if the wait is over
+            seconds_to_wait (int): max seconds to wait
+            event_filter (str, optional): $filter of events to check condition on. Defaults to None (all).
+            poll_interval (int, optional): seconds between checks without SSE. Defaults to 2.
+            max_event_gap (int, optional): with SSE, check condition on keep-alives if there was no check for
+                max_event_gap seconds, for conditions which do not reliably raise an event. Defaults to None.
+
+        Returns:
+            bool: True if condition became true, False on timeout
+        """
+        end = time.time() + seconds_to_wait
+        stream = RedfishEventStream(self.api_client, event_filter)
+        if stream.open():
+            try:
+                # opened before the first check, so no event is missed
+                if condition():
+                    return True
+                last_check = time.time()
+                # the first check may have taken a while, the stream must not outlast seconds_to_wait
+                for event in stream.events(end - time.time(), keep_alives=max_event_gap is not None):
+                    if event is None and time.time() - last_check < max_event_gap:
+                        continue
+                    self.api_client.logger.sampled_debug("RedfishModuleBase: event {0}", event)
+                    if condition():
+                        return True
+                    last_check = time.time()
+            finally:
+                stream.close()
+        while True:
+            if condition():
+                return True
+            remaining = end - time.time()
+            if remaining <= 0:
+                return False
+            time.sleep(min(poll_interval, remaining))
+
+    def stage_settings(self, resource, values, data=None):
+        """Stage values in the settings object of resource, see SettingsTransaction.stage()"""
+        return SettingsTransaction(self.api_client, [resource]).stage(resource, values, data)
+
+    def apply_pending_settings(self, resources=None, reset_type="GracefulRestart", seconds_to_wait=1200):
+        """Apply all pending changes of resources with a single reset, waits until they are applied.
+
+        The server is powered on instead of restarted if it is off.
+
+        Args:
+            resources (list, optional): resources with settings. Defaults to SettingsTransaction.RESOURCES.
+            reset_type (str, optional): ResetType used if the server is on. Defaults to "GracefulRestart".
+            seconds_to_wait (int, optional): max seconds to wait for POST to finish. Defaults to 1200.
+
+        Returns:
+            tuple: pending changes (dict, see SettingsTransaction.pending()),
+                   results (dict, see SettingsTransaction.verify(), None in check mode or without changes)
+        """
+        transaction = SettingsTransaction(self.api_client, resources)
+        pending = transaction.pending()
+        if not pending or self.module.check_mode:
+            return pending, None
+        system = self.api_client.get_request("Systems/1")
+        if system.get("PowerState") == "Off":
+            reset_type = "On"
+        self.api_client.post_request("Systems/1/Actions/ComputerSystem.Reset", {"ResetType": reset_type})
+
+        def applied():
+            post_state = ApiHelper.get_recursive("Oem.Hpe.PostState", self.api_client.get_request("Systems/1"))
+            if post_state not in RedfishModuleBase.POST_FINISHED_STATES:
+                return False
+            return all(r["applied"] for r in transaction.verify(pending).values())
+
+        self.wait_for(applied, seconds_to_wait, max_event_gap=30)
+        return pending, transaction.verify(pending)
+
+    def get_oneview_state(self):
+        """powerState, status and state of this server from OneView (option oneview_state)
+
+        Returns:
+            dict: state, None if oneview_state is not set or the server is not managed by OneView
+        """
+        params = self.module.params.get("oneview_state")
+        if not params:
+            return None
+        cache = self._oneview_state_cache(params)
+        state = cache.get(self.module.params.get("hostname"))
+        self.api_client.logger.debug("RedfishModuleBase: state from OneView {0}", state)
+        return state
+
+    def forget_oneview_state(self):
+        """Drop the state of this server from the OneView snapshot (option oneview_state), i.e. after a reset"""
+        params = self.module.params.get("oneview_state")
+        if params:
+            self._oneview_state_cache(params).forget(self.module.params.get("hostname"))
+
+    def _oneview_state_cache(self, params):
+        if getattr(self, "oneview_state_cache", None) is None:
+            # imported on first use, modules without oneview_state do not load module_utils.oneview
+            from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import (  # type: ignore
+                server_hardware_state_cache,
+            )
+
+            self.oneview_state_cache = server_hardware_state_cache(params, logger=self.api_client.logger)
+            self.oneview_state_cache.api_client.transport = self.api_client.transport
+        return self.oneview_state_cache
+
     def get_module_api_client(self, protocol, host, port, username, password, validate_certs, proxy, logger):
         return RedfishApiClient(
             protocol=protocol,
@@ -85,6 +541,9 @@ class RedfishModuleBase(ModuleBase):
             validate_certs=validate_certs,
             proxy=proxy,
             logger=logger,
+            conditional_writes=self.module.params.get("write_mode") == "conditional",
+            etag_cache_dir=self.module.params.get("etag_cache"),
+            etag_max_age=self.module.params.get("etag_max_age") or 0,
         )
 
 
@@ -97,6 +556,18 @@ class ApiHelper(object):
             value = value.setdefault(key, dict())
         return value
 
+    @staticmethod
+    def merge_recursive(source, destination):
+        """Merge nested dict source into destination: nested dicts are merged key by key, other values replaced"""
+        for key, value in source.items():
+            if isinstance(value, dict):
+                if not isinstance(destination.get(key), dict):
+                    destination[key] = dict()
+                ApiHelper.merge_recursive(value, destination[key])
+            else:
+                destination[key] = value
+        return destination
+
     @staticmethod
     def get_recursive(path, d):
         """Split 'path' on '.' and recursively get value from nested dict d"""
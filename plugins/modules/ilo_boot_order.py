@@ -18,6 +18,8 @@ author:
 short_description: Manage boot order
 description:
     - Manage boot order.
+    - The new boot order is pending until the next reset, pending changes of several modules can be applied
+      with a single reset by M(unbelievable.hpe.ilo_settings_apply).
 
 options:
     patterns:
@@ -30,6 +32,7 @@ options:
 
 extends_documentation_fragment:
     - unbelievable.hpe.redfish_api_client
+    - unbelievable.hpe.trust_window
 """
 
 EXAMPLES = r"""
@@ -57,6 +60,7 @@ BootSources:
     elements: dict
 """
 
+from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import TRUST_WINDOW_SPEC  # type: ignore
 from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishModuleBase  # type: ignore
 import re
 
@@ -76,6 +80,7 @@ class ILOBootOrder(RedfishModuleBase):
         )
         spec = dict()
         spec.update(super(ILOBootOrder, self).argument_spec())
+        spec.update(TRUST_WINDOW_SPEC)
         spec.update(additional_spec)
         return spec
 
@@ -101,8 +106,8 @@ class ILOBootOrder(RedfishModuleBase):
         self.result["pending"] = self.result["changed"] or current_pending_order != current_order
 
         if not self.module.check_mode and current_pending_order != new_order:
-            self.result["response"] = self.api_client.patch_request(
-                ILOBootOrder.PENDING_SETTINGS_ENDPOINT, {"PersistentBootConfigOrder": new_order}
+            self.result["response"] = self.stage_settings(
+                ILOBootOrder.CURRENT_SETTINGS_ENDPOINT, {"PersistentBootConfigOrder": new_order}, current_settings
             )
 
     @staticmethod
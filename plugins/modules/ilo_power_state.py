@@ -26,9 +26,20 @@ options:
         type: str
         choices: ['On', 'ForceOff', 'GracefulShutdown', 'ForceRestart', 'PushPowerButton', 'GracefulRestart']
         required: yes
+    wait_timeout:
+        description:
+            - Max seconds to wait for the server to reach the power state resulting from I(action).
+            - A server which is restarted has to be on again with POST finished.
+            - Waits on events of the iLO EventService (SSE) if available, otherwise the power state is polled.
+            - 0 not wait at all.
+        type: int
+        required: no
+        default: 0
+        version_added: 3.4.0
 
 extends_documentation_fragment:
     - unbelievable.hpe.redfish_api_client
+    - unbelievable.hpe.oneview_state
 """
 
 EXAMPLES = r"""
@@ -39,10 +50,26 @@ EXAMPLES = r"""
       user: user
       password: secret
       delegate_to: localhost
+
+- name: Power on, read the current power state from OneView
+  unbelievable.hpe.ilo_power_state:
+      action: On
+      hostname: '{{ inventory_hostname }}'
+      user: user
+      password: secret
+      oneview_state:
+          hostname: oneview.domain
+          username: user
+          password: secret
+      delegate_to: localhost
 """
 
 
-from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishModuleBase  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import ONEVIEW_STATE_SPEC  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import (  # type: ignore
+    ApiHelper,
+    RedfishModuleBase,
+)
 
 
 class ILOPowerState(RedfishModuleBase):
@@ -61,6 +88,8 @@ class ILOPowerState(RedfishModuleBase):
                 ],
                 required=True,
             ),
+            oneview_state=ONEVIEW_STATE_SPEC,
+            wait_timeout=dict(type="int", required=False, default=0),
         )
         spec = dict()
         spec.update(super(ILOPowerState, self).argument_spec())
@@ -83,6 +112,59 @@ class ILOPowerState(RedfishModuleBase):
 
         if not self.module.check_mode and change_required:
             self.api_client.post_request("Systems/1/Actions/ComputerSystem.Reset", {"ResetType": action})
+            # the state in the OneView snapshot is outdated until its next refresh
+            self.forget_oneview_state()
+            if self.module.params.get("wait_timeout") > 0:
+                self.wait_for_power_state(current_state, action)
+
+    def wait_for_power_state(self, current_state, action):
+        timeout = self.module.params.get("wait_timeout")
+        reached = self.wait_for(
+            ILOPowerState.power_state_reached(lambda: self.api_client.get_request("Systems/1"), current_state, action),
+            timeout,
+            event_filter="OriginResource eq '/redfish/v1/Systems/1'",
+        )
+        if not reached:
+            self.module.fail_json(
+                msg="Power state {0} not reached within {1} seconds".format(
+                    ILOPowerState.expected_state(current_state, action), timeout
+                )
+            )
+
+    @staticmethod
+    def expected_state(current_state, action):
+        if action == "PushPowerButton":
+            return "Off" if current_state == "On" else "On"
+        return "Off" if action in ["ForceOff", "GracefulShutdown"] else "On"
+
+    @staticmethod
+    def power_state_reached(get_system, current_state, action):
+        """Condition for wait_for: the power state resulting from action is reached.
+
+        A server which is restarted is on all the time (or powered off and on again), so a restart is finished
+        when the server was seen powered off or in POST and is on again with POST finished.
+
+        Args:
+            get_system (callable): returns Systems/1
+            current_state (str): power state before the reset
+            action (str): ResetType
+        """
+        state = ILOPowerState.expected_state(current_state, action)
+        if current_state != "On" or action not in ["ForceRestart", "GracefulRestart"]:
+            return lambda: get_system()["PowerState"] == state
+        restarting = []
+
+        def restarted():
+            system = get_system()
+            post_state = ApiHelper.get_recursive("Oem.Hpe.PostState", system)
+            up = system["PowerState"] == "On" and (
+                post_state is None or post_state in RedfishModuleBase.POST_FINISHED_STATES
+            )
+            if not up:
+                restarting.append(True)
+            return up and bool(restarting)
+
+        return restarted
 
     @staticmethod
     def change_required(current_state, action):
@@ -96,6 +178,10 @@ class ILOPowerState(RedfishModuleBase):
         return change
 
     def get_current_power_state(self):
+        state = self.get_oneview_state()
+        # transitional states (PoweringOn, Resetting, ...) are read from the iLO
+        if state and state.get("powerState") in ["On", "Off"]:
+            return state["powerState"]
         data = self.api_client.get_request("Systems/1")
         return data["PowerState"]
 
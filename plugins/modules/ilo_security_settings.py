@@ -38,6 +38,8 @@ options:
 
 extends_documentation_fragment:
     - unbelievable.hpe.redfish_api_client
+    - unbelievable.hpe.redfish_write_mode
+    - unbelievable.hpe.trust_window
 """
 
 EXAMPLES = r"""
@@ -51,7 +53,9 @@ EXAMPLES = r"""
 """
 
 
+from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import TRUST_WINDOW_SPEC  # type: ignore
 from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishModuleBase  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import WRITE_MODE_SPEC  # type: ignore
 
 
 class ILOSecuritySettings(RedfishModuleBase):
@@ -65,6 +69,8 @@ class ILOSecuritySettings(RedfishModuleBase):
         )
         spec = dict()
         spec.update(super(ILOSecuritySettings, self).argument_spec())
+        spec.update(TRUST_WINDOW_SPEC)
+        spec.update(WRITE_MODE_SPEC)
         spec.update(additional_spec)
         return spec
 
@@ -72,21 +78,28 @@ class ILOSecuritySettings(RedfishModuleBase):
 
         before = dict()
         after = dict()
-        patches = dict()
 
-        current_data = self.api_client.get_request(ILOSecuritySettings.ENDPOINT)
-        self._security_state(current_data, patches, before, after)
+        def stage_changes(current_data):
+            # called again with fresh data if the settings changed since they were cached
+            before.clear()
+            after.clear()
+            self._security_state(current_data, before, after)
+
+        current_data, patches = self.api_client.write_resource(
+            ILOSecuritySettings.ENDPOINT, stage_changes, check_mode=self.module.check_mode
+        )
+        if patches:
+            self.result["patches"] = patches
 
         if not self.module.check_mode:
             if patches:
-                self.api_client.patch_request(ILOSecuritySettings.ENDPOINT, data=patches)
                 if self.module.params.get("wait_for_reset") > 0:
                     self.set_changes(before, after)
                     self.wait_for_ilo_reset(self.module.params.get("wait_for_reset"))
 
         self.set_changes(before, after)
 
-    def _security_state(self, current_data, patches, before, after):
+    def _security_state(self, current_data, before, after):
         if self.module.params.get("security_state"):
             current_val = current_data["SecurityState"]
             new_val = self.module.params.get("security_state")
@@ -95,10 +108,9 @@ class ILOSecuritySettings(RedfishModuleBase):
                     self.module.fail_json(
                         msg="Changing current value for security_state '{0}' is not supported.".format(current_val)
                     )
-                self.result["patches"] = patches
                 before["SecurityState"] = current_val
                 after["SecurityState"] = new_val
-                patches["SecurityState"] = new_val
+                self.api_client.stage_patch(ILOSecuritySettings.ENDPOINT, {"SecurityState": new_val})
                 return True
         return False
 
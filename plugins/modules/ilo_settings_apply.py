@@ -0,0 +1,138 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+DOCUMENTATION = r"""
+---
+module: ilo_settings_apply
+author:
+    - Janne K. Olesen (@jakrol)
+
+short_description: Apply pending settings with a single reset
+description:
+    - Applies all pending settings (i.e. staged by M(unbelievable.hpe.ilo_boot_order)) with a single reset.
+    - Pending settings are the values of the settings objects (@Redfish.Settings) which differ from the current
+      values of their resources.
+    - Waits until POST is finished and verifies that all pending settings are applied.
+    - Nothing is done if no settings are pending.
+version_added: 3.4.0
+
+options:
+    resources:
+        description:
+            - Resources with settings objects.
+        type: list
+        elements: str
+        required: no
+        default: ['Systems/1/Bios', 'Systems/1/Bios/boot']
+    reset_type:
+        description:
+            - ResetType of the reset if the server is on. A server which is off is powered on.
+        type: str
+        choices: ['GracefulRestart', 'ForceRestart']
+        required: no
+        default: GracefulRestart
+    wait_timeout:
+        description:
+            - Max seconds to wait for the settings to be applied.
+        type: int
+        required: no
+        default: 1200
+
+extends_documentation_fragment:
+    - unbelievable.hpe.redfish_api_client
+"""
+
+EXAMPLES = r"""
+- name: Set iLO boot order
+  unbelievable.hpe.ilo_boot_order:
+      patterns:
+        - RAID1 Logical Drive 1
+      hostname: '{{ inventory_hostname }}'
+      user: user
+      password: secret
+      delegate_to: localhost
+
+- name: Apply pending settings
+  unbelievable.hpe.ilo_settings_apply:
+      hostname: '{{ inventory_hostname }}'
+      user: user
+      password: secret
+      delegate_to: localhost
+"""
+
+RETURN = r"""
+pending:
+    description:
+        - Pending settings by resource.
+    returned: success
+    type: dict
+verification:
+    description:
+        - Result by resource.
+        - C(applied) is true if all pending settings are applied, C(not_applied) contains the values which are not.
+        - C(messages) are the C(@Redfish.Settings) messages of the resource.
+    returned: if settings were applied
+    type: dict
+"""
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishModuleBase  # type: ignore
+
+
+class ILOSettingsApply(RedfishModuleBase):
+    def argument_spec(self):
+        additional_spec = dict(
+            resources=dict(
+                type="list",
+                elements="str",
+                required=False,
+                default=["Systems/1/Bios", "Systems/1/Bios/boot"],
+            ),
+            reset_type=dict(
+                type="str",
+                choices=["GracefulRestart", "ForceRestart"],
+                required=False,
+                default="GracefulRestart",
+            ),
+            wait_timeout=dict(type="int", required=False, default=1200),
+        )
+        spec = dict()
+        spec.update(super(ILOSettingsApply, self).argument_spec())
+        spec.update(additional_spec)
+        return spec
+
+    def run(self):
+        pending, results = self.apply_pending_settings(
+            self.module.params.get("resources"),
+            self.module.params.get("reset_type"),
+            self.module.params.get("wait_timeout"),
+        )
+        self.result["pending"] = pending
+        self.set_changed(bool(pending))
+        if results is None:
+            return
+        self.result["verification"] = results
+        failed = sorted(r for r in results if not results[r]["applied"])
+        if failed:
+            self.module.fail_json(
+                msg="Settings of {0} not applied within {1} seconds".format(
+                    ", ".join(failed), self.module.params.get("wait_timeout")
+                ),
+                **self.result
+            )
+
+
+def main():
+    # just to keep ansibles sanity test 'validate_modules' happy
+    ILOSettingsApply().main()
+
+
+if __name__ == "__main__":
+    main()
@@ -52,6 +52,8 @@ options:
 
 extends_documentation_fragment:
     - unbelievable.hpe.redfish_api_client
+    - unbelievable.hpe.redfish_write_mode
+    - unbelievable.hpe.trust_window
 """
 
 EXAMPLES = r"""
@@ -65,7 +67,9 @@ EXAMPLES = r"""
 """
 
 
+from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import TRUST_WINDOW_SPEC  # type: ignore
 from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishModuleBase, ApiHelper  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import WRITE_MODE_SPEC  # type: ignore
 
 
 class ILOThermalSettings(RedfishModuleBase):
@@ -87,6 +91,8 @@ class ILOThermalSettings(RedfishModuleBase):
         )
         spec = dict()
         spec.update(super(ILOThermalSettings, self).argument_spec())
+        spec.update(TRUST_WINDOW_SPEC)
+        spec.update(WRITE_MODE_SPEC)
         spec.update(additional_spec)
         return spec
 
@@ -97,35 +103,43 @@ class ILOThermalSettings(RedfishModuleBase):
 
         before = dict()
         after = dict()
-        patches = dict()
+        staged = dict()
 
-        current_data = self.api_client.get_request(ILOThermalSettings.ENDPOINT)
-        termal_config = self._thermal_configuration(current_data, patches, before, after)
-        self._fan_percent_minimum(current_data, patches, before, after)
+        def stage_changes(current_data):
+            # called again with fresh data if the settings changed since they were cached
+            before.clear()
+            after.clear()
+            staged["thermal_configuration"] = self._thermal_configuration(current_data, before, after)
+            self._fan_percent_minimum(current_data, before, after)
+
+        current_data, patches = self.api_client.write_resource(
+            ILOThermalSettings.ENDPOINT, stage_changes, check_mode=self.module.check_mode
+        )
+        if patches:
+            self.result["patches"] = patches
 
         if not self.module.check_mode:
             if patches:
-                self.api_client.patch_request(ILOThermalSettings.ENDPOINT, data=patches)
-
-                if termal_config and self.module.params.get("wait_for_reset") > 0:
+                if staged["thermal_configuration"] and self.module.params.get("wait_for_reset") > 0:
                     self.set_changes(before, after)
                     self.wait_for_ilo_reset(self.module.params.get("wait_for_reset"))
 
         self.set_changes(before, after)
 
-    def _thermal_configuration(self, current_data, patches, before, after):
+    def _thermal_configuration(self, current_data, before, after):
         if self.module.params.get("thermal_configuration"):
             current_val = ApiHelper.get_recursive("Oem.Hpe.ThermalConfiguration", current_data)
             new_val = self.module.params.get("thermal_configuration")
             if new_val != current_val:
-                self.result["patches"] = patches
                 before["ThermalConfiguration"] = current_val
                 after["ThermalConfiguration"] = new_val
-                ApiHelper.setdefault_recursive("Oem.Hpe", patches)["ThermalConfiguration"] = new_val
+                self.api_client.stage_patch(
+                    ILOThermalSettings.ENDPOINT, {"Oem": {"Hpe": {"ThermalConfiguration": new_val}}}
+                )
                 return True
         return False
 
-    def _fan_percent_minimum(self, current_data, patches, before, after):
+    def _fan_percent_minimum(self, current_data, before, after):
         if self.module.params.get("fan_percent_minimum"):
             current_val = ApiHelper.get_recursive("Oem.Hpe.FanPercentMinimum", current_data)
             new_val = self.module.params.get("fan_percent_minimum")
@@ -134,10 +148,11 @@ class ILOThermalSettings(RedfishModuleBase):
                     msg="fan_percent_minimum must be between 0 and 100. Invalid value '{0}'.".format(new_val)
                 )
             if new_val != current_val:
-                self.result["patches"] = patches
                 before["FanPercentMinimum"] = current_val
                 after["FanPercentMinimum"] = new_val
-                ApiHelper.setdefault_recursive("Oem.Hpe", patches)["FanPercentMinimum"] = new_val
+                self.api_client.stage_patch(
+                    ILOThermalSettings.ENDPOINT, {"Oem": {"Hpe": {"FanPercentMinimum": new_val}}}
+                )
                 return True
         return False
 
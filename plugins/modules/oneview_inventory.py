@@ -47,6 +47,7 @@ options:
 
 extends_documentation_fragment:
     - unbelievable.hpe.oneview_api_client
+    - unbelievable.hpe.oneview_server_filter
 """
 
 EXAMPLES = r"""
@@ -104,7 +105,12 @@ inventory:
 
 """
 
-from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import OneviewModuleBase, OneViewInventoryBuilder  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import (  # type: ignore # noqa: E501
+    SERVER_FILTER_SPEC,
+    OneviewModuleBase,
+    OneViewInventoryBuilder,
+    ServerHardwareFilter,
+)
 from ansible_collections.unbelievable.hpe.plugins.module_utils.inventory import DictInventory  # type: ignore
 
 
@@ -116,6 +122,9 @@ class OneViewInventory(OneviewModuleBase):
         self.oneview_inventory_builder.set_hostname_short(self.module.params.get("hostname_short"))
         if self.module.params.get("add_domain"):
             self.oneview_inventory_builder.set_add_domain(self.module.params.get("add_domain"))
+        self.oneview_inventory_builder.set_server_filter(
+            ServerHardwareFilter.from_params(self.module.params.get("server_filter"))
+        )
 
     def run(self):
         self.oneview_inventory_builder.populate()
@@ -132,6 +141,7 @@ class OneViewInventory(OneviewModuleBase):
             hostname_short=dict(type="bool", required=False, default=True),
             add_domain=dict(type="str", required=False),
             add_vars=dict(type="dict", required=False),
+            server_filter=SERVER_FILTER_SPEC,
         )
         spec = dict()
         spec.update(super(OneViewInventory, self).argument_spec())
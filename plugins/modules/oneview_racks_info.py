@@ -54,6 +54,7 @@ options:
               rs_mpHostName=takes mkHostInfo.mpHostName if exists else mpDnsName.
               rs_mpIpAddress4=first IPv4 address from mpHostInfo.mpIpAddresses with type = static.
               rs_mpIpAddress6=first IPv6 address from mpHostInfo.mpIpAddresses with type = static"
+            - "Nested fields can be given as path, separated by '/'. Example: C(mpHostInfo/mpHostName)."
         type: list
         elements: str
         default: [
@@ -154,25 +155,25 @@ class OneViewRacksInfo(OneviewModuleBase):
             self.api_client.logout()
 
     def _process_racks(self, racks_raw):
-        # to satisfy ansible tests
-        import requests
-
+        extract_rack = ApiHelper.compile_entries(self.rack_entry_fields)
+        extract_rackmount = ApiHelper.compile_entries(self.rackmount_entry_fields)
+        extract_hwinfo = ApiHelper.compile_entries(self.hwinfo_entry_fields or [])
+        hwinfos = {}
+        if self.hwinfo_entry_fields:
+            # mounted resources are fetched in batches instead of one request per mount, missing ones are ignored
+            hwinfos = self.api_client.get_resources(
+                [m["mountUri"] for r in racks_raw for m in r.get("rackMounts", []) if m["mountUri"]]
+            )
         racks = []
         for r in racks_raw:
             rack = {"rackMounts": []}
             racks.append(rack)
-            rack.update(ApiHelper.copy_entries(r, self.rack_entry_fields))
+            rack.update(extract_rack(r))
             for m in r.get("rackMounts", []):
-                mount = {}
+                mount = extract_rackmount(m)
                 rack["rackMounts"].append(mount)
-                mount.update(ApiHelper.copy_entries(m, self.rackmount_entry_fields))
-                if m["mountUri"] and self.hwinfo_entry_fields:
-                    try:
-                        hwinfo = self.api_client.get_request(m["mountUri"])
-                        mount.update(ApiHelper.copy_entries(hwinfo, self.hwinfo_entry_fields))
-                    except requests.HTTPError as e:
-                        if e.response.status_code != 404:
-                            raise e
+                if m["mountUri"] in hwinfos:
+                    mount.update(extract_hwinfo(hwinfos[m["mountUri"]]))
         return racks
 
 
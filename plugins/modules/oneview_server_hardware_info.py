@@ -27,6 +27,7 @@ options:
               rs_mpHostName=takes mkHostInfo.mpHostName if exists else mpDnsName.
               rs_mpIpAddress4=first IPv4 address from mpHostInfo.mpIpAddresses with type = static.
               rs_mpIpAddress6=first IPv6 address from mpHostInfo.mpIpAddresses with type = static"
+            - "Nested fields can be given as path, separated by '/'. Example: C(mpHostInfo/mpHostName)."
         type: list
         elements: str
         default: [
@@ -61,6 +62,7 @@ options:
 
 extends_documentation_fragment:
     - unbelievable.hpe.oneview_api_client
+    - unbelievable.hpe.oneview_server_filter
 """
 
 EXAMPLES = r"""
@@ -70,6 +72,16 @@ EXAMPLES = r"""
     username: user
     password: secret
   register: servers
+
+- name: Get powered on DL360 Gen10 servers
+  unbelievable.oneview_server_hardware_info:
+    hostname: https://oneview.server.domain
+    username: user
+    password: secret
+    server_filter:
+      models: ["DL360 Gen10"]
+      power_states: ["On"]
+  register: servers
 """
 
 RETURN = r"""
@@ -83,7 +95,13 @@ servers:
 """
 
 
-from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import OneviewModuleBase, ApiHelper  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import (  # type: ignore # noqa: E501
+    SERVER_FILTER_SPEC,
+    ApiHelper,
+    OneviewModuleBase,
+    ServerHardwareFilter,
+)
+from ansible_collections.unbelievable.hpe.plugins.module_utils.records import RackMountRecord  # type: ignore # noqa: E501
 
 
 class OneViewServerHardwareInfo(OneviewModuleBase):
@@ -114,6 +132,7 @@ class OneViewServerHardwareInfo(OneviewModuleBase):
             ),
             rack_info=dict(type="bool", required=False, default=True),
             filter=dict(type="str", required=False),
+            server_filter=SERVER_FILTER_SPEC,
         )
         spec = dict()
         spec.update(super(OneViewServerHardwareInfo, self).argument_spec())
@@ -123,11 +142,13 @@ class OneViewServerHardwareInfo(OneviewModuleBase):
     def init(self):
         self.rack_info = self.module.params.get("rack_info")
         self.hwinfo_entry_fields = self.module.params.get("hwinfo_entry_fields")
+        self.filter = self.module.params.get("filter")
+        self.server_filter = ServerHardwareFilter.from_params(self.module.params.get("server_filter"))
 
     def run(self):
         try:
             self.api_client.login()
-            servers_raw = self.api_client.list_server_hardware()
+            servers_raw = self.api_client.iter_server_hardware(self.filter, server_filter=self.server_filter)
             servers = self._process_servers(servers_raw)
             self.result["servers"] = servers if servers else []
         finally:
@@ -137,27 +158,26 @@ class OneViewServerHardwareInfo(OneviewModuleBase):
         racksinfo = {}
         if self.rack_info:
             racksinfo.update(self._prepare_rackinfo())
+        extract = ApiHelper.compile_entries(self.hwinfo_entry_fields)
         servers = []
         for s in servers_raw:
-            server = {}
+            server = extract(s)
             servers.append(server)
-            server.update(ApiHelper.copy_entries(s, self.hwinfo_entry_fields))
             id = server.get("uuid", None)
             if id in racksinfo:
-                server["rackInfo"] = racksinfo[id]
+                server["rackInfo"] = racksinfo[id].to_dict()
         return servers
 
     def _prepare_rackinfo(self):
         racks_raw = self.api_client.list_racks()
         rackinfo = {}
-        rack_fields = ["name", "id", "model", "partNumber", "serialNumber"]
-        rackmount_fields = ["topUSlot", "uHeight"]
+        extract = ApiHelper.compile_entries(["name", "id", "model", "partNumber", "serialNumber"])
         for r in racks_raw:
-            info = ApiHelper.copy_entries(r, rack_fields)
+            # shared by all mounts of the rack
+            info = extract(r)
             for m in r.get("rackMounts", []):
                 id = m["mountUri"].split("/")[-1]
-                rackinfo[id] = ApiHelper.copy_entries(m, rackmount_fields)
-                rackinfo[id].update(info)
+                rackinfo[id] = RackMountRecord(topUSlot=m.get("topUSlot"), uHeight=m.get("uHeight"), rack=info)
         return rackinfo
 
 
@@ -23,19 +23,55 @@ options:
 
     profile_name:
         description:
-            - Profile name. Either profile_name or profile_uuid must be set.
+            - Profile name.
+            - One of profile_name, profile_uuid, profile_names, profile_uuids or profile_filter must be set.
         required: no
         type: str
 
     profile_uuid:
         description:
-            - Profile uuid. Either profile_name or profile_uuid must be set.
+            - Profile uuid.
+            - One of profile_name, profile_uuid, profile_names, profile_uuids or profile_filter must be set.
         required: no
         type: str
 
+    profile_names:
+        description:
+            - Bulk mode, make all profiles with these names compliant.
+            - Per profile outcomes are returned in C(profiles).
+        required: no
+        type: list
+        elements: str
+        version_added: 3.4.0
+
+    profile_uuids:
+        description:
+            - Bulk mode, make all profiles with these uuids compliant.
+        required: no
+        type: list
+        elements: str
+        version_added: 3.4.0
+
+    profile_filter:
+        description:
+            - Bulk mode, make all profiles matching this OneView filter expression compliant.
+            - i.e. C(templateCompliance = 'NonCompliant')
+        required: no
+        type: str
+        version_added: 3.4.0
+
+    max_concurrency:
+        description:
+            - Bulk mode, max number of concurrent update requests.
+        required: no
+        type: int
+        default: 8
+        version_added: 3.4.0
+
     wait_timeout:
         description:
             - Max seconds to wait for profile becomes compliant.
+            - In bulk mode the max seconds to wait for all profiles.
             - 0 not wait at all.
         type: int
         required: no
@@ -53,13 +89,23 @@ EXAMPLES = r"""
     password: secret
     profile_name: myprofile
   register: result
+
+- name: Make all non compliant profiles compliant
+  unbelievable.oneview_server_profile_compliant:
+    hostname: https://oneview.server.domain
+    username: user
+    password: secret
+    profile_filter: "templateCompliance = 'NonCompliant'"
+    max_concurrency: 16
+    wait_timeout: 1800
+  register: result
 """
 
 RETURN = r"""
 profile_uuid:
     description:
         - Profile uuid used.
-    returned: aways
+    returned: if profile_name or profile_uuid is set
     type: str
 task_id:
     description:
@@ -76,17 +122,45 @@ compliance_preview:
         - OneView compliance preview.
     returned: if changed and failed.
     type: dict
+profiles:
+    description:
+        - Bulk mode, outcome per profile.
+        - C(task_state) and C(task_status) of the update task, C(compliance_preview) only for failed updates.
+        - C(msg) if the update request failed.
+    returned: if profile_names, profile_uuids or profile_filter is set
+    type: list
+    elements: dict
+    sample:
+        - name: profile-1
+          uuid: 9b8f7ec0-52b3-475e-84f4-c4eaaa4b2f03
+          templateCompliance: NonCompliant
+          changed: true
+          failed: false
+          task_id: 2d6f1d2c-3f63-4b27-a5cc-4b2f1c7a1f02
+          task_state: Completed
+          task_status: Completed
 """
 
 
-from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import OneviewModuleBase, ApiHelper  # type: ignore # noqa: E501
+from collections import OrderedDict
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import concurrent_map  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import OneviewModuleBase  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.records import ProfileSummary  # type: ignore # noqa: E501
 
 
 class OneViewServerProfileCompliant(OneviewModuleBase):
+    SINGLE_OPTIONS = ["profile_name", "profile_uuid"]
+    BULK_OPTIONS = ["profile_names", "profile_uuids", "profile_filter"]
+
     def argument_spec(self):
         additional_spec = dict(
             profile_name=(dict(type="str", required=False)),
             profile_uuid=(dict(type="str", required=False)),
+            profile_names=dict(type="list", elements="str", required=False),
+            profile_uuids=dict(type="list", elements="str", required=False),
+            profile_filter=dict(type="str", required=False),
+            max_concurrency=dict(type="int", required=False, default=8),
             wait_timeout=dict(type="int", required=False, default=120),
         )
         spec = dict()
@@ -95,35 +169,75 @@ class OneViewServerProfileCompliant(OneviewModuleBase):
         return spec
 
     def module_def_extras(self):
-        return dict(required_one_of=[["profile_name", "profile_uuid"]])
+        return dict(
+            required_one_of=[OneViewServerProfileCompliant.SINGLE_OPTIONS + OneViewServerProfileCompliant.BULK_OPTIONS],
+            mutually_exclusive=[
+                [single, bulk]
+                for single in OneViewServerProfileCompliant.SINGLE_OPTIONS
+                for bulk in OneViewServerProfileCompliant.BULK_OPTIONS
+            ],
+        )
 
     def run(self):
         try:
             self.api_client.login()
-            profile = self.get_profile()
-            profile_uuid = ApiHelper.ServerProfile.get_profile_uuid(profile)
+            if any(self.module.params.get(o) for o in OneViewServerProfileCompliant.BULK_OPTIONS):
+                self.run_bulk()
+            else:
+                self.run_single()
+        finally:
+            self.api_client.logout()
 
-            self.result["profile_uuid"] = profile_uuid
-            status_before = profile["templateCompliance"]
+    def run_single(self):
+        profile = self.get_profile()
+        profile_uuid = profile.uuid
 
-            before = dict()
-            before["templateCompliance"] = status_before
+        self.result["profile_uuid"] = profile_uuid
+        status_before = profile.templateCompliance
 
-            after = dict()
-            after["templateCompliance"] = "Compliant"
+        before = dict()
+        before["templateCompliance"] = status_before
 
-            self.set_changes(before, after)
+        after = dict()
+        after["templateCompliance"] = "Compliant"
 
-            if not self.module.check_mode and status_before != "Compliant":
-                resp_headers = self.api_client.server_profile_update(profile_uuid).headers
-                self.process_task(profile_uuid, resp_headers["location"].split("/")[-1])
+        self.set_changes(before, after)
 
-        finally:
-            self.api_client.logout()
+        if not self.module.check_mode and status_before != "Compliant":
+            resp_headers = self.api_client.server_profile_update(profile_uuid).headers
+            self.process_task(profile_uuid, resp_headers["location"].split("/")[-1])
+
+    def run_bulk(self):
+        profiles = self.get_profiles()
+        self.set_changes(
+            dict((p.name, p.templateCompliance) for p in profiles),
+            dict((p.name, "Compliant") for p in profiles),
+        )
+        outcomes = [
+            dict(
+                name=p.name,
+                uuid=p.uuid,
+                templateCompliance=p.templateCompliance,
+                changed=p.templateCompliance != "Compliant",
+                failed=False,
+            )
+            for p in profiles
+        ]
+        self.result["profiles"] = outcomes
+        if not self.module.check_mode:
+            self.update_profiles([o for o in outcomes if o["changed"]])
+        failed = [o for o in outcomes if o["failed"]]
+        if failed:
+            self.module.fail_json(
+                msg="{0} of {1} server profiles failed to become compliant".format(len(failed), len(outcomes)),
+                **self.result
+            )
 
     def get_profile(self):
-        if self.module.params.get("profile_id"):
-            return self.api_client.get_server_profile(self.module.params.get("profile_id"))
+        if self.module.params.get("profile_uuid"):
+            return ProfileSummary.from_profile(
+                self.api_client.get_server_profile(self.module.params.get("profile_uuid"))
+            )
         else:
             profiles = self.api_client.list_server_profiles(
                 "'name' = '{0}'".format(self.module.params.get("profile_name"))
@@ -132,7 +246,80 @@ class OneViewServerProfileCompliant(OneviewModuleBase):
                 self.module.fail_json(msg="Server profile  not found")
             if len(profiles) > 1:
                 self.module.fail_json(msg="Multiple server profiles found")
-            return profiles[0]
+            return ProfileSummary.from_profile(profiles[0])
+
+    def get_profiles(self):
+        """Profiles selected by profile_names, profile_uuids and profile_filter, each profile once"""
+        profiles = OrderedDict()
+        if self.module.params.get("profile_filter"):
+            for p in self.api_client.list_server_profiles(self.module.params.get("profile_filter")):
+                profiles[p["uri"]] = p
+        names = self.module.params.get("profile_names") or []
+        uuids = self.module.params.get("profile_uuids") or []
+        if self.api_client.has_feature("index_search"):
+            uris = self.resolve_names(names)
+        else:
+            uris = []
+            for start in range(0, len(names), 50):
+                batch = names[start:start + 50]  # fmt: skip
+                for p in self.api_client.list_server_profiles(" OR ".join("name = '{0}'".format(n) for n in batch)):
+                    profiles[p["uri"]] = p
+        # full documents, the index does not necessarily hold templateCompliance
+        found = self.api_client.get_resources(uris + ["/rest/server-profiles/" + u for u in uuids])
+        profiles.update(found)
+        missing = set(names) - set(p.get("name") for p in profiles.values())
+        missing.update(u for u in uuids if "/rest/server-profiles/" + u not in found)
+        if missing:
+            self.module.fail_json(msg="Server profiles not found: {0}".format(", ".join(sorted(missing))))
+        return [ProfileSummary.from_profile(p) for p in profiles.values()]
+
+    def resolve_names(self, names):
+        """Uris of the profiles with names, by one index search per batch of names"""
+        uris = []
+        for start in range(0, len(names), 50):
+            batch = names[start:start + 50]  # fmt: skip
+            resources = self.api_client.index_search(
+                category="server-profiles",
+                filter=" OR ".join("name = '{0}'".format(n) for n in batch),
+                fields=["uri"],
+            )
+            uris += [r["uri"] for r in resources]
+        return uris
+
+    def update_profiles(self, outcomes):
+        """Start updates with bounded concurrency, wait for all tasks together, get previews of failed updates only"""
+        results = concurrent_map(
+            lambda o: self.api_client.server_profile_update(o["uuid"]).headers["location"].split("/")[-1],
+            outcomes,
+            max_workers=self.module.params.get("max_concurrency"),
+        )
+        started = []
+        for outcome, (task_id, error) in zip(outcomes, results):
+            if error is not None:
+                outcome["failed"] = True
+                outcome["msg"] = str(error)
+            else:
+                outcome["task_id"] = task_id
+                started.append(outcome)
+
+        timeout = self.module.params.get("wait_timeout")
+        if timeout <= 0 or not started:
+            return
+        tasks = self.api_client.wait_for_tasks([o["task_id"] for o in started], seconds_to_wait=timeout)
+        for outcome in started:
+            task = tasks[outcome["task_id"]] or {"taskState": "Unknown"}
+            outcome["task_state"] = task["taskState"]
+            outcome["task_status"] = task.get("taskStatus")
+            outcome["failed"] = task["taskState"] != "Completed"
+
+        failed = [o for o in started if o["failed"]]
+        previews = concurrent_map(
+            lambda o: self.api_client.get_server_profile_compliant_preview(o["uuid"]),
+            failed,
+            max_workers=self.module.params.get("max_concurrency"),
+        )
+        for outcome, (preview, error) in zip(failed, previews):
+            outcome["compliance_preview"] = preview
 
     def process_task(self, profile_id, task_id):
         self.result["task_id"] = task_id
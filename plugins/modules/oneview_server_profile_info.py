@@ -75,12 +75,10 @@ class OneViewServerProfileInfo(OneviewModuleBase):
             self.api_client.logout()
 
     def process_server_profiles(self, raw):
-        profiles = []
+        # raw profiles are not used otherwise, they are extended in place instead of copied
         for r in raw:
-            p = r.copy()
-            p["_profile_uuid"] = ApiHelper.ServerProfile.get_profile_uuid(r)
-            profiles.append(p)
-        return profiles
+            r["_profile_uuid"] = ApiHelper.ServerProfile.get_profile_uuid(r)
+        return raw
 
 
 def main():
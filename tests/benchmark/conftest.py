@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import sys
+import threading
+
+import pytest
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cassette import Cassette, ReplayTransport  # type: ignore # noqa: E501
+
+DEV_TOOLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "dev_tools")
+MOCK_LATENCY = 0.005
+
+MODELS = [("DL360 Gen10", "iLO5"), ("DL380 Gen10", "iLO5"), ("DL360 Gen9", "iLO4"), ("DL380 Gen10 Plus", "iLO5")]
+
+
+def server_hardware_document(i):
+    short_model, mp_model = MODELS[i % len(MODELS)]
+    return {
+        "type": "server-hardware-12",
+        "uri": "/rest/server-hardware/{0:08d}".format(i),
+        "uuid": "{0:08d}".format(i),
+        "name": "enc{0} bay {1}".format(i // 16, i % 16),
+        "serverName": "server{0:05d}.domain".format(i),
+        "shortModel": short_model,
+        "mpModel": mp_model,
+        "mpFirmwareVersion": "2.72 Sep 04 2022",
+        "formFactor": "1U",
+        "memoryMb": 262144,
+        "processorCount": 2,
+        "processorCoreCount": 24,
+        "processorType": "Intel(R) Xeon(R) Gold 6248 CPU @ 2.50GHz",
+        "partNumber": "P19766-B21",
+        "serialNumber": "CZ{0:08d}".format(i),
+        "romVersion": "U32 v2.72 (09/29/2022)",
+        "powerState": "On",
+        "status": "OK",
+        "modified": "2022-09-01T00:00:00.000Z",
+        "eTag": "2022-09-01T00:00:00.000Z",
+        "mpHostInfo": {
+            "mpHostName": "ilo{0:05d}.domain".format(i),
+            "mpIpAddresses": [
+                {"address": "fe80::{0:x}".format(i), "type": "LinkLocal"},
+                {"address": "10.{0}.{1}.{2}".format(i // 65536, (i // 256) % 256, i % 256), "type": "Static"},
+                {"address": "2001:db8::{0:x}".format(i), "type": "Static"},
+            ],
+        },
+    }
+
+
+@pytest.fixture(scope="session")
+def server_hardware():
+    """50k OneView server-hardware documents"""
+    return [server_hardware_document(i) for i in range(50000)]
+
+
+def cassette_entry(url, body):
+    return dict(
+        method="GET",
+        url=url,
+        request=None,
+        status=200,
+        headers={"Content-Type": "application/json"},
+        body=body,
+        elapsed=0,
+    )
+
+
+@pytest.fixture(scope="session")
+def oneview_mock(server_hardware):
+    """Replay transport serving /rest/server-hardware in pages of 500 members"""
+    entries = []
+    page_size = 500
+    for start in range(0, len(server_hardware), page_size):
+        url = (
+            "/rest/server-hardware"
+            if start == 0
+            else "/rest/server-hardware?start={0}&count={1}".format(start, page_size)
+        )
+        body = {"members": server_hardware[start:start + page_size]}  # fmt: skip
+        if start + page_size < len(server_hardware):
+            body["nextPageUri"] = "/rest/server-hardware?start={0}&count={1}".format(start + page_size, page_size)
+        entries.append(cassette_entry(url, body))
+    return ReplayTransport(Cassette(entries=entries))
+
+
+@pytest.fixture(scope="session")
+def imc_mock():
+    """Replay transport serving 10k devices of /imcrs/plat/res/device in pages of 100 devices"""
+    entries = []
+    size = 100
+    total = 10000
+    for start in range(0, total, size):
+        url = (
+            "/imcrs/plat/res/device?size=100"
+            if start == 0
+            else "/imcrs/plat/res/device?start={0}&size={1}".format(start, size)
+        )
+        body = {"device": [{"id": str(i), "label": "switch{0:05d}".format(i)} for i in range(start, start + size)]}
+        if start + size < total:
+            body["link"] = {
+                "@op": "GET",
+                "@rel": "next",
+                "@href": "http://imc/imcrs/plat/res/device?start={0}&size={1}".format(start + size, size),
+            }
+        entries.append(cassette_entry(url, body))
+    return ReplayTransport(Cassette(entries=entries))
+
+
+@pytest.fixture(scope="session")
+def mock_ilo():
+    """Port of dev_tools/mock_ilo.py serving a fleet of 500 servers, every request takes MOCK_LATENCY seconds"""
+    pytest.importorskip("flask")
+    serving = pytest.importorskip("werkzeug.serving")
+    sys.path.insert(0, DEV_TOOLS)
+    try:
+        import mock_ilo
+    finally:
+        sys.path.remove(DEV_TOOLS)
+    mock_ilo.fleet = mock_ilo.Fleet(500)
+    mock_ilo.faults = mock_ilo.FaultInjector(latency=MOCK_LATENCY)
+    server = serving.make_server("127.0.0.1", 0, mock_ilo.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server.server_port
+    server.shutdown()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from mock import MagicMock
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.imc import ImcApiClient  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.inventory import DictInventory  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import (  # type: ignore # noqa: E501
+    ApiHelper,
+    OneViewApiClient,
+    OneViewInventoryBuilder,
+)
+from ansible_collections.unbelievable.hpe.plugins.modules.ilo_boot_order import ILOBootOrder  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.modules.ilo_smartstorage_raids import IloSmartStorageRaids  # type: ignore # noqa: E501
+
+HWINFO_ENTRY_FIELDS = [
+    "formFactor",
+    "memoryMb",
+    "mpFirmwareVersion",
+    "rs_mpHostName",
+    "rs_mpIpAddress4",
+    "mpModel",
+    "name",
+    "partNumber",
+    "processorCoreCount",
+    "processorCount",
+    "processorType",
+    "romVersion",
+    "serialNumber",
+    "serverName",
+    "shortModel",
+    "uuid",
+]
+
+
+def test_inventory_builder_populate(benchmark, server_hardware):
+    api_client = MagicMock()
+    api_client.iter_server_hardware = MagicMock(side_effect=lambda filter=None, **kwargs: iter(server_hardware))
+
+    def populate():
+        inventory = DictInventory()
+        builder = OneViewInventoryBuilder(api_client, inventory)
+        builder.set_hostname_short(True)
+        builder.set_add_domain(None)
+        builder._populate()
+        return inventory
+
+    inventory = benchmark(populate)
+    assert 50000 == len(inventory.get_inventory()["hosts"])
+
+
+def test_dict_inventory(benchmark):
+    def build():
+        inventory = DictInventory()
+        inventory.add_group("all_hosts")
+        for i in range(50000):
+            host = "host{0}".format(i)
+            group = "group{0}".format(i // 10)
+            inventory.add_group(group)
+            inventory.add_child_group("all_hosts", group)
+            inventory.add_host(host, variables={}, group=group)
+            inventory.add_host_to_group("all_hosts", host)
+            inventory.add_host_to_group(group, host)
+        return inventory.get_inventory()
+
+    inventory = benchmark(build)
+    assert 50000 == len(inventory["hosts"])
+    assert 5000 == len(inventory["groups"]["all_hosts"]["children"])
+
+
+def test_copy_entries(benchmark, server_hardware):
+    def copy_entries():
+        return [ApiHelper.copy_entries(s, HWINFO_ENTRY_FIELDS) for s in server_hardware]
+
+    servers = benchmark(copy_entries)
+    assert "10.0.0.1" == servers[1]["rs_mpIpAddress4"]
+
+
+def test_compute_new_order(benchmark):
+    boot_sources = [
+        {"BootString": "Boot source {0} : device {1}".format(i, i * 7), "StructuredBootString": "BS.{0}".format(i)}
+        for i in range(400)
+    ]
+    patterns = [".*Boot source {0} :.*".format(i) for i in range(399, 0, -2)]
+
+    def setup():
+        return (list(boot_sources), patterns), {}
+
+    new_order = benchmark.pedantic(ILOBootOrder.compute_new_order, setup=setup, rounds=20)
+    assert "BS.399" == new_order[0]
+
+
+def test_find_disks_for_raid(benchmark):
+    disks = [
+        {"CapacityGB": 960 if i % 3 else 1920, "Location": "1I:{0}:{1}".format(i // 100, i % 100), "MediaType": "SSD"}
+        for i in range(2000)
+    ]
+    raids = IloSmartStorageRaids()
+
+    raid_disks, remaining_disks = benchmark(
+        raids.find_disks_for_raid, disks, required_disks=600, min_size=1000, max_size=2000, media_type="SSD"
+    )
+    assert 600 == len(raid_disks)
+    assert 1400 == len(remaining_disks)
+
+
+def test_collect_members(benchmark, oneview_mock):
+    api_client = OneViewApiClient("https", "oneview", 443, "user", "password")
+    api_client.transport = oneview_mock
+
+    members = benchmark(api_client._collect_members, "/server-hardware")
+    assert 50000 == len(members)
+
+
+def test_collect_content(benchmark, imc_mock):
+    api_client = ImcApiClient("https", "imc", 443, "user", "password")
+    api_client.transport = imc_mock
+
+    devices = benchmark(api_client.list_devices)
+    assert 10000 == len(devices)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import pytest
+import subprocess
+import sys
+
+COLLECTION = "ansible_collections.unbelievable.hpe"
+PLUGINS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "plugins")
+
+
+def python_modules(plugin_type):
+    names = sorted(os.listdir(os.path.join(PLUGINS_DIR, plugin_type)))
+    return [
+        "{0}.plugins.{1}.{2}".format(COLLECTION, plugin_type, n[:-3])
+        for n in names
+        if n.endswith(".py") and n != "__init__.py"
+    ]
+
+
+def import_time(module):
+    """Import module in a fresh interpreter ('python -X importtime')
+
+    Returns:
+        tuple: (cumulative import time of module in microseconds, modules loaded)
+    """
+    code = "import sys, {0}; print(' '.join(sys.modules))".format(module)
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    cumulative = None
+    for line in p.stderr.splitlines():
+        parts = [s.strip() for s in line.partition(":")[2].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative = int(parts[1])
+    return cumulative, p.stdout.split()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="requires python -X importtime")
+@pytest.mark.parametrize("module", python_modules("module_utils") + python_modules("modules"))
+def test_import_time(benchmark, module):
+    cumulative, loaded = benchmark.pedantic(import_time, args=(module,), rounds=3)
+    benchmark.extra_info["cumulative_import_us"] = cumulative
+    # heavy network libraries are imported on first use only
+    assert "requests" not in loaded
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import tracemalloc
+
+from mock import MagicMock
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.inventory import DictInventory  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import (  # type: ignore # noqa: E501
+    OneViewApiClient,
+    OneViewInventoryBuilder,
+)
+from ansible_collections.unbelievable.hpe.plugins.modules.oneview_server_hardware_info import OneViewServerHardwareInfo  # type: ignore # noqa: E501
+
+MB = 1024 * 1024
+
+
+def peak_memory(fn):
+    """Run fn, returns its result and the peak of memory allocated while running it"""
+    tracemalloc.start()
+    try:
+        result = fn()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(benchmark, fn, max_peak):
+    """Benchmark a single run of fn and report its peak memory (extra_info 'peak_mb')"""
+    result, peak = benchmark.pedantic(peak_memory, args=(fn,), rounds=1, iterations=1)
+    benchmark.extra_info["peak_mb"] = round(float(peak) / MB, 1)
+    assert peak < max_peak, "peak memory {0:.1f} MB".format(float(peak) / MB)
+    return result
+
+
+def test_inventory_builder_memory(benchmark, oneview_mock):
+    """Build a 50k hosts inventory, pages are replayed (decoded) like responses of an appliance"""
+    api_client = OneViewApiClient("https", "oneview", 443, "user", "password")
+    api_client.transport = oneview_mock
+
+    def populate():
+        inventory = DictInventory()
+        OneViewInventoryBuilder(api_client, inventory)._populate()
+        return inventory.get_inventory()
+
+    inventory = measure(benchmark, populate, 70 * MB)
+    assert 50000 == len(inventory["hosts"])
+
+
+def test_server_hardware_rack_info_memory(benchmark):
+    """Rack placement of 50k servers in 1250 racks"""
+    racks = [
+        {
+            "name": "rack{0}".format(r),
+            "id": str(r),
+            "model": "42U 600mm x 1075mm Enterprise Shock Rack",
+            "partNumber": "P9K10A",
+            "serialNumber": "SN{0:08d}".format(r),
+            "rackMounts": [
+                {"mountUri": "/rest/server-hardware/{0:08d}".format(r * 40 + m), "topUSlot": m + 1, "uHeight": 1}
+                for m in range(40)
+            ],
+        }
+        for r in range(1250)
+    ]
+    module = OneViewServerHardwareInfo()
+    module.api_client = MagicMock()
+    module.api_client.list_racks = MagicMock(return_value=racks)
+
+    rackinfo = measure(benchmark, module._prepare_rackinfo, 12 * MB)
+    assert 50000 == len(rackinfo)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import re
+import time
+
+import pytest
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cassette import CassetteResponse  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import OneViewApiClient  # type: ignore # noqa: E501
+
+from conftest import cassette_entry, server_hardware_document
+
+LATENCY = 0.002
+MOUNTS = 400
+PROFILE_NAMES = ["profile-server{0:05d}.mock".format(i) for i in range(2, 102, 2)]
+
+
+class LatencyTransport(object):
+    """Serve server hardware by uri and as list filtered by uri, every request takes LATENCY seconds"""
+
+    def __init__(self, servers):
+        self.servers = dict((s["uri"], s) for s in servers)
+
+    def request(self, method, url, **kwargs):
+        time.sleep(LATENCY)
+        path = "/" + url.partition("://")[2].partition("/")[2]
+        if "?" in path:
+            uris = re.findall(r"uri%20=%20'([^']+)'", path)
+            body = {"members": [self.servers[u] for u in uris if u in self.servers]}
+        else:
+            body = self.servers[path]
+        return CassetteResponse(cassette_entry(path, body))
+
+
+@pytest.fixture(scope="module")
+def api_client():
+    servers = [server_hardware_document(i) for i in range(MOUNTS)]
+    client = OneViewApiClient("https", "oneview", 443, "user", "password")
+    client.transport = LatencyTransport(servers)
+    return client, [s["uri"] for s in servers]
+
+
+def test_rack_mounts_per_uri(benchmark, api_client):
+    """Former oneview_racks_info: one GET per rack mount"""
+    client, uris = api_client
+
+    resources = benchmark.pedantic(lambda: [client.get_request(u) for u in uris], rounds=3)
+    assert MOUNTS == len(resources)
+
+
+def test_rack_mounts_batched(benchmark, api_client):
+    """oneview_racks_info: rack mounts resolved by OneViewApiClient.get_resources"""
+    client, uris = api_client
+
+    resources = benchmark.pedantic(client.get_resources, args=(uris,), rounds=3)
+    assert MOUNTS == len(resources)
+
+
+@pytest.fixture(scope="module")
+def mock_api_client(mock_ilo):
+    client = OneViewApiClient("http", "127.0.0.1", mock_ilo, "user", "password")
+    client.login()
+    yield client
+    client.logout()
+
+
+def names_filter(names):
+    return " OR ".join("name = '{0}'".format(n) for n in names)
+
+
+def test_profile_names_list(benchmark, mock_api_client):
+    """oneview_server_profile_compliant without index search: full profiles filtered by name (mock_ilo.py)"""
+    profiles = benchmark.pedantic(mock_api_client.list_server_profiles, args=(names_filter(PROFILE_NAMES),), rounds=3)
+    assert len(PROFILE_NAMES) == len(profiles)
+
+
+def test_profile_names_index(benchmark, mock_api_client):
+    """oneview_server_profile_compliant: names resolved to uris by index search (mock_ilo.py)"""
+
+    def resolve():
+        resources = mock_api_client.index_search(
+            category="server-profiles", filter=names_filter(PROFILE_NAMES), fields=["uri"]
+        )
+        return [r["uri"] for r in resources]
+
+    uris = benchmark.pedantic(resolve, rounds=3)
+    assert len(PROFILE_NAMES) == len(uris)
@@ -9,6 +9,19 @@ __metaclass__ = type
 import sys
 import pytest
 
+from ansible.utils.collection_loader import AnsibleCollectionConfig
+
+if AnsibleCollectionConfig.collection_finder is None:
+    # plain pytest with the collections root in PYTHONPATH (ansible-test installs the collection loader itself),
+    # so plugins can be loaded by name, i.e. by inventory_loader
+    try:
+        from ansible.plugins.loader import init_plugin_loader
+    except ImportError:
+        # ansible < 2.15
+        pass
+    else:
+        init_plugin_loader()
+
 
 @pytest.fixture(autouse=True)
 def skip_python():
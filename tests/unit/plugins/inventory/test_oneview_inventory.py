@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from mock import MagicMock, patch
+
+from ansible.errors import AnsibleParserError
+from ansible.inventory.data import InventoryData
+from ansible.parsing.dataloader import DataLoader
+from ansible.plugins.loader import inventory_loader
+from ansible.utils.display import Display
+
+from ansible_collections.unbelievable.hpe.plugins.inventory import oneview  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils import cache  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cache import JsonFile  # type: ignore
+
+
+def server_hardware(i, modified="2022-01-01T00:00:00.000Z"):
+    return {
+        "uri": "/rest/server-hardware/{0}".format(i),
+        "modified": modified,
+        "shortModel": "DL360 Gen10",
+        "mpModel": "iLO5",
+        "mpHostInfo": {
+            "mpHostName": "host{0}.domain".format(i),
+            "mpIpAddresses": [{"type": "Static", "address": "10.0.0.{0}".format(i)}],
+        },
+    }
+
+
+class OneViewInventoryTestCase(unittest.TestCase):
+    """Runs the inventory plugin like ansible-inventory does, OneViewApiClient is replaced by mocks"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.hosts = [server_hardware(1), server_hardware(2)]
+        self.api_clients = []
+        # per appliance host, default self.hosts
+        self.appliance_hosts = {}
+        self.failing_appliances = set()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_api_client(self, **kwargs):
+        api_client = MagicMock()
+        api_client.host = kwargs["host"]
+        api_client.password = kwargs["password"]
+        hosts = self.appliance_hosts.get(kwargs["host"])
+        if hosts is None:
+            api_client.iter_server_hardware.side_effect = self.iter_server_hardware
+        else:
+            api_client.iter_server_hardware.side_effect = lambda *args, **kwargs: iter(hosts)
+        api_client.list_server_hardware_uris.side_effect = lambda **kwargs: [h["uri"] for h in self.hosts]
+        if kwargs["host"] in self.failing_appliances:
+            api_client.login.side_effect = Exception("Connection refused")
+        api_client.get_stats.return_value = dict(requests=1, deduplicated=0)
+        self.api_clients.append(api_client)
+        return api_client
+
+    def iter_server_hardware(self, filter=None, server_filter=None):
+        # the only filter used is "modified gt '<timestamp>'" of incremental refresh
+        modified = filter.split("'")[1] if filter else ""
+        return iter([h for h in self.hosts if h["modified"] > modified])
+
+    def write_config(self, **options):
+        config = dict(plugin="unbelievable.hpe.oneview", host="oneview.domain", user="user", password="secret")
+        config.update(options)
+        path = os.path.join(self.directory, "oneview.yml")
+        with open(path, "w") as f:
+            json.dump(config, f)
+        return path
+
+    def get_plugin(self, **options):
+        plugin = inventory_loader.get("unbelievable.hpe.oneview")
+        plugin.loader = DataLoader()
+        plugin.inventory = InventoryData()
+        plugin._read_config_data(self.write_config(**options))
+        return plugin
+
+    def parse(self, use_cache=True, **options):
+        """Parse the inventory source with options like ansible-inventory does, returns plugin and inventory"""
+        plugin = inventory_loader.get("unbelievable.hpe.oneview")
+        inventory = InventoryData()
+        with patch.object(oneview, "OneViewApiClient", side_effect=self.create_api_client):
+            plugin.parse(inventory, DataLoader(), self.write_config(**options), cache=use_cache)
+        if plugin.get_option("cache"):
+            plugin.update_cache_if_changed()
+        return plugin, inventory
+
+
+class TestInventoryModuleCache(OneViewInventoryTestCase):
+    def setUp(self):
+        super(TestInventoryModuleCache, self).setUp()
+        self.cache_options = dict(
+            cache=True, cache_plugin="ansible.builtin.jsonfile", cache_connection=os.path.join(self.directory, "cache")
+        )
+
+    def test_cache_miss(self):
+        inventory = self.parse(**self.cache_options)[1]
+        self.assertEqual(1, len(self.api_clients))
+        self.assertEqual(["host1.domain", "host2.domain"], sorted(inventory.hosts))
+        self.assertEqual(1, len(os.listdir(self.cache_options["cache_connection"])))
+
+    def test_cache_hit(self):
+        self.parse(**self.cache_options)
+        self.hosts = []
+        inventory = self.parse(**self.cache_options)[1]
+        # no api client created, no requests
+        self.assertEqual(1, len(self.api_clients))
+        self.assertEqual(["host1.domain", "host2.domain"], sorted(inventory.hosts))
+
+    def test_cache_refresh(self):
+        self.parse(**self.cache_options)
+        self.hosts = [server_hardware(3)]
+        inventory = self.parse(use_cache=False, **self.cache_options)[1]
+        self.assertEqual(2, len(self.api_clients))
+        self.assertEqual(["host3.domain"], sorted(inventory.hosts))
+        self.assertEqual(["host3.domain"], sorted(self.parse(**self.cache_options)[1].hosts))
+
+    def test_cache_key_options(self):
+        self.parse(**self.cache_options)
+        self.parse(preferred_ip="IPv6", **self.cache_options)
+        self.parse(appliances=[dict(host="oneview.domain")], **self.cache_options)
+        self.parse(appliances=[dict(host="oneview.domain", name="site1")], **self.cache_options)
+        self.assertEqual(4, len(self.api_clients))
+        self.assertEqual(4, len(os.listdir(self.cache_options["cache_connection"])))
+
+    def test_options_digest(self):
+        digest = self.get_plugin().get_options_digest()
+        self.assertEqual(digest, self.get_plugin(password="other").get_options_digest())
+        self.assertNotEqual(digest, self.get_plugin(host="other.domain").get_options_digest())
+
+        appliances = [dict(host="oneview1.domain", password="secret1"), dict(host="oneview2.domain")]
+        digest = self.get_plugin(appliances=appliances).get_options_digest()
+        appliances[0]["password"] = "other"
+        self.assertEqual(digest, self.get_plugin(appliances=appliances).get_options_digest())
+        appliances[1]["name"] = "site2"
+        self.assertNotEqual(digest, self.get_plugin(appliances=appliances).get_options_digest())
+
+    def test_options_digest_without_password(self):
+        plugin = self.get_plugin(appliances=[dict(host="oneview1.domain", password="secret1")])
+        with patch.object(oneview.json, "dumps", wraps=json.dumps) as dumps:
+            plugin.get_options_digest()
+        self.assertNotIn("secret", json.dumps(dumps.call_args[0][0]))
+
+
+class TestInventoryModuleSnapshot(OneViewInventoryTestCase):
+    def setUp(self):
+        super(TestInventoryModuleSnapshot, self).setUp()
+        self.snapshot_path = os.path.join(self.directory, "snapshot.json")
+        self.snapshot_options = dict(snapshot_path=self.snapshot_path, snapshot_refresh_age=60, snapshot_max_age=3600)
+
+    def set_age(self, path, age):
+        os.utime(path, (time.time() - age, time.time() - age))
+
+    def test_fresh(self):
+        self.parse(**self.snapshot_options)
+        self.hosts = []
+        with patch.object(oneview, "spawn_detached") as spawn_detached:
+            plugin, inventory = self.parse(**self.snapshot_options)
+        self.assertEqual(1, len(self.api_clients))
+        self.assertFalse(spawn_detached.called)
+        self.assertEqual(["host1.domain", "host2.domain"], sorted(inventory.hosts))
+
+    def test_refresh_age(self):
+        self.parse(**self.snapshot_options)
+        self.set_age(self.snapshot_path, 120)
+        with patch.object(oneview, "spawn_detached", return_value=True) as spawn_detached:
+            inventory = self.parse(**self.snapshot_options)[1]
+        self.assertEqual(1, len(self.api_clients))
+        self.assertEqual(["host1.domain", "host2.domain"], sorted(inventory.hosts))
+        self.assertEqual(120, inventory.groups["oneview_members"].vars["oneview_snapshot_age"])
+        args, kwargs = spawn_detached.call_args
+        self.assertEqual(["-i", os.path.join(self.directory, "oneview.yml"), "--list"], args[0][-3:])
+        self.assertEqual(self.snapshot_path + ".lock", args[1])
+        self.assertEqual(self.snapshot_path, kwargs["env"][oneview.InventoryModule.SNAPSHOT_REFRESH_ENV])
+
+    def test_max_age(self):
+        self.parse(**self.snapshot_options)
+        self.set_age(self.snapshot_path, 7200)
+        self.hosts = [server_hardware(3)]
+        with patch.object(oneview, "spawn_detached") as spawn_detached:
+            inventory = self.parse(**self.snapshot_options)[1]
+        self.assertFalse(spawn_detached.called)
+        self.assertEqual(2, len(self.api_clients))
+        self.assertEqual(["host3.domain"], sorted(inventory.hosts))
+        self.assertLess(time.time() - os.path.getmtime(self.snapshot_path), 60)
+
+    def test_key_mismatch(self):
+        self.parse(**self.snapshot_options)
+        self.hosts = [server_hardware(3)]
+        inventory = self.parse(hostname_short=True, **self.snapshot_options)[1]
+        self.assertEqual(2, len(self.api_clients))
+        self.assertEqual(["host3"], sorted(inventory.hosts))
+
+    def test_refresh_process(self):
+        self.parse(**self.snapshot_options)
+        self.hosts = [server_hardware(3)]
+        JsonFile(self.snapshot_path + ".lock").write(None)
+        with patch.dict(os.environ, {oneview.InventoryModule.SNAPSHOT_REFRESH_ENV: self.snapshot_path}):
+            self.parse(**self.snapshot_options)
+        self.assertEqual(2, len(self.api_clients))
+        self.assertFalse(os.path.exists(self.snapshot_path + ".lock"))
+        self.assertEqual(["host3.domain"], list(JsonFile(self.snapshot_path).read()["inventory"]["hosts"]))
+
+    def test_stale_lock(self):
+        self.parse(**self.snapshot_options)
+        self.set_age(self.snapshot_path, 120)
+        # left over by a killed refresh process
+        JsonFile(self.snapshot_path + ".lock").write(None)
+        self.set_age(self.snapshot_path + ".lock", 7200)
+        with patch.object(cache.subprocess, "Popen") as popen:
+            self.parse(**self.snapshot_options)
+        self.assertEqual(1, popen.call_count)
+        self.assertLess(time.time() - os.path.getmtime(self.snapshot_path + ".lock"), 60)
+
+    def test_refresh_running(self):
+        self.parse(**self.snapshot_options)
+        self.set_age(self.snapshot_path, 120)
+        JsonFile(self.snapshot_path + ".lock").write(None)
+        with patch.object(cache.subprocess, "Popen") as popen:
+            self.parse(**self.snapshot_options)
+        self.assertFalse(popen.called)
+
+
+class TestInventoryModuleIncrementalSnapshot(OneViewInventoryTestCase):
+    def setUp(self):
+        super(TestInventoryModuleIncrementalSnapshot, self).setUp()
+        self.snapshot_path = os.path.join(self.directory, "incremental.json")
+
+    def test_full_listing(self):
+        inventory = self.parse(incremental_snapshot=self.snapshot_path)[1]
+        self.assertEqual(["host1.domain", "host2.domain"], sorted(inventory.hosts))
+        self.api_clients[0].iter_server_hardware.assert_called_once_with(server_filter=None)
+        self.assertFalse(self.api_clients[0].list_server_hardware_uris.called)
+        snapshot = JsonFile(self.snapshot_path).read()["snapshots"]["oneview.domain"]
+        self.assertEqual("2022-01-01T00:00:00.000Z", snapshot["modified"])
+        self.assertEqual(["/rest/server-hardware/1", "/rest/server-hardware/2"], sorted(snapshot["members"]))
+
+    def test_incremental_refresh(self):
+        self.parse(incremental_snapshot=self.snapshot_path)
+        # host1 deleted, host2 changed its address, host3 added
+        changed = server_hardware(2, modified="2022-02-01T00:00:00.000Z")
+        changed["mpHostInfo"]["mpIpAddresses"][0]["address"] = "10.0.1.2"
+        self.hosts = [changed, server_hardware(3, modified="2022-02-02T00:00:00.000Z")]
+        inventory = self.parse(incremental_snapshot=self.snapshot_path)[1]
+
+        api_client = self.api_clients[1]
+        api_client.iter_server_hardware.assert_called_once_with(
+            "modified gt '2022-01-01T00:00:00.000Z'", server_filter=None
+        )
+        self.assertFalse(api_client.get_request.called)
+        self.assertEqual(["host2.domain", "host3.domain"], sorted(inventory.hosts))
+        self.assertEqual("10.0.1.2", inventory.get_host("host2.domain").vars["ansible_host"])
+        snapshot = JsonFile(self.snapshot_path).read()["snapshots"]["oneview.domain"]
+        self.assertEqual("2022-02-02T00:00:00.000Z", snapshot["modified"])
+        self.assertEqual(["/rest/server-hardware/2", "/rest/server-hardware/3"], sorted(snapshot["members"]))
+
+    def test_unchanged_hosts_from_snapshot(self):
+        self.parse(incremental_snapshot=self.snapshot_path)
+        self.hosts = [server_hardware(1), server_hardware(2, modified="2022-02-01T00:00:00.000Z")]
+        inventory = self.parse(incremental_snapshot=self.snapshot_path)[1]
+        # host1 is not modified since the snapshot, it is taken from the snapshot
+        self.assertEqual(["host1.domain", "host2.domain"], sorted(inventory.hosts))
+        self.assertEqual("10.0.0.1", inventory.get_host("host1.domain").vars["ansible_host"])
+        self.assertFalse(self.api_clients[1].get_request.called)
+
+    def test_key_mismatch(self):
+        self.parse(incremental_snapshot=self.snapshot_path)
+        self.parse(incremental_snapshot=self.snapshot_path, hostname_short=True)
+        # snapshot of other options is not used
+        self.api_clients[1].iter_server_hardware.assert_called_once_with(server_filter=None)
+
+
+class TestInventoryModuleAppliances(OneViewInventoryTestCase):
+    def setUp(self):
+        super(TestInventoryModuleAppliances, self).setUp()
+        self.appliances = [
+            dict(host="ov1.domain"),
+            dict(host="ov2.domain", name="ov2", user="admin", password="other"),
+        ]
+        self.appliance_hosts = {
+            "ov1.domain": [server_hardware(1), server_hardware(2)],
+            "ov2.domain": [server_hardware(2), server_hardware(3)],
+        }
+
+    def test_get_appliances(self):
+        appliances = self.get_plugin(host=None, appliances=self.appliances, port=8443).get_appliances()
+        self.assertEqual(["ov1.domain", "ov2"], [a["name"] for a in appliances])
+        self.assertEqual(["ov1.domain", "ov2.domain"], [a["host"] for a in appliances])
+        # options missing in an appliance default to the plugin option
+        self.assertEqual(["user", "admin"], [a["user"] for a in appliances])
+        self.assertEqual(["secret", "other"], [a["password"] for a in appliances])
+        self.assertEqual([8443, 8443], [a["port"] for a in appliances])
+
+    def test_get_appliances_host(self):
+        appliances = self.get_plugin().get_appliances()
+        self.assertEqual(["oneview.domain"], [a["name"] for a in appliances])
+
+    def test_get_appliances_host_missing(self):
+        plugin = self.get_plugin(host=None, appliances=[dict(name="ov1")])
+        with self.assertRaises(AnsibleParserError):
+            plugin.get_appliances()
+        with self.assertRaises(AnsibleParserError):
+            self.get_plugin(host=None).get_appliances()
+
+    def test_appliance_var(self):
+        inventory = self.parse(host=None, appliances=self.appliances)[1]
+        self.assertEqual(["ov1.domain", "ov2.domain"], sorted(a.host for a in self.api_clients))
+        self.assertEqual(["host1.domain", "host2.domain", "host3.domain"], sorted(inventory.hosts))
+        # hosts of several appliances are taken from the first
+        self.assertEqual(
+            ["ov1.domain", "ov1.domain", "ov2"],
+            [inventory.get_host(h).vars["oneview_appliance"] for h in sorted(inventory.hosts)],
+        )
+
+    def test_partial_failure(self):
+        self.failing_appliances.add("ov1.domain")
+        with patch.object(Display, "warning") as warning:
+            plugin, inventory = self.parse(
+                host=None,
+                appliances=self.appliances,
+                cache=True,
+                cache_plugin="ansible.builtin.jsonfile",
+                cache_connection=os.path.join(self.directory, "cache"),
+            )
+        self.assertEqual(["host2.domain", "host3.domain"], sorted(inventory.hosts))
+        self.assertEqual(1, warning.call_count)
+        self.assertIn("appliance ov1.domain failed", warning.call_args[0][0])
+        self.assertIn("Connection refused", warning.call_args[0][0])
+        # incomplete inventories are not cached
+        self.assertFalse(plugin.inventory_complete)
+        self.assertFalse(os.listdir(os.path.join(self.directory, "cache")))
+
+    def test_all_failed(self):
+        self.failing_appliances.update(["ov1.domain", "ov2.domain"])
+        with patch.object(Display, "warning"):
+            with self.assertRaises(Exception) as cm:
+                self.parse(host=None, appliances=self.appliances)
+        self.assertEqual("Connection refused", str(cm.exception))
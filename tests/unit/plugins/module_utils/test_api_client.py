@@ -5,17 +5,24 @@
 
 from __future__ import absolute_import, division, print_function
 
-
 __metaclass__ = type
 
 
+import os
 import pytest
+import shutil
+import tempfile
+import threading
+import time
 import unittest
 from mock import MagicMock, patch
 
 
 from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import JsonRestApiClient  # type: ignore # noqa: E501
 from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import JsonRestApiResponse  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import SingleFlight  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import concurrent_map  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import ModuleBase, TRUST_WINDOW_SPEC  # type: ignore # noqa: E501
 
 
 @pytest.mark.parametrize(
@@ -160,6 +167,221 @@ class TestJsonRestApiClient(unittest.TestCase):
         self.assertEqual(self.response, data)
 
     def test_patch_request(self):
-        data = self.api_client.patch_request("test", self.payload, timeout=123)
-        self.api_client._execute_request.assert_called_once_with("PATCH", "test", data=self.payload, timeout=123)
+        data = self.api_client.patch_request("test", self.payload, timeout=123, headers={"If-Match": "1"})
+        self.api_client._execute_request.assert_called_once_with(
+            "PATCH", "test", data=self.payload, timeout=123, headers={"If-Match": "1"}
+        )
         self.assertEqual(self.response, data)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_sequential_calls_are_not_coalesced(self):
+        single_flight = SingleFlight()
+        fn = MagicMock(side_effect=[1, 2])
+        self.assertEqual(1, single_flight.do("key", fn))
+        self.assertEqual(2, single_flight.do("key", fn))
+        self.assertEqual(2, single_flight.executed)
+        self.assertEqual(0, single_flight.deduplicated)
+
+    def test_concurrent_calls_are_coalesced(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+
+        def leader():
+            started.set()
+            release.wait(5)
+            return {"response": "data"}
+
+        def run(fn):
+            results.append(single_flight.do("key", fn))
+
+        threads = [threading.Thread(target=run, args=(leader,))]
+        threads[0].start()
+        started.wait(5)
+        for _i in range(3):
+            threads.append(threading.Thread(target=run, args=(MagicMock(),)))
+            threads[-1].start()
+        while single_flight.deduplicated < 3:
+            time.sleep(0.01)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(4, len(results))
+        self.assertTrue(all(r == {"response": "data"} for r in results))
+        # waiting callers get copies, modifying a result does not affect the others
+        self.assertEqual(4, len(set(id(r) for r in results)))
+        self.assertEqual(1, single_flight.executed)
+        self.assertEqual(3, single_flight.deduplicated)
+
+    def test_error_is_propagated(self):
+        single_flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            single_flight.do("key", MagicMock(side_effect=ValueError("error")))
+        self.assertEqual("ok", single_flight.do("key", MagicMock(return_value="ok")))
+
+    def test_request_count(self):
+        api_client = JsonRestApiClient("http", "host.domain", 443)
+        with patch("requests.request") as request:
+            request.return_value.ok = True
+            request.return_value.headers = {}
+            request.return_value.content = None
+            concurrent_map(lambda i: api_client.post_request("test", {}), range(200), max_workers=8)
+        self.assertEqual(200, api_client.get_stats()["requests"])
+
+    def test_client_stats(self):
+        api_client = JsonRestApiClient("http", "host.domain", 443)
+        api_client._execute_request = MagicMock(return_value=JsonRestApiResponse({}, {}))
+        api_client.get_request("test")
+        self.assertEqual({"requests": 0, "deduplicated": 0}, api_client.get_stats())
+        self.assertEqual(1, api_client.single_flight.executed)
+
+
+class TestConcurrentMap(unittest.TestCase):
+    def test_results_in_order(self):
+        def fn(item):
+            if item == 3:
+                raise ValueError("error")
+            time.sleep(0.01 * (5 - item))
+            return item * 2
+
+        results = concurrent_map(fn, range(5), max_workers=3)
+        self.assertEqual([0, 2, 4, None, 8], [r for r, e in results])
+        self.assertIsInstance(results[3][1], ValueError)
+        self.assertTrue(all(e is None for i, (r, e) in enumerate(results) if i != 3))
+
+    def test_max_workers(self):
+        lock = threading.Lock()
+        active = []
+        max_active = []
+
+        def fn(item):
+            with lock:
+                active.append(item)
+                max_active.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(item)
+
+        concurrent_map(fn, range(10), max_workers=2)
+        self.assertEqual(2, max(max_active))
+
+    def test_no_items(self):
+        self.assertEqual([], concurrent_map(MagicMock(), []))
+
+
+class TrustedModule(ModuleBase):
+    def __init__(self):
+        super(TrustedModule, self).__init__(param_alias_prefix="test")
+        self.runs = 0
+
+    def argument_spec(self):
+        spec = super(TrustedModule, self).argument_spec()
+        spec.update(TRUST_WINDOW_SPEC)
+        spec.update(value=dict(type="int"), changed=dict(type="bool"), pending=dict(type="bool"))
+        return spec
+
+    def get_module_api_client(self, protocol, host, port, username, password, validate_certs, proxy, logger):
+        return JsonRestApiClient(protocol, host, port)
+
+    def run(self):
+        self.runs += 1
+        self.result["value"] = self.module.params.get("value")
+        self.result["pending"] = self.module.params.get("pending")
+        self.result["response"] = {"status": 200}
+        self.set_changed(self.module.params.get("changed"))
+
+
+class TestModuleBaseTrustWindow(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.params = dict(
+            hostname="host.domain",
+            port=443,
+            username="user",
+            password="secret",
+            protocol="https",
+            validate_certs=True,
+            proxy=None,
+            value=1,
+            changed=False,
+            pending=False,
+            trust_window=60,
+            trust_store=self.directory,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_module(self, **params):
+        module = TrustedModule()
+        with patch(
+            "ansible_collections.unbelievable.hpe.plugins.module_utils.api_client.AnsibleModule"
+        ) as ansible_module:
+            ansible_module.return_value.params = dict(self.params, **params)
+            ansible_module.return_value.check_mode = False
+            ansible_module.return_value.exit_json.side_effect = SystemExit
+            with pytest.raises(SystemExit):
+                module.main()
+        return module.runs, ansible_module.return_value.exit_json.call_args[1]
+
+    def test_trusted(self):
+        self.assertEqual(
+            (1, dict(changed=False, diff=None, value=1, pending=False, response={"status": 200})), self.run_module()
+        )
+        self.assertEqual(
+            (0, dict(changed=False, trusted=True, value=1, pending=False)), self.run_module(password="other")
+        )
+        self.assertEqual(1, self.run_module(value=2)[0])
+        self.assertEqual(1, self.run_module(value=1)[0])
+
+    def test_not_converged(self):
+        self.run_module(changed=True)
+        self.assertEqual(1, self.run_module(changed=True)[0])
+        self.run_module(pending=True)
+        self.assertEqual(1, self.run_module(pending=True)[0])
+        # verified by the next run
+        self.assertEqual(1, self.run_module()[0])
+        self.assertEqual(0, self.run_module()[0])
+
+    def test_window_not_extended(self):
+        self.run_module()
+        with patch("time.time", return_value=time.time() + 30):
+            self.assertEqual(0, self.run_module()[0])
+        with patch("time.time", return_value=time.time() + 61):
+            self.assertEqual(1, self.run_module()[0])
+
+    def test_disabled(self):
+        self.run_module(trust_window=0)
+        self.assertEqual(1, self.run_module(trust_window=0)[0])
+        self.assertEqual([], os.listdir(self.directory))
+
+
+class FailingModule(TrustedModule):
+    def run(self):
+        self.module.fail_json(msg="failed", **self.result)
+
+
+class TestModuleBaseBeforeExit(unittest.TestCase):
+    def run_module(self, module):
+        module.before_exit = MagicMock()
+        with patch(
+            "ansible_collections.unbelievable.hpe.plugins.module_utils.api_client.AnsibleModule"
+        ) as ansible_module:
+            ansible_module.return_value.params = dict(
+                hostname="host.domain", port=443, protocol="https", value=1, trust_window=0, trust_store="/tmp"
+            )
+            ansible_module.return_value.check_mode = False
+            ansible_module.return_value.exit_json.side_effect = SystemExit
+            ansible_module.return_value.fail_json.side_effect = SystemExit
+            with pytest.raises(SystemExit):
+                module.main()
+        return module.before_exit.call_count
+
+    def test_exit_json(self):
+        self.assertEqual(1, self.run_module(TrustedModule()))
+
+    def test_fail_json_in_run(self):
+        self.assertEqual(1, self.run_module(FailingModule()))
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cache import JsonFile, spawn_detached  # type: ignore
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cache import FingerprintStore  # type: ignore
+
+
+class TestJsonFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_missing(self):
+        f = JsonFile(os.path.join(self.directory, "missing.json"))
+        self.assertFalse(f.exists())
+        self.assertIsNone(f.age())
+        self.assertEqual({}, f.read(default={}))
+
+    def test_write_read(self):
+        for name in ["data.json", "data.json.gz", "sub/data.json"]:
+            f = JsonFile(os.path.join(self.directory, name))
+            f.write({"a": [1, 2]})
+            self.assertTrue(f.exists())
+            self.assertEqual({"a": [1, 2]}, f.read())
+            self.assertLess(f.age(), 60)
+        self.assertEqual(["data.json", "data.json.gz", "sub"], sorted(os.listdir(self.directory)))
+
+
+class TestFingerprintStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = FingerprintStore(os.path.join(self.directory, "trust.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fingerprint(self):
+        self.assertEqual(FingerprintStore.fingerprint({"a": 1, "b": 2}), FingerprintStore.fingerprint({"b": 2, "a": 1}))
+        self.assertNotEqual(FingerprintStore.fingerprint({"a": 1}), FingerprintStore.fingerprint({"a": 2}))
+
+    def test_lookup(self):
+        self.assertIsNone(self.store.lookup("Module", "f1", 60))
+        self.store.record("Module", "f1", {"a": 1})
+        self.store.record("Other", "f2", {"b": 1})
+        self.assertEqual({"a": 1}, self.store.lookup("Module", "f1", 60))
+        self.assertIsNone(self.store.lookup("Module", "f2", 60))
+        self.assertIsNone(self.store.lookup("Module", "f1", 0))
+
+    def test_forget(self):
+        self.store.record("Module", "f1", {"a": 1})
+        self.store.record("Other", "f2", {"b": 1})
+        self.store.forget("Module")
+        self.assertIsNone(self.store.lookup("Module", "f1", 60))
+        self.assertEqual({"b": 1}, self.store.lookup("Other", "f2", 60))
+
+    def test_concurrent_record(self):
+        modules = ["Module{0}".format(i) for i in range(8)]
+        threads = [threading.Thread(target=self.store.record, args=(m, "f", {})) for m in modules]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        self.assertEqual(sorted(modules), sorted(self.store.file.read()))
+        self.assertEqual(["trust.json"], os.listdir(self.directory))
+
+
+class TestSpawnDetached(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.lock_path = os.path.join(self.directory, "lock")
+        self.data = JsonFile(os.path.join(self.directory, "data.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def spawn(self, **kwargs):
+        # writes the environment variable VALUE to data.json and releases the lock
+        script = "import json, os; json.dump(os.environ.get('VALUE'), open({0!r}, 'w')); os.remove({1!r})".format(
+            self.data.path, self.lock_path
+        )
+        return spawn_detached([sys.executable, "-c", script], self.lock_path, **kwargs)
+
+    def wait_for_lock_release(self):
+        for _i in range(100):
+            if not os.path.exists(self.lock_path):
+                return
+            time.sleep(0.05)
+        self.fail("lock not released")
+
+    def test_spawn_detached(self):
+        self.assertTrue(self.spawn(env=dict(os.environ, VALUE="done")))
+        self.wait_for_lock_release()
+        self.assertEqual("done", self.data.read())
+
+    def test_already_running(self):
+        JsonFile(self.lock_path).write(None)
+        self.assertFalse(self.spawn())
+        self.assertFalse(self.data.exists())
+
+    def test_stale_lock(self):
+        JsonFile(self.lock_path).write(None)
+        os.utime(self.lock_path, (time.time() - 100, time.time() - 100))
+        self.assertTrue(self.spawn(env=dict(os.environ, VALUE="done"), stale_after=10))
+        self.wait_for_lock_release()
+        self.assertEqual("done", self.data.read())
+
+    def test_spawn_failed(self):
+        with self.assertRaises(OSError):
+            spawn_detached([os.path.join(self.directory, "missing")], self.lock_path)
+        self.assertFalse(os.path.exists(self.lock_path))
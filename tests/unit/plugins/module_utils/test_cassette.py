@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+import os
+import pytest
+import shutil
+import tempfile
+import unittest
+from mock import MagicMock, patch
+
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.cassette import (  # type: ignore
+    Cassette,
+    CassetteMissError,
+    RecordingTransport,
+    ReplayTransport,
+)
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import OneViewApiClient  # type: ignore # noqa: E501
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (None, None),
+        ({"userName": "user", "password": "secret"}, {"userName": "********", "password": "********"}),
+        ({"sessionID": "id", "a": [{"Password": "p"}]}, {"sessionID": "********", "a": [{"Password": "********"}]}),
+    ],
+)
+def test_scrub(data, expected):
+    assert expected == Cassette.scrub(data)
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://host:443/rest/racks", "/rest/racks"),
+        ("http://host/rest/racks?start=2", "/rest/racks?start=2"),
+        ("/rest/racks", "/rest/racks"),
+    ],
+)
+def test_strip_host(url, expected):
+    assert expected == Cassette.strip_host(url)
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://Host:443/rest/racks", "host:443"),
+        ("http://host/rest/racks?start=2", "host"),
+        ("/rest/racks", None),
+    ],
+)
+def test_host(url, expected):
+    assert expected == Cassette.host(url)
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def new_client(self, transport):
+        api_client = OneViewApiClient("https", "oneview.domain", 443, "user", "secret")
+        api_client.transport = transport
+        return api_client
+
+    def record(self, path):
+        cassette = Cassette(path)
+        api_client = self.new_client(RecordingTransport(cassette))
+        responses = [
+            self.mock_response(200, {"sessionID": "secret-session"}),
+            self.mock_response(200, {"members": [1, 2], "nextPageUri": "/rest/racks?start=2"}),
+            self.mock_response(200, {"members": [3]}),
+            self.mock_response(200, None),
+        ]
+        with patch("requests.request", side_effect=responses):
+            api_client.login()
+            racks = api_client.list_racks()
+            api_client.logout()
+        cassette.save()
+        return racks
+
+    def mock_response(self, status_code, content):
+        r = MagicMock()
+        r.ok = status_code < 400
+        r.status_code = status_code
+        r.headers = {"Content-Type": "application/json", "Auth": "secret-session"}
+        r.content = b"content" if content is not None else b""
+        r.json = MagicMock(return_value=content)
+        return r
+
+    def test_record_scrubs_credentials(self):
+        path = os.path.join(self.tmp_dir, "cassette.json")
+        self.record(path)
+        with open(path) as f:
+            data = f.read()
+        self.assertNotIn("secret", data)
+        self.assertEqual(4, len(Cassette.load(path).entries))
+
+    def test_replay(self):
+        path = os.path.join(self.tmp_dir, "cassette.json.gz")
+        recorded = self.record(path)
+        api_client = self.new_client(ReplayTransport(Cassette.load(path)))
+        with patch("requests.request") as mock_request:
+            api_client.login()
+            racks = api_client.list_racks()
+            api_client.logout()
+            self.assertFalse(mock_request.called)
+        self.assertEqual(recorded, racks)
+        self.assertEqual([1, 2, 3], racks)
+
+    def test_replay_latency(self):
+        cassette = Cassette(
+            entries=[
+                dict(method="GET", url="/rest/racks", request=None, status=200, headers={}, body=None, elapsed=0.5)
+            ]
+        )
+        with patch("time.sleep") as mock_sleep:
+            ReplayTransport(cassette, latency_factor=2).request("GET", "https://host:443/rest/racks")
+            mock_sleep.assert_called_once_with(1.0)
+
+    def test_replay_sequence(self):
+        cassette = Cassette(
+            entries=[
+                dict(method="GET", url="/rest/tasks/1", request=None, status=200, headers={}, body="a", elapsed=0),
+                dict(method="GET", url="/rest/tasks/1", request=None, status=200, headers={}, body="b", elapsed=0),
+            ]
+        )
+        transport = ReplayTransport(cassette)
+        self.assertEqual([b"a", b"b", b"b"], [transport.request("GET", "/rest/tasks/1").content for _i in range(3)])
+
+    def test_save_keeps_entries_of_other_processes(self):
+        path = os.path.join(self.tmp_dir, "cassette.json")
+        Cassette(path, [self.entry("/rest/racks", "a")]).save()
+        first = Cassette.load(path)
+        second = Cassette.load(path)
+        first.record("GET", "https://host:443/rest/tasks/1", None, 200, {}, "b", 0)
+        second.record("GET", "https://host:443/rest/tasks/2", None, 200, {}, "c", 0)
+        first.save()
+        second.save()
+        first.save()
+        self.assertEqual(["a", "b", "c"], [e["body"] for e in Cassette.load(path).entries])
+        self.assertFalse(os.path.exists(path + ".lock"))
+
+    def test_replay_by_host(self):
+        cassette = Cassette()
+        cassette.record("GET", "https://ilo1:443/redfish/v1/Systems/1", None, 200, {}, "ilo1", 0)
+        cassette.record("GET", "https://ilo2:443/redfish/v1/Systems/1", None, 200, {}, "ilo2", 0)
+        transport = ReplayTransport(cassette)
+        self.assertEqual(b"ilo2", transport.request("GET", "https://ilo2:443/redfish/v1/Systems/1").content)
+        self.assertEqual(b"ilo1", transport.request("GET", "https://ilo1:443/redfish/v1/Systems/1").content)
+        with self.assertRaises(CassetteMissError):
+            transport.request("GET", "https://ilo3:443/redfish/v1/Systems/1")
+
+    def entry(self, url, body):
+        return dict(method="GET", url=url, request=None, status=200, headers={}, body=body, elapsed=0)
+
+    def test_replay_miss(self):
+        with self.assertRaises(CassetteMissError):
+            ReplayTransport(Cassette()).request("GET", "/rest/racks")
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+
+import unittest
+from mock import MagicMock, call
+
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.imc import ImcApiClient  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import JsonRestApiResponse  # type: ignore # noqa: E501
+
+
+class TestImcApiClient(unittest.TestCase):
+    def setUp(self):
+        self.api_client = ImcApiClient("http", "host.domain", 443, username="user", password="password")
+
+    def test_api_base(self):
+        self.assertEqual("/imcrs", self.api_client.api_base)
+
+    def test_get_auth(self):
+        from requests.auth import HTTPDigestAuth
+
+        auth = self.api_client.get_auth()
+        self.assertIsInstance(auth, HTTPDigestAuth)
+        self.assertEqual("user", auth.username)
+        self.assertIs(auth, self.api_client.get_auth())
+
+    def test_get_auth_no_user(self):
+        self.api_client.username = None
+        self.assertIsNone(self.api_client.get_auth())
+
+    def test__collect_content(self):
+        return_values = [
+            JsonRestApiResponse(
+                None, {"device": [1, 2], "link": {"@rel": "next", "@href": "http://host/imcrs/device?start=2"}}
+            ),
+            JsonRestApiResponse(
+                None,
+                {
+                    "device": {"id": 3},
+                    "link": [
+                        {"@rel": "self", "@href": "http://host/imcrs/device?start=2"},
+                        {"@rel": "next", "@href": "http://host/imcrs/device?start=3"},
+                    ],
+                },
+            ),
+            JsonRestApiResponse(None, {}),
+        ]
+        self.api_client._execute_request = MagicMock(side_effect=return_values)
+        content = self.api_client._collect_content("/device", "device")
+        self.api_client._execute_request.assert_has_calls(
+            [
+                call("GET", "/device", data=None, timeout=None),
+                call("GET", "device?start=2", data=None, timeout=None),
+                call("GET", "device?start=3", data=None, timeout=None),
+            ]
+        )
+        self.assertEqual([1, 2, {"id": 3}], content)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+
+import unittest
+
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.inventory import DictInventory  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.records import HostRecord  # type: ignore # noqa: E501
+
+
+class TestDictInventory(unittest.TestCase):
+    def setUp(self):
+        self.inventory = DictInventory()
+        self.inventory.add_group("main")
+        self.inventory.add_group("DL360_Gen10")
+        self.inventory.add_group("iLO5")
+        self.inventory.add_child_group("main", "DL360_Gen10")
+        self.inventory.add_child_group("main", "iLO5")
+        self.inventory.add_child_group("main", "iLO5")
+        self.inventory.add_host("host1", variables={"a": 1}, group="DL360_Gen10")
+        self.inventory.add_host_to_group("iLO5", "host1")
+        self.inventory.add_host_to_group("iLO5", "host1")
+
+    def test_get_inventory(self):
+        self.assertEqual(
+            {
+                "groups": {
+                    "main": {"name": "main", "children": ["DL360_Gen10", "iLO5"]},
+                    "DL360_Gen10": {"name": "DL360_Gen10", "children": []},
+                    "iLO5": {"name": "iLO5", "children": []},
+                },
+                "hosts": {"host1": {"name": "host1", "vars": {"a": 1}, "groups": ["DL360_Gen10", "iLO5"]}},
+            },
+            self.inventory.get_inventory(),
+        )
+
+    def test_unknown_group(self):
+        with self.assertRaises(ValueError):
+            self.inventory.add_child_group("unknown", "iLO5")
+        with self.assertRaises(ValueError):
+            self.inventory.add_host_to_group("unknown", "host1")
+
+    def test_unknown_host(self):
+        with self.assertRaises(ValueError):
+            self.inventory.add_host_to_group("iLO5", "unknown")
+
+    def test_add_inventory(self):
+        copy = DictInventory()
+        copy.add_inventory(self.inventory.get_inventory())
+        self.assertEqual(self.inventory.get_inventory(), copy.get_inventory())
+
+    def test_record_vars(self):
+        self.inventory.add_host("host2", variables=HostRecord(shortModel="DL360 Gen10", mpModel="iLO5"), group="iLO5")
+        self.assertEqual(
+            {"shortModel": "DL360 Gen10", "mpModel": "iLO5"}, self.inventory.get_inventory()["hosts"]["host2"]["vars"]
+        )
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+
+import unittest
+from mock import MagicMock, call
+
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.logger import (  # type: ignore
+    InventoryPluginLogger,
+    ModuleLogger,
+)
+
+
+class NotFormattable(object):
+    def __format__(self, format_spec):
+        raise AssertionError("message must not be formatted")
+
+
+class TestModuleLogger(unittest.TestCase):
+    def setUp(self):
+        self.module = MagicMock()
+        self.module._debug = True
+
+    def test_buffered(self):
+        logger = ModuleLogger(self.module)
+        logger.debug("debug {0}", 1)
+        logger.info("info {0} {1}", 1, 2)
+        logger.warn("warn")
+        self.assertFalse(self.module.log.called)
+        logger.flush()
+        self.module.log.assert_called_once_with("[debug] debug 1\ninfo 1 2\n[warn] warn")
+        logger.flush()
+        self.assertEqual(1, self.module.log.call_count)
+
+    def test_debug_disabled(self):
+        self.module._debug = False
+        logger = ModuleLogger(self.module)
+        logger.debug("debug {0}", NotFormattable())
+        logger.flush()
+        self.assertFalse(self.module.log.called)
+
+    def test_no_args_not_formatted(self):
+        logger = ModuleLogger(self.module)
+        logger.info("{'json': 'content'}")
+        logger.flush()
+        self.module.log.assert_called_once_with("{'json': 'content'}")
+
+    def test_flush_chunks(self):
+        logger = ModuleLogger(self.module)
+        for _i in range(3):
+            logger.info("x" * 3000)
+        logger.flush()
+        self.assertEqual(3, self.module.log.call_count)
+
+    def test_sampled_debug(self):
+        logger = ModuleLogger(self.module, debug_sample_rate=3)
+        for i in range(7):
+            logger.sampled_debug("request {0}", i)
+        logger.flush()
+        self.module.log.assert_called_once_with("[debug] request 0\n[debug] request 3\n[debug] request 6")
+
+
+class TestInventoryPluginLogger(unittest.TestCase):
+    def test_verbosity(self):
+        plugin = MagicMock()
+        plugin.display.verbosity = 1
+        logger = InventoryPluginLogger(plugin)
+        logger.debug("debug {0}", 1)
+        logger.info("info {0}", 1)
+        logger.warn("warn {0}", 1)
+        self.assertFalse(plugin.display.vv.called)
+        plugin.display.v.assert_has_calls([call("info 1")])
+        plugin.display.warning.assert_has_calls([call("warn 1")])
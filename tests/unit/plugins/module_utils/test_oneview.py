@@ -5,15 +5,23 @@
 
 from __future__ import absolute_import, division, print_function
 
-
 __metaclass__ = type
 
 
+import os
+import shutil
+import tempfile
 import unittest
-from mock import MagicMock, call
+from mock import MagicMock, call, patch
 
 
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import ApiHelper  # type: ignore # noqa: E501
 from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import OneViewApiClient  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import OneViewInventoryBuilder  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import OneViewFederatedInventoryBuilder  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import ServerHardwareFilter  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.oneview import ServerHardwareStateCache  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.inventory import DictInventory  # type: ignore # noqa: E501
 from ansible_collections.unbelievable.hpe.plugins.module_utils.api_client import JsonRestApiResponse  # type: ignore # noqa: E501
 
 
@@ -65,6 +73,153 @@ class TestOneViewApiClient(unittest.TestCase):
         self.api_client._execute_request.assert_called_once_with("DELETE", "/login-sessions", data=None, timeout=None)
         self.assertIsNone(self.api_client.session)
 
+    def test_select_api_version(self):
+        self.api_client.negotiate_api_version = True
+        self.api_client.get_request = MagicMock(return_value={"currentVersion": 4200, "minimumVersion": 120})
+        self.assertEqual(2400, self.api_client.select_api_version())
+        self.assertEqual(2400, self.api_client.select_api_version())
+        self.assertEqual(1, self.api_client.get_request.call_count)
+
+    def test_select_api_version_older_appliance(self):
+        self.api_client.negotiate_api_version = True
+        self.api_client.get_request = MagicMock(return_value={"currentVersion": 800, "minimumVersion": 120})
+        self.assertEqual(800, self.api_client.select_api_version())
+        self.assertTrue(self.api_client.has_feature("index_search"))
+        self.assertFalse(self.api_client.has_feature("projections"))
+
+    def test_select_api_version_cached(self):
+        directory = tempfile.mkdtemp()
+        try:
+            for expected_requests in [1, 0]:
+                api_client = OneViewApiClient(
+                    "http",
+                    "host.domain",
+                    443,
+                    "user",
+                    "password",
+                    negotiate_api_version=True,
+                    version_cache_dir=directory,
+                )
+                api_client.get_request = MagicMock(return_value={"currentVersion": 2000, "minimumVersion": 120})
+                self.assertEqual(2000, api_client.select_api_version())
+                self.assertEqual(expected_requests, api_client.get_request.call_count)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_list_server_hardware_uris_from_index(self):
+        self.api_client.api_version = 800
+        self.api_client._execute_request = MagicMock(
+            return_value=JsonRestApiResponse(None, {"members": [{"uri": "/rest/server-hardware/1"}]})
+        )
+        self.assertEqual(["/rest/server-hardware/1"], self.api_client.list_server_hardware_uris())
+        self.api_client._execute_request.assert_called_once_with(
+            "GET", "/index/resources?category=server-hardware&fields=uri", data=None, timeout=None
+        )
+
+    def test_list_server_hardware_uris_without_projections(self):
+        self.api_client.api_version = 200
+        self.api_client._execute_request = MagicMock(
+            return_value=JsonRestApiResponse(None, {"members": [{"uri": "/rest/server-hardware/1", "name": "1"}]})
+        )
+        self.assertEqual(["/rest/server-hardware/1"], self.api_client.list_server_hardware_uris())
+        self.api_client._execute_request.assert_called_once_with("GET", "/server-hardware", data=None, timeout=None)
+
+    def test_list_server_hardware_filter(self):
+        self.api_client._execute_request = MagicMock(return_value=JsonRestApiResponse(None, {"members": []}))
+        server_filter = ServerHardwareFilter(
+            models=["DL360 Gen10", "DL380 Gen10"], name_patterns=["enc1*"], scope_uris=["/rest/scopes/1"]
+        )
+        self.api_client.list_server_hardware("state = 'ProfileApplied'", server_filter=server_filter)
+        self.api_client._execute_request.assert_called_once_with(
+            "GET",
+            "/server-hardware"
+            "?filter=\"shortModel%20=%20'DL360%20Gen10'%20OR%20shortModel%20=%20'DL380%20Gen10'\""
+            "&filter=\"name%20matches%20'enc1%25'\""
+            "&filter=\"state%20=%20'ProfileApplied'\""
+            "&scopeUris=\"'/rest/scopes/1'\"",
+            data=None,
+            timeout=None,
+        )
+
+    def test_list_server_hardware_uris(self):
+        self.api_client._execute_request = MagicMock(
+            return_value=JsonRestApiResponse(None, {"members": [{"uri": "/rest/server-hardware/1"}]})
+        )
+        uris = self.api_client.list_server_hardware_uris(ServerHardwareFilter(power_states=["On"]))
+        self.assertEqual(["/rest/server-hardware/1"], uris)
+        self.api_client._execute_request.assert_called_once_with(
+            "GET", "/server-hardware?filter=\"powerState%20=%20'On'\"&fields=uri", data=None, timeout=None
+        )
+
+    def test_index_search(self):
+        self.api_client._execute_request = MagicMock(
+            return_value=JsonRestApiResponse(None, {"members": [{"uri": "/rest/server-hardware/1"}]})
+        )
+        members = self.api_client.index_search(
+            category="server-hardware", query="DL360", filter="powerState:On", fields=["uri", "name"]
+        )
+        self.assertEqual([{"uri": "/rest/server-hardware/1"}], list(members))
+        self.api_client._execute_request.assert_called_once_with(
+            "GET",
+            '/index/resources?category=server-hardware&query="DL360"&filter="powerState:On"&fields=uri,name',
+            data=None,
+            timeout=None,
+        )
+
+    def test_index_associations(self):
+        self.api_client._execute_request = MagicMock(return_value=JsonRestApiResponse(None, {"members": []}))
+        list(self.api_client.index_associations("server_profiles_to_server_hardware", child_uri="/rest/sh/1"))
+        self.api_client._execute_request.assert_called_once_with(
+            "GET",
+            "/index/associations?name=server_profiles_to_server_hardware&childUri=/rest/sh/1",
+            data=None,
+            timeout=None,
+        )
+
+    def test_index_associations_not_supported(self):
+        self.api_client.api_version = 200
+        self.api_client._execute_request = MagicMock()
+        with self.assertRaises(ValueError):
+            self.api_client.index_associations("server_profiles_to_server_hardware")
+        self.assertFalse(self.api_client._execute_request.called)
+
+    def test_get_resources(self):
+        return_values = [
+            JsonRestApiResponse(None, {"members": [{"uri": "/rest/a/1"}, {"uri": "/rest/a/2"}]}),
+            JsonRestApiResponse(None, {"members": [{"uri": "/rest/a/3"}]}),
+            JsonRestApiResponse(None, {"members": [{"uri": "/rest/b/1"}]}),
+        ]
+        self.api_client._execute_request = MagicMock(side_effect=return_values)
+        resources = self.api_client.get_resources(
+            ["/rest/a/1", "/rest/b/1", "/rest/a/2", "/rest/a/1", None, "/rest/a/3"], batch_size=2
+        )
+        self.assertEqual(["/rest/a/1", "/rest/a/2", "/rest/a/3", "/rest/b/1"], sorted(resources))
+        self.api_client._execute_request.assert_has_calls(
+            [
+                call(
+                    "GET",
+                    "/rest/a?filter=\"uri%20=%20'/rest/a/1'%20OR%20uri%20=%20'/rest/a/2'\"",
+                    data=None,
+                    timeout=None,
+                ),
+                call("GET", "/rest/a?filter=\"uri%20=%20'/rest/a/3'\"", data=None, timeout=None),
+                call("GET", "/rest/b?filter=\"uri%20=%20'/rest/b/1'\"", data=None, timeout=None),
+            ]
+        )
+
+    def test_get_resources_fallback(self):
+        from requests import HTTPError
+
+        def execute_request(verb, uri_path, data, timeout):
+            if "?" in uri_path or uri_path.endswith("/2"):
+                raise HTTPError("error", response=MagicMock(status_code=404 if "?" not in uri_path else 400))
+            return JsonRestApiResponse(None, {"uri": uri_path})
+
+        self.api_client._execute_request = MagicMock(side_effect=execute_request)
+        resources = self.api_client.get_resources(["/rest/a/1", "/rest/a/2"])
+        self.assertEqual({"/rest/a/1": {"uri": "/rest/a/1"}}, resources)
+        self.assertEqual(3, self.api_client._execute_request.call_count)
+
     def test__collect_members(self):
         return_values = [
             JsonRestApiResponse(None, {"members": [1, 2], "nextPageUri": "/rest/something/1"}),
@@ -82,6 +237,78 @@ class TestOneViewApiClient(unittest.TestCase):
         )
         self.assertEqual([1, 2, 3, 4, 5], members)
 
+    def test__iter_members(self):
+        return_values = [
+            JsonRestApiResponse(None, {"members": [1, 2], "nextPageUri": "/rest/something/1"}),
+            JsonRestApiResponse(None, {"members": [3]}),
+        ]
+        self.api_client._execute_request = MagicMock(side_effect=return_values)
+        members = self.api_client._iter_members("/something")
+        self.assertFalse(self.api_client._execute_request.called)
+        self.assertEqual([1, 2], [next(members), next(members)])
+        self.assertEqual(1, self.api_client._execute_request.call_count)
+        self.assertEqual([3], list(members))
+        self.assertEqual(2, self.api_client._execute_request.call_count)
+
+    def test_wait_for_tasks(self):
+        return_values = [
+            JsonRestApiResponse(
+                None,
+                {
+                    "members": [
+                        {"uri": "/rest/tasks/1", "taskState": "Running"},
+                        {"uri": "/rest/tasks/2", "taskState": "Running"},
+                    ]
+                },
+            ),
+            JsonRestApiResponse(
+                None,
+                {
+                    "members": [
+                        {"uri": "/rest/tasks/1", "taskState": "Completed"},
+                        {"uri": "/rest/tasks/2", "taskState": "Running"},
+                    ]
+                },
+            ),
+            JsonRestApiResponse(None, {"members": [{"uri": "/rest/tasks/2", "taskState": "Error"}]}),
+        ]
+        self.api_client._execute_request = MagicMock(side_effect=return_values)
+        with patch("time.sleep") as sleep:
+            result = self.api_client.wait_for_tasks(["1", "2"], seconds_to_wait=60, poll_interval=1)
+        self.assertEqual(
+            {
+                "1": {"uri": "/rest/tasks/1", "taskState": "Completed"},
+                "2": {"uri": "/rest/tasks/2", "taskState": "Error"},
+            },
+            result,
+        )
+        self.api_client._execute_request.assert_has_calls(
+            [
+                call(
+                    "GET",
+                    "/rest/tasks?filter=\"uri%20=%20'/rest/tasks/1'%20OR%20uri%20=%20'/rest/tasks/2'\"",
+                    data=None,
+                    timeout=None,
+                ),
+                call(
+                    "GET",
+                    "/rest/tasks?filter=\"uri%20=%20'/rest/tasks/1'%20OR%20uri%20=%20'/rest/tasks/2'\"",
+                    data=None,
+                    timeout=None,
+                ),
+                call("GET", "/rest/tasks?filter=\"uri%20=%20'/rest/tasks/2'\"", data=None, timeout=None),
+            ]
+        )
+        self.assertEqual([call(1), call(2)], sleep.call_args_list)
+
+    def test_iter_finished_tasks(self):
+        tasks = [{"uri": "/rest/tasks/1", "taskState": "Running"}, {"uri": "/rest/tasks/2", "taskState": "Completed"}]
+        self.api_client._execute_request = MagicMock(return_value=JsonRestApiResponse(None, {"members": tasks}))
+        finished = self.api_client.iter_finished_tasks(["1", "2", "3"], seconds_to_wait=0)
+        self.assertEqual(("2", tasks[1]), next(finished))
+        self.assertEqual([("1", tasks[0]), ("3", None)], list(finished))
+        self.assertEqual(1, self.api_client._execute_request.call_count)
+
     def test_list_racks(self):
         return_values = [
             JsonRestApiResponse(None, {"members": [1, 2], "nextPageUri": "/rest/racks/1"}),
@@ -115,3 +342,270 @@ class TestOneViewApiClient(unittest.TestCase):
             ]
         )
         self.assertEqual([1, 2, 3, 4, 5], racks)
+
+
+def server_hardware(uri, name, modified, short_model="DL360 Gen10", mp_model="iLO5"):
+    return {
+        "uri": uri,
+        "modified": modified,
+        "shortModel": short_model,
+        "mpModel": mp_model,
+        "mpHostInfo": {
+            "mpHostName": name,
+            "mpIpAddresses": [{"type": "Static", "address": "10.0.0.{0}".format(uri[-1])}],
+        },
+        "serialNumber": "not in snapshot",
+    }
+
+
+class TestOneViewInventoryBuilder(unittest.TestCase):
+    def setUp(self):
+        self.api_client = MagicMock()
+        self.api_client.iter_server_hardware = MagicMock(
+            return_value=[
+                server_hardware("/rest/server-hardware/1", "host1.domain", "2022-01-01T00:00:00.000Z"),
+                server_hardware("/rest/server-hardware/2", "host2.domain", "2022-01-02T00:00:00.000Z"),
+            ]
+        )
+        self.inventory = DictInventory()
+        self.builder = OneViewInventoryBuilder(self.api_client, self.inventory)
+
+    def test_populate(self):
+        self.builder._populate()
+        self.assertIsNone(self.builder.get_snapshot())
+        inventory = self.inventory.get_inventory()
+        self.assertEqual(["host1.domain", "host2.domain"], list(inventory["hosts"]))
+        self.assertEqual(
+            {"shortModel": "DL360 Gen10", "mpModel": "iLO5", "ansible_host": "10.0.0.1"},
+            inventory["hosts"]["host1.domain"]["vars"],
+        )
+        self.assertEqual(["DL360_Gen10", "iLO5"], inventory["groups"]["oneview_members"]["children"])
+
+    def test_populate_snapshot(self):
+        self.builder.set_snapshot({})
+        self.builder._populate()
+        snapshot = self.builder.get_snapshot()
+        self.assertEqual("2022-01-02T00:00:00.000Z", snapshot["modified"])
+        self.assertEqual(["/rest/server-hardware/1", "/rest/server-hardware/2"], sorted(snapshot["members"]))
+        self.assertNotIn("serialNumber", snapshot["members"]["/rest/server-hardware/1"])
+
+    def test_populate_incremental(self):
+        self.builder.set_snapshot({})
+        self.builder._populate()
+        snapshot = self.builder.get_snapshot()
+
+        self.api_client.iter_server_hardware = MagicMock(
+            return_value=[
+                server_hardware("/rest/server-hardware/2", "host2.domain", "2022-01-03T00:00:00.000Z", "DL380 Gen10"),
+                server_hardware("/rest/server-hardware/3", "host3.domain", "2022-01-04T00:00:00.000Z"),
+            ]
+        )
+        self.api_client.list_server_hardware_uris = MagicMock(
+            return_value=["/rest/server-hardware/2", "/rest/server-hardware/3", "/rest/server-hardware/4"]
+        )
+        self.api_client.get_request = MagicMock(
+            return_value=server_hardware("/rest/server-hardware/4", "host4.domain", "2021-01-01T00:00:00.000Z")
+        )
+        self.inventory = DictInventory()
+        self.builder = OneViewInventoryBuilder(self.api_client, self.inventory)
+        self.builder.set_snapshot(snapshot)
+        self.builder._populate()
+
+        self.api_client.iter_server_hardware.assert_called_once_with(
+            "modified gt '2022-01-02T00:00:00.000Z'", server_filter=None
+        )
+        self.api_client.get_request.assert_called_once_with("/rest/server-hardware/4")
+        inventory = self.inventory.get_inventory()
+        self.assertEqual(["host2.domain", "host3.domain", "host4.domain"], list(inventory["hosts"]))
+        self.assertEqual("DL380 Gen10", inventory["hosts"]["host2.domain"]["vars"]["shortModel"])
+        self.assertEqual("2022-01-04T00:00:00.000Z", self.builder.get_snapshot()["modified"])
+
+
+class TestOneViewFederatedInventoryBuilder(unittest.TestCase):
+    def create_builder(self, hosts=None, error=None):
+        api_client = MagicMock()
+        api_client.iter_server_hardware = MagicMock(return_value=hosts or [])
+        api_client.login = MagicMock(side_effect=error)
+        return OneViewInventoryBuilder(api_client, DictInventory())
+
+    def setUp(self):
+        self.inventory = DictInventory()
+        self.federated_builder = OneViewFederatedInventoryBuilder(self.inventory)
+
+    def test_populate(self):
+        self.federated_builder.add_appliance(
+            "site1",
+            self.create_builder(
+                [
+                    server_hardware("/rest/server-hardware/1", "host1.domain", "2022-01-01T00:00:00.000Z"),
+                    server_hardware("/rest/server-hardware/2", "host2.domain", "2022-01-01T00:00:00.000Z"),
+                ]
+            ),
+        )
+        self.federated_builder.add_appliance("site2", self.create_builder(error=Exception("unreachable")))
+        self.federated_builder.add_appliance(
+            "site3",
+            self.create_builder(
+                [
+                    server_hardware("/rest/server-hardware/2", "host2.domain", "2022-01-01T00:00:00.000Z"),
+                    server_hardware(
+                        "/rest/server-hardware/3", "host3.domain", "2022-01-01T00:00:00.000Z", "DL360 Gen9"
+                    ),
+                ]
+            ),
+        )
+        results = self.federated_builder.populate()
+
+        self.assertEqual(2, results["site1"]["hosts"])
+        self.assertEqual("unreachable", str(results["site2"]["error"]))
+        self.assertEqual(2, results["site3"]["hosts"])
+        inventory = self.inventory.get_inventory()
+        self.assertEqual(
+            {"host1.domain": "site1", "host2.domain": "site1", "host3.domain": "site3"},
+            dict((k, v["vars"]["oneview_appliance"]) for k, v in inventory["hosts"].items()),
+        )
+        self.assertEqual(["DL360_Gen10", "iLO5", "DL360_Gen9"], inventory["groups"]["oneview_members"]["children"])
+
+    def test_populate_all_failed(self):
+        self.federated_builder.add_appliance("site1", self.create_builder(error=Exception("unreachable")))
+        self.federated_builder.add_appliance("site2", self.create_builder(error=Exception("timeout")))
+        with self.assertRaises(Exception) as e:
+            self.federated_builder.populate()
+        self.assertEqual("unreachable", str(e.exception))
+
+
+class TestApiHelper(unittest.TestCase):
+    HOST = {
+        "name": "enc1 bay 1",
+        "uuid": "1",
+        "mpHostInfo": {
+            "mpHostName": "ilo1.domain",
+            "mpIpAddresses": [
+                {"address": "fe80::1", "type": "LinkLocal"},
+                {"address": "10.0.0.1", "type": "Static"},
+                {"address": "2001:db8::1", "type": "Static"},
+                {"address": "10.0.0.2", "type": "Static"},
+            ],
+        },
+    }
+
+    def test_copy_entries(self):
+        self.assertEqual(
+            {
+                "name": "enc1 bay 1",
+                "rs_mpHostName": "ilo1.domain",
+                "rs_mpIpAddress4": "10.0.0.2",
+                "rs_mpIpAddress6": "2001:db8::1",
+                "mpHostInfo/mpHostName": "ilo1.domain",
+            },
+            ApiHelper.copy_entries(
+                TestApiHelper.HOST,
+                [
+                    "name",
+                    "missing",
+                    "rs_mpHostName",
+                    "rs_mpIpAddress4",
+                    "rs_mpIpAddress6",
+                    "mpHostInfo/mpHostName",
+                    "mpHostInfo/missing/path",
+                    "name/not_a_dict",
+                ],
+            ),
+        )
+
+    def test_copy_entries_mp_ip_address(self):
+        host = {"mpDnsName": "ilo2.domain", "mpIpAddress": "10.0.0.3"}
+        self.assertEqual(
+            {"rs_mpHostName": "ilo2.domain", "rs_mpIpAddress4": "10.0.0.3"},
+            ApiHelper.copy_entries(host, ["rs_mpHostName", "rs_mpIpAddress4", "rs_mpIpAddress6"]),
+        )
+
+    def test_compile_entries(self):
+        extract = ApiHelper.compile_entries(["uuid", "rs_mpIpAddress4"])
+        self.assertIs(extract, ApiHelper.compile_entries(["uuid", "rs_mpIpAddress4"]))
+        self.assertEqual({"uuid": "1", "rs_mpIpAddress4": "10.0.0.2"}, extract(TestApiHelper.HOST))
+        self.assertEqual({}, extract({}))
+
+    def test_mp_host_ips(self):
+        self.assertEqual("10.0.0.2", ApiHelper.Host.mpHostIp4(TestApiHelper.HOST))
+        self.assertEqual("2001:db8::1", ApiHelper.Host.mpHostIp6(TestApiHelper.HOST))
+        self.assertEqual((None, None), ApiHelper.Host.mpHostIps(None))
+
+    def test_copy_path(self):
+        self.assertEqual("ilo1.domain", ApiHelper.copy_path(TestApiHelper.HOST, "/mpHostInfo/mpHostName"))
+
+
+class TestServerHardwareFilter(unittest.TestCase):
+    def test_from_params(self):
+        self.assertIsNone(ServerHardwareFilter.from_params(None))
+        server_filter = ServerHardwareFilter.from_params(dict(mp_models=["iLO5"], states=None, scope_uris=[]))
+        self.assertEqual([("filter", "\"mpModel = 'iLO5'\"")], server_filter.query_params())
+
+    def test_query_params(self):
+        self.assertEqual([], ServerHardwareFilter().query_params())
+        self.assertEqual([("filter", '"a = 1"')], ServerHardwareFilter().query_params("a = 1"))
+        self.assertEqual(
+            [
+                ("filter", "\"powerState = 'On' OR powerState = 'Off'\""),
+                ("scopeUris", "\"'/rest/scopes/1' OR '/rest/scopes/2'\""),
+            ],
+            ServerHardwareFilter(
+                power_states=["On", "Off"], scope_uris=["/rest/scopes/1", "/rest/scopes/2"]
+            ).query_params(),
+        )
+
+
+class TestServerHardwareStateCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "state.json")
+        self.api_client = MagicMock()
+        self.api_client.iter_server_hardware.return_value = [
+            {
+                "uri": "/rest/server-hardware/1",
+                "name": "enc1 bay 1",
+                "powerState": "On",
+                "status": "OK",
+                "state": "ProfileApplied",
+                "mpHostInfo": {
+                    "mpHostName": "ILO-1.domain",
+                    "mpIpAddresses": [{"address": "fe80::1"}, {"address": "10.0.0.1"}],
+                },
+            }
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get(self):
+        cache = ServerHardwareStateCache(self.api_client, self.path)
+        state = cache.get("10.0.0.1")
+        self.assertEqual("On", state["powerState"])
+        self.assertEqual(state, cache.get("ilo-1.domain"))
+        self.assertEqual(state, cache.get("FE80::1"))
+        self.assertIsNone(cache.get("10.0.0.2"))
+        self.api_client.iter_server_hardware.assert_called_once_with(fields=ServerHardwareStateCache.FIELDS)
+        self.api_client.logout.assert_called_once_with()
+
+    def test_snapshot_shared(self):
+        ServerHardwareStateCache(self.api_client, self.path).get("10.0.0.1")
+        state = ServerHardwareStateCache(self.api_client, self.path).get("10.0.0.1")
+        self.assertEqual("ProfileApplied", state["state"])
+        self.assertEqual(1, self.api_client.iter_server_hardware.call_count)
+
+    def test_forget(self):
+        ServerHardwareStateCache(self.api_client, self.path).get("10.0.0.1")
+        modified = os.path.getmtime(self.path)
+        cache = ServerHardwareStateCache(self.api_client, self.path)
+        cache.forget("ILO-1.domain")
+        self.assertIsNone(cache.get("10.0.0.1"))
+        self.assertIsNone(ServerHardwareStateCache(self.api_client, self.path).get("fe80::1"))
+        self.assertEqual(modified, os.path.getmtime(self.path))
+        self.assertEqual(1, self.api_client.iter_server_hardware.call_count)
+        self.assertFalse(os.path.exists(self.path + ".lock"))
+
+    def test_snapshot_expired(self):
+        ServerHardwareStateCache(self.api_client, self.path).get("10.0.0.1")
+        ServerHardwareStateCache(self.api_client, self.path, max_age=0).get("10.0.0.1")
+        self.assertEqual(2, self.api_client.iter_server_hardware.call_count)
+        self.assertFalse(os.path.exists(self.path + ".lock"))
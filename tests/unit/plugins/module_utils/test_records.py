@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import unittest
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.records import (  # type: ignore
+    HostRecord,
+    ProfileSummary,
+    RackMountRecord,
+)
+
+
+class TestRecords(unittest.TestCase):
+    def test_host_record(self):
+        record = HostRecord(shortModel="DL360 Gen10", mpModel="iLO5")
+        self.assertEqual({"shortModel": "DL360 Gen10", "mpModel": "iLO5"}, record.to_dict())
+        record.ansible_host = "10.0.0.1"
+        self.assertEqual(
+            {"shortModel": "DL360 Gen10", "mpModel": "iLO5", "ansible_host": "10.0.0.1"}, record.to_dict()
+        )
+        with self.assertRaises(AttributeError):
+            record.serialNumber = "no slot"
+
+    def test_rack_mount_record(self):
+        rack = {"name": "rack1", "id": "1"}
+        self.assertEqual(
+            {"topUSlot": 4, "uHeight": 1, "name": "rack1", "id": "1"},
+            RackMountRecord(topUSlot=4, uHeight=1, rack=rack).to_dict(),
+        )
+        self.assertEqual(rack, RackMountRecord(rack=rack).to_dict())
+
+    def test_profile_summary(self):
+        profile = {"uri": "/rest/server-profiles/abc", "name": "p1", "templateCompliance": "Compliant", "big": [1]}
+        summary = ProfileSummary.from_profile(profile)
+        self.assertEqual(
+            ProfileSummary(uuid="abc", name="p1", uri="/rest/server-profiles/abc", templateCompliance="Compliant"),
+            summary,
+        )
+        self.assertEqual("xyz", ProfileSummary.from_profile(dict(profile, profileUUID="xyz")).uuid)
+        self.assertEqual(
+            {"uuid": "abc", "name": "p1", "uri": "/rest/server-profiles/abc", "templateCompliance": "Compliant"},
+            summary.to_dict(),
+        )
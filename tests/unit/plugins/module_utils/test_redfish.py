@@ -8,9 +8,17 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 import pytest
+import shutil
+import tempfile
+import time
 import unittest
+from mock import MagicMock, patch
+from requests import HTTPError
 
 from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishApiClient, ApiHelper  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishEventStream  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishModuleBase  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import SettingsTransaction  # type: ignore # noqa: E501
 
 
 @pytest.mark.parametrize(
@@ -43,6 +51,21 @@ def test_get_recursive(path, d, value):
     assert val == value
 
 
+@pytest.mark.parametrize(
+    "source, destination, merged",
+    [
+        ({"a": 1}, {}, {"a": 1}),
+        ({"a": {"b": 1}}, {"a": {"c": 2}}, {"a": {"b": 1, "c": 2}}),
+        ({"a": {"b": 1}}, {"a": {"b": 2}}, {"a": {"b": 1}}),
+        ({"a": {"b": 1}}, {"a": 2}, {"a": {"b": 1}}),
+        ({"a": [1]}, {"a": [2]}, {"a": [1]}),
+    ],
+)
+def test_merge_recursive(source, destination, merged):
+    assert ApiHelper.merge_recursive(source, destination) == merged
+    assert destination == merged
+
+
 class TestRedfishApiClient(unittest.TestCase):
     def setUp(self):
         self.api_client = RedfishApiClient(
@@ -51,3 +74,338 @@ class TestRedfishApiClient(unittest.TestCase):
 
     def test_api_base(self):
         self.assertEqual("/redfish/v1", self.api_client.api_base)
+
+    def test_get_url(self):
+        self.assertEqual(
+            "http://host.domain:443/redfish/v1/Systems/1", self.api_client.get_url("/redfish/v1/Systems/1")
+        )
+
+    def test_stage_patch(self):
+        self.api_client.stage_patch("Chassis/1/Thermal", {"Oem": {"Hpe": {"ThermalConfiguration": "MaximumCooling"}}})
+        self.api_client.stage_patch("/redfish/v1/Chassis/1/Thermal", {"Oem": {"Hpe": {"FanPercentMinimum": 50}}})
+        self.assertEqual(
+            {"Oem": {"Hpe": {"ThermalConfiguration": "MaximumCooling", "FanPercentMinimum": 50}}},
+            self.api_client.staged_patch("Chassis/1/Thermal"),
+        )
+        self.assertIsNone(self.api_client.staged_patch("Systems/1"))
+
+    def test_flush_patches(self):
+        self.api_client.stage_patch("Chassis/1/Thermal", {"Oem": {"Hpe": {"FanPercentMinimum": 50}}})
+        self.api_client.stage_patch("Managers/1/SecurityService", {"SecurityState": "Production"}, etag='W/"1"')
+        self.api_client.stage_patch("Chassis/1/Thermal", {"Oem": {"Hpe": {"FanPercentMinimum": 60}}})
+        with patch("requests.request") as request:
+            request.return_value.ok = True
+            request.return_value.headers = {}
+            request.return_value.content = None
+            responses = self.api_client.flush_patches()
+        self.assertEqual(["Chassis/1/Thermal", "Managers/1/SecurityService"], list(responses))
+        self.assertEqual(2, request.call_count)
+        thermal, security = request.call_args_list
+        self.assertEqual({"Oem": {"Hpe": {"FanPercentMinimum": 60}}}, thermal[1]["json"])
+        self.assertNotIn("If-Match", thermal[1]["headers"])
+        self.assertEqual('W/"1"', security[1]["headers"]["If-Match"])
+        self.assertEqual({}, dict(self.api_client.staged_patches))
+
+    def test_flush_patches_uri_path(self):
+        self.api_client.stage_patch("Chassis/1/Thermal", {"Oem": {"Hpe": {"FanPercentMinimum": 50}}})
+        self.api_client.stage_patch("Managers/1/SecurityService", {"SecurityState": "Production"}, etag='W/"1"')
+        self.api_client.patch_request = MagicMock(return_value=None)
+        responses = self.api_client.flush_patches("/redfish/v1/Managers/1/SecurityService", timeout=30)
+        self.assertEqual(["Managers/1/SecurityService"], list(responses))
+        # patches with and without ETag are sent by patch_request
+        self.api_client.patch_request.assert_called_once_with(
+            "Managers/1/SecurityService", {"SecurityState": "Production"}, timeout=30, headers={"If-Match": 'W/"1"'}
+        )
+        self.assertEqual(["Chassis/1/Thermal"], list(self.api_client.staged_patches))
+        self.assertEqual({}, self.api_client.flush_patches("Systems/1"))
+
+    def test_discard_patches(self):
+        self.api_client.stage_patch("Chassis/1/Thermal", {"Oem": {"Hpe": {"FanPercentMinimum": 50}}})
+        self.api_client.stage_patch("Managers/1/SecurityService", {"SecurityState": "Production"})
+        self.api_client.discard_patches("/redfish/v1/Chassis/1/Thermal")
+        self.assertEqual(["Managers/1/SecurityService"], list(self.api_client.staged_patches))
+        self.api_client.discard_patches()
+        self.assertEqual({}, dict(self.api_client.staged_patches))
+
+
+class TestRedfishApiClientConditionalWrites(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.api_client = RedfishApiClient(
+            "http", "host.domain", 443, "user", "password", conditional_writes=True, etag_cache_dir=self.cache_dir
+        )
+        self.thermal = {"Oem": {"Hpe": {"FanPercentMinimum": 20}}}
+        self.etag = 'W/"1"'
+        self.requests = []
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def request(self, verb, url, headers, json, **kwargs):
+        self.requests.append((verb, headers.get("If-Match")))
+        response = MagicMock(ok=True, status_code=200, content=None, headers={"ETag": self.etag})
+        if verb == "GET":
+            response.headers["Content-Type"] = "application/json"
+            response.content = "json"
+            response.json.return_value = self.thermal
+        elif headers.get("If-Match") not in (None, self.etag):
+            response.ok = False
+            response.status_code = 412
+            response.raise_for_status.side_effect = HTTPError(response=response)
+        return response
+
+    def fan_percent_minimum(self, value):
+        def stage_changes(data):
+            if data["Oem"]["Hpe"]["FanPercentMinimum"] != value:
+                self.api_client.stage_patch("Chassis/1/Thermal", {"Oem": {"Hpe": {"FanPercentMinimum": value}}})
+
+        return stage_changes
+
+    def write(self, value):
+        with patch("requests.request", side_effect=self.request):
+            return self.api_client.write_resource("Chassis/1/Thermal", self.fan_percent_minimum(value))
+
+    def cache(self, data, age=0):
+        self.api_client.get_etag_cache()["Chassis/1/Thermal"] = dict(data=data, etag='W/"0"', time=time.time() - age)
+
+    def test_read_before_write(self):
+        self.api_client.conditional_writes = False
+        self.assertEqual((self.thermal, {"Oem": {"Hpe": {"FanPercentMinimum": 30}}}), self.write(30))
+        self.assertEqual([("GET", None), ("PATCH", None)], self.requests)
+
+    def test_cached_unchanged(self):
+        self.cache(self.thermal)
+        self.assertEqual((self.thermal, None), self.write(20))
+        self.assertEqual([], self.requests)
+
+    def test_cache_expired(self):
+        self.cache({"Oem": {"Hpe": {"FanPercentMinimum": 30}}}, age=3600)
+        self.assertEqual((self.thermal, None), self.write(20))
+        self.assertEqual([("GET", None)], self.requests)
+        self.assertEqual(self.etag, self.api_client.read_resource("Chassis/1/Thermal")[1])
+
+    def test_cached_if_match(self):
+        self.etag = 'W/"0"'
+        self.cache(self.thermal)
+        self.assertEqual((self.thermal, {"Oem": {"Hpe": {"FanPercentMinimum": 30}}}), self.write(30))
+        self.assertEqual([("PATCH", 'W/"0"')], self.requests)
+        # the cached data is outdated by the write
+        self.assertEqual({}, self.api_client._etag_cache_file().read())
+
+    def test_precondition_failed(self):
+        self.cache({"Oem": {"Hpe": {"FanPercentMinimum": 10}}})
+        self.thermal["Oem"]["Hpe"]["FanPercentMinimum"] = 25
+        self.assertEqual((self.thermal, {"Oem": {"Hpe": {"FanPercentMinimum": 30}}}), self.write(30))
+        self.assertEqual([("PATCH", 'W/"0"'), ("GET", None), ("PATCH", None)], self.requests)
+
+    def test_other_patches_kept(self):
+        self.api_client.stage_patch("Managers/1/SecurityService", {"SecurityState": "Production"})
+        self.etag = 'W/"0"'
+        self.cache(self.thermal)
+        self.write(20)
+        self.write(30)
+        self.assertEqual([("PATCH", 'W/"0"')], self.requests)
+        self.assertEqual({"SecurityState": "Production"}, self.api_client.staged_patch("Managers/1/SecurityService"))
+
+    def test_precondition_failed_unchanged(self):
+        self.cache({"Oem": {"Hpe": {"FanPercentMinimum": 10}}})
+        self.assertEqual((self.thermal, None), self.write(20))
+        self.assertEqual([("PATCH", 'W/"0"'), ("GET", None)], self.requests)
+
+
+class TestRedfishEventStream(unittest.TestCase):
+    def setUp(self):
+        self.api_client = RedfishApiClient("http", "host.domain", 443, username="user", password="password")
+
+    def test_events(self):
+        stream = RedfishEventStream(self.api_client)
+        stream.response = MagicMock()
+        stream.response.iter_lines.return_value = [
+            ": keep-alive",
+            "",
+            "id: 1",
+            'data: {"Id": "1",',
+            'data:  "Events": []}',
+            "",
+            "data: no json",
+            "",
+            'data: {"Id": "2"}',
+            "",
+        ]
+        self.assertEqual([{"Id": "1", "Events": []}, {"Id": "2"}], list(stream.events(10)))
+
+    def test_events_timeout(self):
+        stream = RedfishEventStream(self.api_client)
+        stream.response = MagicMock()
+        stream.response.iter_lines.return_value = ['data: {"Id": "1"}', "", 'data: {"Id": "2"}', ""]
+        with patch("time.time", side_effect=[0, 1, 1, 10]):
+            self.assertEqual([{"Id": "1"}], list(stream.events(5)))
+
+    def test_open_not_available_with_transport(self):
+        self.api_client.transport = MagicMock()
+        self.assertFalse(RedfishEventStream(self.api_client).open())
+
+    def test_open(self):
+        with patch("requests.get") as get:
+            get.return_value.ok = True
+            get.return_value.headers = {"Content-Type": "text/event-stream"}
+            stream = RedfishEventStream(self.api_client, "OriginResource eq '/redfish/v1/Systems/1'")
+            self.assertTrue(stream.open())
+        self.assertEqual(
+            "http://host.domain:443/redfish/v1/EventService/SSE?$filter=OriginResource%20eq%20'/redfish/v1/Systems/1'",
+            get.call_args[0][0],
+        )
+
+    def test_open_not_supported(self):
+        with patch("requests.get") as get:
+            get.return_value.ok = False
+            get.return_value.status_code = 404
+            self.assertFalse(RedfishEventStream(self.api_client).open())
+            get.return_value.close.assert_called_once_with()
+
+
+@pytest.mark.parametrize(
+    "settings, current, changes",
+    [
+        ({"PersistentBootConfigOrder": ["a", "b"]}, {"PersistentBootConfigOrder": ["a", "b"]}, {}),
+        (
+            {"PersistentBootConfigOrder": ["b", "a"]},
+            {"PersistentBootConfigOrder": ["a", "b"]},
+            {"PersistentBootConfigOrder": ["b", "a"]},
+        ),  # noqa: E501
+        ({"Attributes": {"A": 1, "B": 2}}, {"Attributes": {"A": 1, "B": 1, "C": 1}}, {"Attributes": {"B": 2}}),
+        ({"@odata.id": "/settings/", "Id": "settings", "Attributes": {}}, {"@odata.id": "/", "Id": "bios"}, {}),
+        ({"Attributes": {"A": 1}}, {}, {"Attributes": {"A": 1}}),
+    ],
+)
+def test_settings_diff(settings, current, changes):
+    assert SettingsTransaction.diff(settings, current) == changes
+
+
+class TestSettingsTransaction(unittest.TestCase):
+    def setUp(self):
+        self.api_client = RedfishApiClient("http", "host.domain", 443, "user", "password")
+        self.data = {
+            "Systems/1/Bios": {
+                "@Redfish.Settings": {"SettingsObject": {"@odata.id": "/redfish/v1/systems/1/bios/settings/"}},
+                "Attributes": {"A": 1},
+            },
+            "/redfish/v1/systems/1/bios/settings/": {"Attributes": {"A": 2}},
+            "Systems/1/Bios/boot": {"PersistentBootConfigOrder": ["a", "b"]},
+            "Systems/1/Bios/boot/settings": {"PersistentBootConfigOrder": ["a", "b"]},
+        }
+        self.api_client.get_request = MagicMock(side_effect=lambda path: self.data[path])
+
+    def test_settings_path(self):
+        self.assertEqual("Systems/1/Bios/boot/settings", SettingsTransaction.settings_path("Systems/1/Bios/boot/"))
+        self.assertEqual(
+            "/redfish/v1/systems/1/bios/settings/",
+            SettingsTransaction.settings_path("Systems/1/Bios", self.data["Systems/1/Bios"]),
+        )
+
+    def test_pending(self):
+        self.assertEqual({"Systems/1/Bios": {"Attributes": {"A": 2}}}, SettingsTransaction(self.api_client).pending())
+
+    def test_stage(self):
+        self.api_client.patch_request = MagicMock()
+        SettingsTransaction(self.api_client).stage("Systems/1/Bios", {"Attributes": {"B": 1}})
+        self.api_client.patch_request.assert_called_once_with(
+            "/redfish/v1/systems/1/bios/settings/", {"Attributes": {"B": 1}}
+        )
+
+    def test_verify(self):
+        self.data["Systems/1/Bios"]["@Redfish.Settings"]["Messages"] = [{"MessageId": "Bios.1.0.UnknownAttribute"}]
+        pending = {
+            "Systems/1/Bios": {"Attributes": {"A": 2}},
+            "Systems/1/Bios/boot": {"PersistentBootConfigOrder": ["a", "b"]},
+        }
+        results = SettingsTransaction(self.api_client).verify(pending)
+        self.assertEqual(
+            {
+                "applied": False,
+                "not_applied": {"Attributes": {"A": 2}},
+                "messages": [{"MessageId": "Bios.1.0.UnknownAttribute"}],
+            },
+            results["Systems/1/Bios"],
+        )
+        self.assertEqual({"applied": True, "not_applied": {}, "messages": []}, results["Systems/1/Bios/boot"])
+
+    def test_is_success(self):
+        self.assertTrue(SettingsTransaction.is_success({"MessageId": "Base.1.0.Success"}))
+        self.assertFalse(SettingsTransaction.is_success({"MessageId": "Bios.1.0.UnknownAttribute"}))
+
+
+class TestRedfishModuleBase(unittest.TestCase):
+    def setUp(self):
+        self.module_base = RedfishModuleBase()
+        self.module_base.api_client = RedfishApiClient("http", "host.domain", 443, "user", "password")
+
+    def test_wait_for_events(self):
+        condition = MagicMock(side_effect=[False, False, True])
+        with patch.object(RedfishEventStream, "open", return_value=True), patch.object(
+            RedfishEventStream, "events", return_value=iter([{"Id": "1"}, {"Id": "2"}, {"Id": "3"}])
+        ), patch.object(RedfishEventStream, "close") as close:
+            self.assertTrue(self.module_base.wait_for(condition, 10))
+        self.assertEqual(3, condition.call_count)
+        close.assert_called_once_with()
+
+    def test_wait_for_polling(self):
+        self.module_base.api_client.transport = MagicMock()
+        condition = MagicMock(side_effect=[False, False, True])
+        with patch("time.sleep") as sleep:
+            self.assertTrue(self.module_base.wait_for(condition, 10, poll_interval=1))
+        self.assertEqual(2, sleep.call_count)
+
+    def test_wait_for_timeout(self):
+        self.module_base.api_client.transport = MagicMock()
+        self.assertFalse(self.module_base.wait_for(MagicMock(return_value=False), 0))
+
+    def test_wait_for_events_remaining_time(self):
+        condition = MagicMock(side_effect=[False, True])
+        with patch.object(RedfishEventStream, "open", return_value=True), patch.object(
+            RedfishEventStream, "events", return_value=iter([{"Id": "1"}])
+        ) as events, patch.object(RedfishEventStream, "close"), patch("time.time", side_effect=[0, 4, 4]):
+            self.assertTrue(self.module_base.wait_for(condition, 10))
+        # the first check took 4 of 10 seconds
+        events.assert_called_once_with(6, keep_alives=False)
+
+    def test_wait_for_max_event_gap(self):
+        condition = MagicMock(side_effect=[False, False, True])
+        with patch.object(RedfishEventStream, "open", return_value=True), patch.object(
+            RedfishEventStream, "events", return_value=iter([None, None, None])
+        ), patch.object(RedfishEventStream, "close"), patch("time.time", side_effect=[0, 0, 0, 10, 40, 40, 50, 80]):
+            self.assertTrue(self.module_base.wait_for(condition, 100, max_event_gap=30))
+        self.assertEqual(3, condition.call_count)
+
+    def test_apply_pending_settings(self):
+        self.module_base.module = MagicMock(check_mode=False)
+        system = {"PowerState": "On", "Oem": {"Hpe": {"PostState": "FinishedPost"}}}
+        bios = {"Attributes": {"A": 1}}
+        bios_settings = {"Attributes": {"A": 2}}
+
+        def reset(path, data):
+            bios["Attributes"]["A"] = 2
+
+        self.module_base.api_client.get_request = MagicMock(
+            side_effect=lambda path: {
+                "Systems/1": system,
+                "Systems/1/Bios": bios,
+                "Systems/1/Bios/settings": bios_settings,
+            }[path]
+        )
+        self.module_base.api_client.post_request = MagicMock(side_effect=reset)
+        self.module_base.api_client.transport = MagicMock()
+        with patch("time.sleep"):
+            pending, results = self.module_base.apply_pending_settings(["Systems/1/Bios"], "ForceRestart", 10)
+        self.assertEqual({"Systems/1/Bios": {"Attributes": {"A": 2}}}, pending)
+        self.assertTrue(results["Systems/1/Bios"]["applied"])
+        self.module_base.api_client.post_request.assert_called_once_with(
+            "Systems/1/Actions/ComputerSystem.Reset", {"ResetType": "ForceRestart"}
+        )
+
+    def test_apply_pending_settings_check_mode(self):
+        self.module_base.module = MagicMock(check_mode=True)
+        with patch.object(SettingsTransaction, "pending", return_value={"Systems/1/Bios": {"Attributes": {"A": 2}}}):
+            pending, results = self.module_base.apply_pending_settings()
+        self.assertEqual({"Systems/1/Bios": {"Attributes": {"A": 2}}}, pending)
+        self.assertIsNone(results)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2021, The unbelievable Machine Company GmbH
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishApiClient  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishEventStream  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.redfish import RedfishModuleBase  # type: ignore # noqa: E501
+
+DEV_TOOLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "dev_tools")
+
+SYSTEM_FILTER = "OriginResource eq '/redfish/v1/Systems/1'"
+
+
+class TestRedfishEventStreamMockIlo(unittest.TestCase):
+    """RedfishEventStream against dev_tools/mock_ilo.py served on a free port,
+    requests to 127.0.0.1 go to the iLO of the first server"""
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            import flask  # noqa: F401
+            from werkzeug import serving
+        except ImportError:
+            raise unittest.SkipTest("mock_ilo requires flask")
+        sys.path.insert(0, DEV_TOOLS)
+        try:
+            import mock_ilo
+        finally:
+            sys.path.remove(DEV_TOOLS)
+        cls.server = serving.make_server("127.0.0.1", 0, mock_ilo.app, threaded=True)
+        thread = threading.Thread(target=cls.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.api_client = RedfishApiClient("http", "127.0.0.1", self.server.server_port, "user", "password")
+
+    def push_power_button(self):
+        self.api_client.post_request("Systems/1/Actions/ComputerSystem.Reset", {"ResetType": "PushPowerButton"})
+
+    def test_keep_alives(self):
+        stream = RedfishEventStream(self.api_client)
+        self.assertTrue(stream.open())
+        try:
+            # mock sends a keep-alive comment every second
+            self.assertEqual([None], list(stream.events(1.5, keep_alives=True))[:1])
+        finally:
+            stream.close()
+
+    def test_filter(self):
+        matching = RedfishEventStream(self.api_client, SYSTEM_FILTER)
+        other = RedfishEventStream(self.api_client, "OriginResource eq '/redfish/v1/Managers/1'")
+        self.assertTrue(matching.open())
+        self.assertTrue(other.open())
+        try:
+            self.push_power_button()
+            event = next(matching.events(3))["Events"][0]
+            self.assertEqual("/redfish/v1/Systems/1/", event["OriginOfCondition"]["@odata.id"])
+            self.assertTrue(event["MessageId"].startswith("iLOEvents.2.1.ServerPowered"))
+            self.assertEqual([], list(other.events(1.5)))
+        finally:
+            matching.close()
+            other.close()
+
+    def test_wait_for_power_change(self):
+        module = RedfishModuleBase()
+        module.api_client = self.api_client
+        state = self.api_client.get_request("Systems/1")["PowerState"]
+        timer = threading.Timer(0.5, self.push_power_button)
+        timer.start()
+        start = time.time()
+        try:
+            # without the event the condition would be checked again after poll_interval only
+            self.assertTrue(
+                module.wait_for(
+                    lambda: self.api_client.get_request("Systems/1")["PowerState"] != state,
+                    10,
+                    event_filter=SYSTEM_FILTER,
+                    poll_interval=30,
+                )
+            )
+        finally:
+            timer.join()
+        self.assertLess(time.time() - start, 5)
@@ -2,6 +2,8 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import functools
+
 import pytest
 
 from ansible_collections.unbelievable.hpe.plugins.modules.ilo_power_state import ILOPowerState  # type: ignore # noqa: E501
@@ -27,3 +29,51 @@ from ansible_collections.unbelievable.hpe.plugins.modules.ilo_power_state import
 def test_change_required(current_state, action, expected):
     result = ILOPowerState.change_required(current_state, action)
     assert expected == result
+
+
+@pytest.mark.parametrize(
+    "current_state, action, expected",
+    [
+        ("Off", "On", "On"),
+        ("Off", "ForceRestart", "On"),
+        ("Off", "PushPowerButton", "On"),
+        ("On", "PushPowerButton", "Off"),
+        ("On", "ForceOff", "Off"),
+        ("On", "GracefulShutdown", "Off"),
+        ("On", "GracefulRestart", "On"),
+    ],
+)
+def test_expected_state(current_state, action, expected):
+    assert expected == ILOPowerState.expected_state(current_state, action)
+
+
+def system(power_state, post_state="FinishedPost"):
+    return {"PowerState": power_state, "Oem": {"Hpe": {"PostState": post_state}}}
+
+
+@pytest.mark.parametrize(
+    "systems, expected",
+    [
+        # not restarted yet
+        ([system("On")], [False]),
+        (
+            [system("On"), system("PoweringOff"), system("Off"), system("On", "InPost"), system("On")],
+            [False] * 4 + [True],
+        ),
+        (
+            [system("On"), system("On", "InPostDiscoveryStart"), system("On", "InPostDiscoveryComplete")],
+            [False, False, True],
+        ),
+    ],
+)
+def test_power_state_reached_restart(systems, expected):
+    for action in ["GracefulRestart", "ForceRestart"]:
+        condition = ILOPowerState.power_state_reached(functools.partial(next, iter(systems)), "On", action)
+        assert expected == [condition() for _ in systems]
+
+
+def test_power_state_reached():
+    condition = ILOPowerState.power_state_reached(lambda: system("On"), "Off", "GracefulRestart")
+    assert condition()
+    condition = ILOPowerState.power_state_reached(lambda: system("PoweringOff"), "On", "GracefulShutdown")
+    assert not condition()
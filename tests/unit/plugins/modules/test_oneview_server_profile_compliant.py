@@ -0,0 +1,91 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import unittest
+
+from mock import MagicMock
+
+from ansible_collections.unbelievable.hpe.plugins.modules.oneview_server_profile_compliant import OneViewServerProfileCompliant  # type: ignore # noqa: E501
+from ansible_collections.unbelievable.hpe.plugins.module_utils.records import ProfileSummary  # type: ignore # noqa: E501
+
+
+def profile(id, compliance="Compliant"):
+    return {
+        "uri": "/rest/server-profiles/" + id,
+        "name": "profile-" + id,
+        "templateCompliance": compliance,
+        "serverHardwareUri": "/rest/server-hardware/" + id,
+    }
+
+
+class TestOneViewServerProfileCompliant(unittest.TestCase):
+    def setUp(self):
+        self.profiles = dict((p["uri"], p) for p in [profile("1"), profile("2", "NonCompliant"), profile("3")])
+        self.module = OneViewServerProfileCompliant()
+        self.module.module = MagicMock()
+        self.module.module.fail_json.side_effect = SystemExit
+        self.module.api_client = MagicMock()
+        self.module.api_client.get_resources.side_effect = lambda uris: dict(
+            (u, self.profiles[u]) for u in uris if u in self.profiles
+        )
+
+    def set_params(self, **params):
+        self.module.module.params = dict(
+            dict(profile_name=None, profile_uuid=None, profile_names=None, profile_uuids=None, profile_filter=None),
+            **params
+        )
+
+    def set_index_search(self, supported):
+        self.module.api_client.has_feature.side_effect = lambda feature: supported and feature == "index_search"
+        # index resources do not necessarily hold templateCompliance
+        self.module.api_client.index_search.return_value = [
+            {"uri": "/rest/server-profiles/2", "name": "profile-2", "category": "server-profiles"}
+        ]
+        self.module.api_client.list_server_profiles.return_value = [self.profiles["/rest/server-profiles/2"]]
+
+    def test_get_profile_by_name(self):
+        for supported in [True, False]:
+            self.set_index_search(supported)
+            self.set_params(profile_name="profile-2")
+            self.assertEqual(
+                ProfileSummary.from_profile(self.profiles["/rest/server-profiles/2"]), self.module.get_profile()
+            )
+            self.module.api_client.list_server_profiles.assert_called_with("'name' = 'profile-2'")
+            self.assertFalse(self.module.api_client.index_search.called)
+
+    def test_get_profiles_index(self):
+        self.set_index_search(True)
+        self.set_params(profile_names=["profile-2"], profile_uuids=["3"])
+        profiles = self.module.get_profiles()
+        self.assertEqual(["NonCompliant", "Compliant"], [p.templateCompliance for p in profiles])
+        self.module.api_client.index_search.assert_called_once_with(
+            category="server-profiles", filter="name = 'profile-2'", fields=["uri"]
+        )
+        self.module.api_client.get_resources.assert_called_once_with(
+            ["/rest/server-profiles/2", "/rest/server-profiles/3"]
+        )
+        self.assertFalse(self.module.api_client.list_server_profiles.called)
+
+    def test_get_profiles_without_index(self):
+        self.set_index_search(False)
+        self.set_params(profile_names=["profile-2"], profile_uuids=["3"])
+        profiles = self.module.get_profiles()
+        self.assertEqual(["profile-2", "profile-3"], [p.name for p in profiles])
+        self.module.api_client.list_server_profiles.assert_called_once_with("name = 'profile-2'")
+        self.assertFalse(self.module.api_client.index_search.called)
+
+    def test_get_profiles_filter(self):
+        # profile_filter is a /rest/server-profiles filter, not an index filter
+        self.set_index_search(True)
+        self.set_params(profile_filter="templateCompliance = 'NonCompliant'")
+        self.assertEqual(["profile-2"], [p.name for p in self.module.get_profiles()])
+        self.module.api_client.list_server_profiles.assert_called_once_with("templateCompliance = 'NonCompliant'")
+        self.assertFalse(self.module.api_client.index_search.called)
+
+    def test_get_profiles_missing(self):
+        self.set_index_search(True)
+        self.set_params(profile_names=["profile-2", "profile-9"], profile_uuids=["8"])
+        with self.assertRaises(SystemExit):
+            self.module.get_profiles()
+        self.module.module.fail_json.assert_called_once_with(msg="Server profiles not found: 8, profile-9")